@@ -1,4 +1,6 @@
 -- Eliminar tablas si existen (para reinicialización)
+DROP TABLE IF EXISTS resumen_ventas_producto CASCADE;
+DROP TABLE IF EXISTS resumen_pedidos_cliente CASCADE;
 DROP TABLE IF EXISTS Pago CASCADE;
 DROP TABLE IF EXISTS Envio CASCADE;
 DROP TABLE IF EXISTS DetallePedido CASCADE;
@@ -229,100 +231,368 @@ COMMENT ON COLUMN Envio.Fecha_Envio IS 'Fecha en que se realizó el envío (NULL
 -- ============================================================================
 
 -- Función: Actualizar total del pedido automáticamente
+-- Trigger por sentencia con tablas de transición: aplica un solo UPDATE por
+-- pedido afectado con la suma de los cambios (delta) de toda la sentencia,
+-- en lugar de recalcular el pedido completo por cada fila de detalle
 CREATE OR REPLACE FUNCTION actualizar_total_pedido()
 RETURNS TRIGGER AS $$
 BEGIN
-    UPDATE Pedido
-    SET Total = (
-        SELECT COALESCE(SUM(Cantidad * Precio_Unitario), 0)
-        FROM DetallePedido
-        WHERE Id_Pedido = COALESCE(NEW.Id_Pedido, OLD.Id_Pedido)
-    )
-    WHERE Id_Pedido = COALESCE(NEW.Id_Pedido, OLD.Id_Pedido);
+    IF TG_OP = 'INSERT' THEN
+        UPDATE Pedido p
+        SET Total = p.Total + d.Delta
+        FROM (
+            SELECT Id_Pedido, SUM(Cantidad * Precio_Unitario) AS Delta
+            FROM nuevos
+            GROUP BY Id_Pedido
+        ) d
+        WHERE p.Id_Pedido = d.Id_Pedido;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE Pedido p
+        SET Total = p.Total + d.Delta
+        FROM (
+            SELECT Id_Pedido, SUM(Delta) AS Delta
+            FROM (
+                SELECT Id_Pedido, Cantidad * Precio_Unitario AS Delta FROM nuevos
+                UNION ALL
+                SELECT Id_Pedido, -(Cantidad * Precio_Unitario) FROM viejos
+            ) cambios
+            GROUP BY Id_Pedido
+        ) d
+        WHERE p.Id_Pedido = d.Id_Pedido AND d.Delta <> 0;
+    ELSE
+        UPDATE Pedido p
+        SET Total = p.Total - d.Delta
+        FROM (
+            SELECT Id_Pedido, SUM(Cantidad * Precio_Unitario) AS Delta
+            FROM viejos
+            GROUP BY Id_Pedido
+        ) d
+        WHERE p.Id_Pedido = d.Id_Pedido;
+    END IF;
     
-    RETURN COALESCE(NEW, OLD);
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger: Actualizar total al insertar detalle
+-- Trigger: Actualizar total al insertar detalles
 CREATE TRIGGER trg_actualizar_total_insert
 AFTER INSERT ON DetallePedido
-FOR EACH ROW
+REFERENCING NEW TABLE AS nuevos
+FOR EACH STATEMENT
 EXECUTE FUNCTION actualizar_total_pedido();
 
--- Trigger: Actualizar total al modificar detalle
+-- Trigger: Actualizar total al modificar detalles
 CREATE TRIGGER trg_actualizar_total_update
 AFTER UPDATE ON DetallePedido
-FOR EACH ROW
+REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+FOR EACH STATEMENT
 EXECUTE FUNCTION actualizar_total_pedido();
 
--- Trigger: Actualizar total al eliminar detalle
+-- Trigger: Actualizar total al eliminar detalles
 CREATE TRIGGER trg_actualizar_total_delete
 AFTER DELETE ON DetallePedido
-FOR EACH ROW
+REFERENCING OLD TABLE AS viejos
+FOR EACH STATEMENT
 EXECUTE FUNCTION actualizar_total_pedido();
 
--- Función: Validar stock antes de insertar detalle
+-- Función: Validar y descontar stock al insertar detalles
+-- Trigger por sentencia: agrupa las unidades pedidas por producto, bloquea
+-- los productos en orden de Id (dos inserciones concurrentes nunca se
+-- esperan en orden inverso, así que no hay interbloqueos), comprueba todos
+-- a la vez y descuenta el stock con un solo UPDATE
 CREATE OR REPLACE FUNCTION validar_stock_producto()
 RETURNS TRIGGER AS $$
 DECLARE
-    stock_actual INTEGER;
+    faltante RECORD;
 BEGIN
-    SELECT Stock INTO stock_actual
+    PERFORM 1
     FROM Producto
-    WHERE Id_Producto = NEW.Id_Producto;
+    WHERE Id_Producto IN (SELECT Id_Producto FROM nuevos)
+    ORDER BY Id_Producto
+    FOR NO KEY UPDATE;
+    
+    SELECT p.Id_Producto, p.Stock, s.Cantidad INTO faltante
+    FROM Producto p
+    JOIN (
+        SELECT Id_Producto, SUM(Cantidad) AS Cantidad
+        FROM nuevos
+        GROUP BY Id_Producto
+    ) s ON s.Id_Producto = p.Id_Producto
+    WHERE p.Stock < s.Cantidad
+    ORDER BY p.Id_Producto
+    LIMIT 1;
     
-    IF stock_actual < NEW.Cantidad THEN
-        RAISE EXCEPTION 'Stock insuficiente. Disponible: %, Solicitado: %', stock_actual, NEW.Cantidad;
+    IF FOUND THEN
+        RAISE EXCEPTION 'Stock insuficiente para el producto %. Disponible: %, Solicitado: %',
+            faltante.Id_Producto, faltante.Stock, faltante.Cantidad;
     END IF;
     
     -- Reducir stock
-    UPDATE Producto
-    SET Stock = Stock - NEW.Cantidad
-    WHERE Id_Producto = NEW.Id_Producto;
+    UPDATE Producto p
+    SET Stock = p.Stock - s.Cantidad
+    FROM (
+        SELECT Id_Producto, SUM(Cantidad) AS Cantidad
+        FROM nuevos
+        GROUP BY Id_Producto
+    ) s
+    WHERE p.Id_Producto = s.Id_Producto;
     
-    RETURN NEW;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Trigger: Validar stock antes de insertar
+-- Trigger: Validar stock al insertar (la sentencia completa falla si algún
+-- producto no tiene stock suficiente)
 CREATE TRIGGER trg_validar_stock
-BEFORE INSERT ON DetallePedido
-FOR EACH ROW
+AFTER INSERT ON DetallePedido
+REFERENCING NEW TABLE AS nuevos
+FOR EACH STATEMENT
 EXECUTE FUNCTION validar_stock_producto();
 
+-- ============================================================================
+-- RESÚMENES DE VENTAS Y PEDIDOS
+-- Descripción: Agregados por producto y por cliente que sirven a las vistas.
+-- Se mantienen con triggers por sentencia que aplican solo el cambio (delta)
+-- de las filas afectadas, así que consultar un producto o cliente es una
+-- lectura por clave primaria en lugar de agregar todo DetallePedido o Pedido.
+-- La carga masiva desactiva estos triggers y los reconstruye en bloque al
+-- terminar (scripts/resumenes.py); TRUNCATE tampoco los dispara.
+-- Esta sección y la de vistas se pueden volver a ejecutar sobre una base ya
+-- creada: scripts/resumenes.py las aplica a los volúmenes existentes.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS resumen_ventas_producto (
+    Id_Producto INTEGER PRIMARY KEY,
+    Total_Ventas BIGINT NOT NULL DEFAULT 0,
+    Unidades_Vendidas BIGINT NOT NULL DEFAULT 0,
+    Ingreso_Total DECIMAL NOT NULL DEFAULT 0,
+    Suma_Precios DECIMAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS resumen_pedidos_cliente (
+    Id_Cliente INTEGER PRIMARY KEY,
+    Total_Pedidos BIGINT NOT NULL DEFAULT 0,
+    Total_Gastado DECIMAL NOT NULL DEFAULT 0,
+    Ultima_Compra TIMESTAMP
+);
+
+-- Comentarios
+COMMENT ON TABLE resumen_ventas_producto IS 'Ventas acumuladas por producto (mantenida por triggers)';
+COMMENT ON TABLE resumen_pedidos_cliente IS 'Pedidos acumulados por cliente (mantenida por triggers)';
+COMMENT ON COLUMN resumen_ventas_producto.Suma_Precios IS 'Suma de Precio_Unitario, para el precio promedio';
+
+-- Función: Acumular en resumen_ventas_producto los detalles de la sentencia
+CREATE OR REPLACE FUNCTION actualizar_resumen_ventas()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO resumen_ventas_producto AS r
+            (Id_Producto, Total_Ventas, Unidades_Vendidas, Ingreso_Total, Suma_Precios)
+        SELECT Id_Producto, SUM(Ventas), SUM(Cantidad), SUM(Ingreso), SUM(Precio)
+        FROM (
+            SELECT Id_Producto, 1 AS Ventas, Cantidad, Cantidad * Precio_Unitario AS Ingreso,
+                   Precio_Unitario AS Precio
+            FROM nuevos
+        ) cambios
+        GROUP BY Id_Producto
+        ORDER BY Id_Producto
+        ON CONFLICT (Id_Producto) DO UPDATE
+        SET Total_Ventas = r.Total_Ventas + EXCLUDED.Total_Ventas,
+            Unidades_Vendidas = r.Unidades_Vendidas + EXCLUDED.Unidades_Vendidas,
+            Ingreso_Total = r.Ingreso_Total + EXCLUDED.Ingreso_Total,
+            Suma_Precios = r.Suma_Precios + EXCLUDED.Suma_Precios;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO resumen_ventas_producto AS r
+            (Id_Producto, Total_Ventas, Unidades_Vendidas, Ingreso_Total, Suma_Precios)
+        SELECT Id_Producto, SUM(Ventas), SUM(Cantidad), SUM(Ingreso), SUM(Precio)
+        FROM (
+            SELECT Id_Producto, 1 AS Ventas, Cantidad, Cantidad * Precio_Unitario AS Ingreso,
+                   Precio_Unitario AS Precio
+            FROM nuevos
+            UNION ALL
+            SELECT Id_Producto, -1, -Cantidad, -(Cantidad * Precio_Unitario), -Precio_Unitario
+            FROM viejos
+        ) cambios
+        GROUP BY Id_Producto
+        ORDER BY Id_Producto
+        ON CONFLICT (Id_Producto) DO UPDATE
+        SET Total_Ventas = r.Total_Ventas + EXCLUDED.Total_Ventas,
+            Unidades_Vendidas = r.Unidades_Vendidas + EXCLUDED.Unidades_Vendidas,
+            Ingreso_Total = r.Ingreso_Total + EXCLUDED.Ingreso_Total,
+            Suma_Precios = r.Suma_Precios + EXCLUDED.Suma_Precios;
+    ELSE
+        INSERT INTO resumen_ventas_producto AS r
+            (Id_Producto, Total_Ventas, Unidades_Vendidas, Ingreso_Total, Suma_Precios)
+        SELECT Id_Producto, SUM(Ventas), SUM(Cantidad), SUM(Ingreso), SUM(Precio)
+        FROM (
+            SELECT Id_Producto, -1 AS Ventas, -Cantidad AS Cantidad, -(Cantidad * Precio_Unitario) AS Ingreso,
+                   -Precio_Unitario AS Precio
+            FROM viejos
+        ) cambios
+        GROUP BY Id_Producto
+        ORDER BY Id_Producto
+        ON CONFLICT (Id_Producto) DO UPDATE
+        SET Total_Ventas = r.Total_Ventas + EXCLUDED.Total_Ventas,
+            Unidades_Vendidas = r.Unidades_Vendidas + EXCLUDED.Unidades_Vendidas,
+            Ingreso_Total = r.Ingreso_Total + EXCLUDED.Ingreso_Total,
+            Suma_Precios = r.Suma_Precios + EXCLUDED.Suma_Precios;
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Función: Acumular en resumen_pedidos_cliente los pedidos de la sentencia
+-- (incluye los cambios de Total que hace actualizar_total_pedido). Un MAX no
+-- se puede descontar: si un pedido eliminado o modificado tenía la última
+-- compra de su cliente, se vuelve a calcular con idx_pedido_cliente
+CREATE OR REPLACE FUNCTION actualizar_resumen_pedidos()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO resumen_pedidos_cliente AS r
+            (Id_Cliente, Total_Pedidos, Total_Gastado, Ultima_Compra)
+        SELECT Id_Cliente, SUM(Pedidos), SUM(Total), MAX(Fecha)
+        FROM (
+            SELECT Id_Cliente, 1 AS Pedidos, Total, Fecha_Pedido AS Fecha
+            FROM nuevos
+        ) cambios
+        GROUP BY Id_Cliente
+        ORDER BY Id_Cliente
+        ON CONFLICT (Id_Cliente) DO UPDATE
+        SET Total_Pedidos = r.Total_Pedidos + EXCLUDED.Total_Pedidos,
+            Total_Gastado = r.Total_Gastado + EXCLUDED.Total_Gastado,
+            Ultima_Compra = GREATEST(r.Ultima_Compra, EXCLUDED.Ultima_Compra);
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO resumen_pedidos_cliente AS r
+            (Id_Cliente, Total_Pedidos, Total_Gastado, Ultima_Compra)
+        SELECT Id_Cliente, SUM(Pedidos), SUM(Total), MAX(Fecha)
+        FROM (
+            SELECT Id_Cliente, 1 AS Pedidos, Total, Fecha_Pedido AS Fecha
+            FROM nuevos
+            UNION ALL
+            SELECT Id_Cliente, -1, -Total, NULL
+            FROM viejos
+        ) cambios
+        GROUP BY Id_Cliente
+        ORDER BY Id_Cliente
+        ON CONFLICT (Id_Cliente) DO UPDATE
+        SET Total_Pedidos = r.Total_Pedidos + EXCLUDED.Total_Pedidos,
+            Total_Gastado = r.Total_Gastado + EXCLUDED.Total_Gastado,
+            Ultima_Compra = GREATEST(r.Ultima_Compra, EXCLUDED.Ultima_Compra);
+        
+        UPDATE resumen_pedidos_cliente r
+        SET Ultima_Compra = (
+            SELECT MAX(Fecha_Pedido) FROM Pedido WHERE Id_Cliente = r.Id_Cliente
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM viejos v
+            WHERE v.Id_Cliente = r.Id_Cliente
+              AND v.Fecha_Pedido >= r.Ultima_Compra
+              AND NOT EXISTS (
+                  SELECT 1 FROM nuevos n
+                  WHERE n.Id_Pedido = v.Id_Pedido
+                    AND n.Id_Cliente = v.Id_Cliente
+                    AND n.Fecha_Pedido = v.Fecha_Pedido
+              )
+        );
+    ELSE
+        INSERT INTO resumen_pedidos_cliente AS r
+            (Id_Cliente, Total_Pedidos, Total_Gastado, Ultima_Compra)
+        SELECT Id_Cliente, SUM(Pedidos), SUM(Total), MAX(Fecha)
+        FROM (
+            SELECT Id_Cliente, -1 AS Pedidos, -Total AS Total, NULL::TIMESTAMP AS Fecha
+            FROM viejos
+        ) cambios
+        GROUP BY Id_Cliente
+        ORDER BY Id_Cliente
+        ON CONFLICT (Id_Cliente) DO UPDATE
+        SET Total_Pedidos = r.Total_Pedidos + EXCLUDED.Total_Pedidos,
+            Total_Gastado = r.Total_Gastado + EXCLUDED.Total_Gastado,
+            Ultima_Compra = GREATEST(r.Ultima_Compra, EXCLUDED.Ultima_Compra);
+        
+        UPDATE resumen_pedidos_cliente r
+        SET Ultima_Compra = (
+            SELECT MAX(Fecha_Pedido) FROM Pedido WHERE Id_Cliente = r.Id_Cliente
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM viejos v
+            WHERE v.Id_Cliente = r.Id_Cliente
+              AND v.Fecha_Pedido >= r.Ultima_Compra
+        );
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Triggers: Mantener resumen_ventas_producto
+CREATE OR REPLACE TRIGGER trg_resumen_ventas_insert
+AFTER INSERT ON DetallePedido
+REFERENCING NEW TABLE AS nuevos
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_resumen_ventas();
+
+CREATE OR REPLACE TRIGGER trg_resumen_ventas_update
+AFTER UPDATE ON DetallePedido
+REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_resumen_ventas();
+
+CREATE OR REPLACE TRIGGER trg_resumen_ventas_delete
+AFTER DELETE ON DetallePedido
+REFERENCING OLD TABLE AS viejos
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_resumen_ventas();
+
+-- Triggers: Mantener resumen_pedidos_cliente
+CREATE OR REPLACE TRIGGER trg_resumen_pedidos_insert
+AFTER INSERT ON Pedido
+REFERENCING NEW TABLE AS nuevos
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_resumen_pedidos();
+
+CREATE OR REPLACE TRIGGER trg_resumen_pedidos_update
+AFTER UPDATE ON Pedido
+REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_resumen_pedidos();
+
+CREATE OR REPLACE TRIGGER trg_resumen_pedidos_delete
+AFTER DELETE ON Pedido
+REFERENCING OLD TABLE AS viejos
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_resumen_pedidos();
+
 -- ============================================================================
 -- VISTAS ÚTILES
 -- ============================================================================
 
--- Vista: Resumen de ventas por producto
+-- Vista: Resumen de ventas por producto (sobre resumen_ventas_producto)
 CREATE OR REPLACE VIEW vista_ventas_producto AS
 SELECT 
     p.Id_Producto,
     p.Nombre,
     c.Nombre as Categoria,
-    COUNT(dp.Id_Detalle) as Total_Ventas,
-    SUM(dp.Cantidad) as Unidades_Vendidas,
-    SUM(dp.Cantidad * dp.Precio_Unitario) as Ingreso_Total,
-    AVG(dp.Precio_Unitario) as Precio_Promedio
+    COALESCE(r.Total_Ventas, 0) as Total_Ventas,
+    CASE WHEN r.Total_Ventas > 0 THEN r.Unidades_Vendidas END as Unidades_Vendidas,
+    CASE WHEN r.Total_Ventas > 0 THEN r.Ingreso_Total END as Ingreso_Total,
+    CASE WHEN r.Total_Ventas > 0 THEN r.Suma_Precios / r.Total_Ventas END as Precio_Promedio
 FROM Producto p
 JOIN Categoria c ON p.Id_Categoria = c.Id_Categoria
-LEFT JOIN DetallePedido dp ON p.Id_Producto = dp.Id_Producto
-GROUP BY p.Id_Producto, p.Nombre, c.Nombre;
+LEFT JOIN resumen_ventas_producto r ON p.Id_Producto = r.Id_Producto;
 
--- Vista: Resumen de pedidos por cliente
+-- Vista: Resumen de pedidos por cliente (sobre resumen_pedidos_cliente)
 CREATE OR REPLACE VIEW vista_pedidos_cliente AS
 SELECT 
     c.Id_Cliente,
     c.Nombre,
     c.Email,
-    COUNT(p.Id_Pedido) as Total_Pedidos,
-    SUM(p.Total) as Total_Gastado,
-    AVG(p.Total) as Promedio_Pedido,
-    MAX(p.Fecha_Pedido) as Ultima_Compra
+    COALESCE(r.Total_Pedidos, 0) as Total_Pedidos,
+    CASE WHEN r.Total_Pedidos > 0 THEN r.Total_Gastado END as Total_Gastado,
+    CASE WHEN r.Total_Pedidos > 0 THEN r.Total_Gastado / r.Total_Pedidos END as Promedio_Pedido,
+    r.Ultima_Compra
 FROM Cliente c
-LEFT JOIN Pedido p ON c.Id_Cliente = p.Id_Cliente
-GROUP BY c.Id_Cliente, c.Nombre, c.Email;
+LEFT JOIN resumen_pedidos_cliente r ON c.Id_Cliente = r.Id_Cliente;
 
 -- ============================================================================
 -- DATOS INICIALES (SEEDS)
@@ -49,12 +49,33 @@ DB_NAME="${DB_NAME:-ecommerce_db}"
 DB_USER="${DB_USER:-ecommerce_user}"
 DB_PASSWORD="${DB_PASSWORD:-ecommerce_pass}"
 NIVEL_POBLADO="${NIVEL_POBLADO:-leve}"
+ESCALA_POBLADO="${ESCALA_POBLADO:-}"
+SNAPSHOT_POBLADO="${SNAPSHOT_POBLADO:-1}"
+
+# Nivel del snapshot: la escala o el nombre canónico del nivel
+if [ -n "$ESCALA_POBLADO" ]; then
+    SNAPSHOT_NIVEL="escala_$ESCALA_POBLADO"
+else
+    case "$NIVEL_POBLADO" in
+        leve|light|dev|desarrollo) SNAPSHOT_NIVEL="leve" ;;
+        moderado|medium|pre-produccion|preprod) SNAPSHOT_NIVEL="moderado" ;;
+        masivo|heavy|produccion|prod) SNAPSHOT_NIVEL="masivo" ;;
+        *) SNAPSHOT_NIVEL="" ;;
+    esac
+fi
 
 info "Configuración:"
 info "  - Host: $DB_HOST:$DB_PORT"
 info "  - Database: $DB_NAME"
 info "  - Usuario: $DB_USER"
-info "  - Nivel de poblado: $NIVEL_POBLADO"
+if [ -n "$ESCALA_POBLADO" ]; then
+    info "  - Escala de poblado: $ESCALA_POBLADO"
+else
+    info "  - Nivel de poblado: $NIVEL_POBLADO"
+fi
+if [ "$SNAPSHOT_POBLADO" = "1" ]; then
+    info "  - Snapshot: $SNAPSHOT_NIVEL (esquema $(md5sum /sql/ddl/schema.sql 2>/dev/null | cut -c1-12))"
+fi
 echo ""
 
 # Esperar a que PostgreSQL esté listo
@@ -75,6 +96,19 @@ done
 log "✓ PostgreSQL está disponible"
 echo ""
 
+# Restaurar el snapshot del nivel si existe y es del esquema actual
+RESTAURADO=0
+if [ "$SNAPSHOT_POBLADO" = "1" ] && [ -n "$SNAPSHOT_NIVEL" ]; then
+    log "Buscando snapshot del nivel $SNAPSHOT_NIVEL..."
+    if python scripts/snapshot_bd.py restaurar --nivel "$SNAPSHOT_NIVEL"; then
+        RESTAURADO=1
+        log "✓ Base de datos restaurada desde el snapshot (sin volver a poblar)"
+    else
+        info "Sin snapshot utilizable: se poblará la base de datos"
+    fi
+    echo ""
+fi
+
 # Verificar que el esquema esté creado
 log "Verificando esquema de base de datos..."
 TABLE_COUNT=$(PGPASSWORD=$DB_PASSWORD psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" -t -c "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='public' AND table_type='BASE TABLE';" 2>/dev/null | tr -d ' ')
@@ -92,53 +126,80 @@ if [ "$TABLE_COUNT" -lt 5 ]; then
     fi
 else
     log "✓ Esquema de base de datos verificado ($TABLE_COUNT tablas)"
+    # Un volumen inicializado antes de que schema.sql tuviera las tablas de
+    # resumen no las recibe de /docker-entrypoint-initdb.d: se aplican aquí
+    log "Aplicando tablas de resumen, triggers y vistas de schema.sql..."
+    if ! python scripts/resumenes.py; then
+        error "No se pudo aplicar el DDL de las tablas de resumen"
+        exit 1
+    fi
 fi
 echo ""
 
-# Ejecutar script de poblado según nivel
-log "Iniciando poblado de base de datos (Nivel: $NIVEL_POBLADO)..."
-echo ""
+# Ejecutar el motor de poblado según escala o nivel (con set -e un fallo
+# terminaría el script: el estado se guarda para informarlo abajo)
+ESTADO_POBLADO=0
+if [ "$RESTAURADO" = "1" ]; then
+    info "Poblado omitido: datos restaurados del snapshot $SNAPSHOT_NIVEL"
+elif [ -n "$ESCALA_POBLADO" ]; then
+    log "Iniciando poblado de base de datos (Escala: $ESCALA_POBLADO)..."
+    echo ""
+    info "Ejecutando poblado por ESCALA (1.0 = masivo)"
+    info "  - Estrategia de carga elegida según el tamaño"
+    echo ""
+    python scripts/poblar.py --escala "$ESCALA_POBLADO" || ESTADO_POBLADO=$?
+else
+    log "Iniciando poblado de base de datos (Nivel: $NIVEL_POBLADO)..."
+    echo ""
 
-case "$NIVEL_POBLADO" in
-    leve|light|dev|desarrollo)
-        info "Ejecutando poblado LEVE (Desarrollo)"
-        info "  - Clientes: ~100"
-        info "  - Productos: ~50"
-        info "  - Pedidos: ~200"
-        info "  - Tiempo estimado: 5-10 segundos"
-        echo ""
-        python scripts/poblar_leve.py
-        ;;
-    
-    moderado|medium|pre-produccion|preprod)
-        info "Ejecutando poblado MODERADO (Pre-producción)"
-        info "  - Clientes: ~10,000"
-        info "  - Productos: ~5,000"
-        info "  - Pedidos: ~15,000"
-        info "  - Tiempo estimado: 2-5 minutos"
-        echo ""
-        python scripts/poblar_moderado.py
-        ;;
-    
-    masivo|heavy|produccion|prod)
-        info "Ejecutando poblado MASIVO (Producción)"
-        info "  - Clientes: ~500,000"
-        info "  - Productos: ~100,000"
-        info "  - Pedidos: ~1,000,000"
-        info "  - Tiempo estimado: 15-30 minutos"
-        echo ""
-        python scripts/poblar_masivo.py
-        ;;
-    
-    *)
-        error "Nivel de poblado no reconocido: $NIVEL_POBLADO"
-        error "Niveles válidos: leve, moderado, masivo"
-        exit 1
-        ;;
-esac
+    case "$NIVEL_POBLADO" in
+        leve|light|dev|desarrollo)
+            info "Ejecutando poblado LEVE (Desarrollo)"
+            info "  - Clientes: ~100"
+            info "  - Productos: ~50"
+            info "  - Pedidos: ~200"
+            info "  - Estrategia: INSERT multi-fila"
+            echo ""
+            python scripts/poblar.py --nivel leve || ESTADO_POBLADO=$?
+            ;;
+        
+        moderado|medium|pre-produccion|preprod)
+            info "Ejecutando poblado MODERADO (Pre-producción)"
+            info "  - Clientes: ~10,000"
+            info "  - Productos: ~5,000"
+            info "  - Pedidos: ~15,000"
+            info "  - Estrategia: COPY"
+            echo ""
+            python scripts/poblar.py --nivel moderado || ESTADO_POBLADO=$?
+            ;;
+        
+        masivo|heavy|produccion|prod)
+            info "Ejecutando poblado MASIVO (Producción)"
+            info "  - Clientes: ~500,000"
+            info "  - Productos: ~100,000"
+            info "  - Pedidos: ~1,000,000"
+            info "  - Estrategia: COPY en paralelo"
+            echo ""
+            python scripts/poblar.py --nivel masivo || ESTADO_POBLADO=$?
+            ;;
+        
+        *)
+            error "Nivel de poblado no reconocido: $NIVEL_POBLADO"
+            error "Niveles válidos: leve, moderado, masivo"
+            exit 1
+            ;;
+    esac
+fi
+
+# Guardar la base recién poblada como snapshot del nivel
+if [ "$ESTADO_POBLADO" -eq 0 ] && [ "$RESTAURADO" = "0" ] && [ "$SNAPSHOT_POBLADO" = "1" ] && [ -n "$SNAPSHOT_NIVEL" ]; then
+    if ! python scripts/snapshot_bd.py guardar --nivel "$SNAPSHOT_NIVEL"; then
+        warning "No se pudo guardar el snapshot del nivel $SNAPSHOT_NIVEL"
+    fi
+fi
 
 # Verificar resultado
-if [ $? -eq 0 ]; then
+if [ "$ESTADO_POBLADO" -eq 0 ]; then
     echo ""
     log "============================================================================"
     log "               ✓ POBLADO COMPLETADO EXITOSAMENTE"
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Micro-benchmark de estrategias de carga
+Sistema E-Commerce
+
+Carga las mismas filas sintéticas (generadas una vez con la semilla, como en
+el motor de poblado) con cada estrategia y cada tamaño de lote, para elegir
+BATCH_SIZE y COPY_BUFFER_SIZE a partir de mediciones:
+
+- execute_batch:    INSERT de una fila, agrupados en páginas de `lote` sentencias
+- execute_values:   INSERT ... VALUES %s con `lote` filas por sentencia
+- values_preparado: INSERT multi-fila de `lote` filas preparado una vez
+                    (PREPARE/EXECUTE) y ejecutado con parámetros
+- copy_texto:       COPY FROM STDIN en formato texto, un COPY por buffer
+- copy_binario:     COPY FROM STDIN en formato binario, un COPY por buffer
+- copy_flujo:       COPY binario de `lote` filas codificadas a medida que el
+                    servidor las lee (FuenteCopy), sin buffer completo
+- copy_paralelo:    buffers binarios repartidos entre varios procesos, cada
+                    uno con su conexión
+
+Las estrategias INSERT recorren --lotes y las COPY --buffers. Cada medición
+vacía la tabla, carga todas las filas en una transacción e informa de
+filas/s, CPU del cliente (incluidos los procesos hijos) y pico de memoria
+residente (RSS del proceso y sus hijos, muestreado en un hilo aparte).
+
+Las tablas se crean en un esquema propio (ESQUEMA) con LIKE ... INCLUDING
+ALL (índices, CHECK y valores por defecto, sin claves foráneas) y el
+esquema se elimina al terminar.
+
+Uso:
+    python benchmark_carga.py [--filas N] [--tablas Cliente,Producto,DetallePedido]
+                              [--estrategias E1,E2] [--lotes 100,1000,10000]
+                              [--buffers 5000,50000,200000] [--workers N]
+                              [--semilla S] [--salida RUTA]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+from datetime import datetime
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_batch, execute_values
+from copy_buffers import COLUMNAS, crear_buffer, copiar_buffer, copiar_filas
+from generador_vectorizado import (
+    rng_tramo, decimales, generar_lote_clientes, generar_lote_productos, generar_lote_pedidos,
+)
+from vocabulario import Vocabulario
+from telemetria import MuestreoRecursos, tiempo_cpu
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'ecommerce_db'),
+    'user': os.getenv('DB_USER', 'ecommerce_user'),
+    'password': os.getenv('DB_PASSWORD', 'ecommerce_pass')
+}
+
+ESQUEMA = 'benchmark_carga'
+LOGS_DIR = os.getenv('LOGS_DIR', 'logs')
+
+FILAS = 50000
+SEMILLA = 42
+TABLAS = ('Cliente', 'Producto', 'DetallePedido')
+
+# Barrido alrededor de los valores actuales (BATCH_SIZE=1000, COPY_BUFFER_SIZE=50000)
+LOTES = (100, 1000, 10000)
+BUFFERS = (5000, 50000, 200000)
+WORKERS = min(4, os.cpu_count() or 1)
+
+ESTRATEGIAS_INSERT = ('execute_batch', 'execute_values', 'values_preparado')
+ESTRATEGIAS_COPY = ('copy_texto', 'copy_binario', 'copy_flujo', 'copy_paralelo')
+ESTRATEGIAS = ESTRATEGIAS_INSERT + ESTRATEGIAS_COPY
+
+# Intervalo del muestreo de memoria (las cargas más rápidas duran décimas de segundo)
+INTERVALO_MUESTREO = 0.01
+
+# Filas de la medición en curso, heredadas por los procesos de copy_paralelo
+_filas_carga = {}
+
+
+def conectar_db():
+    """Conexión a PostgreSQL con el esquema del benchmark en el search_path"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options=f"-c search_path={ESQUEMA}")
+        conn.autocommit = False
+        return conn
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def generar_filas(tabla, n, semilla, vocabulario):
+    """n filas de la tabla con Id explícitos desde 1, como las genera el motor"""
+    rng = rng_tramo(semilla, f"Benchmark{tabla}", 0)
+    referencia = datetime(2026, 1, 1)
+    ids = range(1, n + 1)
+    if tabla == 'Cliente':
+        lote = generar_lote_clientes(rng, n, referencia, 5 * 365, 0.9)
+        return list(zip(ids, vocabulario.nombres(rng, n), vocabulario.emails(rng, ids),
+                        vocabulario.telefonos(rng, n), lote['fecha_registro'].tolist(),
+                        lote['activo'].tolist()))
+    if tabla == 'Producto':
+        lote = generar_lote_productos(rng, n, np.arange(1, 21), 5, 15000, 3000, 0.95)
+        return list(zip(ids, lote['id_categoria'].tolist(), vocabulario.nombres_producto(rng, n),
+                        vocabulario.descripciones(rng, n, 200), decimales(lote['precio']),
+                        lote['stock'].tolist(), lote['activo'].tolist()))
+    if tabla == 'DetallePedido':
+        # Pedidos suficientes para n detalles (3 de media por pedido)
+        productos = np.arange(1, 5001)
+        lote = generar_lote_pedidos(rng, n // 2 + 1, np.arange(1, 1001), productos,
+                                    rng.integers(500, 1500000, size=len(productos)),
+                                    referencia, 365, 1, 5, max_cantidad=8,
+                                    max_horas_pago=72, max_dias_envio=7)
+        return list(zip(ids, (lote['detalle_pedido'][:n] + 1).tolist(),
+                        lote['detalle_producto'][:n].tolist(), lote['cantidad'][:n].tolist(),
+                        decimales(lote['precio_unitario'][:n])))
+    raise ValueError(f"Tabla no soportada: {tabla}")
+
+
+def preparar_esquema(conn, tablas):
+    """(Re)crea el esquema con copias de las tablas (sin claves foráneas)"""
+    cursor = conn.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {ESQUEMA}")
+    for tabla in tablas:
+        cursor.execute(f"CREATE TABLE {ESQUEMA}.{tabla} (LIKE public.{tabla} INCLUDING ALL)")
+    conn.commit()
+
+
+def eliminar_esquema(conn):
+    """Elimina el esquema del benchmark"""
+    conn.rollback()
+    conn.cursor().execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+    conn.commit()
+
+
+def sentencia_insert(tabla, filas=1):
+    """INSERT de la tabla con filas grupos de marcadores %s"""
+    grupo = f"({', '.join(['%s'] * len(COLUMNAS[tabla]))})"
+    return f"INSERT INTO {tabla} ({', '.join(COLUMNAS[tabla])}) VALUES {', '.join([grupo] * filas)}"
+
+
+def partir(filas, tamano):
+    """Trozos consecutivos de la lista de como mucho tamano filas"""
+    return [filas[i:i + tamano] for i in range(0, len(filas), tamano)]
+
+
+def cargar_execute_batch(cursor, tabla, filas, lote):
+    execute_batch(cursor, sentencia_insert(tabla), filas, page_size=lote)
+
+
+def cargar_execute_values(cursor, tabla, filas, lote):
+    sql = f"INSERT INTO {tabla} ({', '.join(COLUMNAS[tabla])}) VALUES %s"
+    execute_values(cursor, sql, filas, page_size=lote)
+
+
+def cargar_values_preparado(cursor, tabla, filas, lote):
+    columnas = len(COLUMNAS[tabla])
+    marcadores = ", ".join(
+        f"({', '.join(f'${i * columnas + j + 1}' for j in range(columnas))})" for i in range(lote))
+    cursor.execute(f"PREPARE insertar_lote AS INSERT INTO {tabla} ({', '.join(COLUMNAS[tabla])}) "
+                   f"VALUES {marcadores}")
+    ejecutar = f"EXECUTE insertar_lote ({', '.join(['%s'] * (columnas * lote))})"
+    for trozo in partir(filas, lote):
+        valores = [valor for fila in trozo for valor in fila]
+        if len(trozo) == lote:
+            cursor.execute(ejecutar, valores)
+        else:
+            # El último trozo, más corto, como una sentencia normal
+            cursor.execute(sentencia_insert(tabla, len(trozo)), valores)
+    cursor.execute("DEALLOCATE insertar_lote")
+
+
+def _cargar_copy(cursor, tabla, filas, lote, formato):
+    buffer = crear_buffer(tabla, formato)
+    for trozo in partir(filas, lote):
+        for fila in trozo:
+            buffer.escribir(fila)
+        copiar_buffer(cursor, buffer)
+        buffer.reiniciar()
+
+
+def cargar_copy_texto(cursor, tabla, filas, lote):
+    _cargar_copy(cursor, tabla, filas, lote, 'texto')
+
+
+def cargar_copy_binario(cursor, tabla, filas, lote):
+    _cargar_copy(cursor, tabla, filas, lote, 'binario')
+
+
+def cargar_copy_flujo(cursor, tabla, filas, lote):
+    for trozo in partir(filas, lote):
+        copiar_filas(cursor, tabla, iter(trozo), 'binario')
+
+
+def _copiar_trozos(tabla, trozos, lote):
+    """Proceso de copy_paralelo: carga sus trozos de _filas_carga en su propia transacción"""
+    conn = conectar_db()
+    cursor = conn.cursor()
+    filas = _filas_carga[tabla]
+    for inicio in trozos:
+        _cargar_copy(cursor, tabla, filas[inicio:inicio + lote], lote, 'binario')
+    conn.commit()
+    conn.close()
+
+
+def cargar_copy_paralelo(cursor, tabla, filas, lote, workers):
+    inicios = list(range(0, len(filas), lote))
+    # Los procesos heredan las filas al crearse (fork)
+    _filas_carga[tabla] = filas
+    contexto = mp.get_context('fork')
+    with contexto.Pool(workers) as pool:
+        pool.starmap(_copiar_trozos, [(tabla, inicios[i::workers], lote) for i in range(workers)])
+    del _filas_carga[tabla]
+
+
+CARGADORES = {
+    'execute_batch': cargar_execute_batch,
+    'execute_values': cargar_execute_values,
+    'values_preparado': cargar_values_preparado,
+    'copy_texto': cargar_copy_texto,
+    'copy_binario': cargar_copy_binario,
+    'copy_flujo': cargar_copy_flujo,
+    'copy_paralelo': cargar_copy_paralelo,
+}
+
+
+def medir(conn, tabla, filas, estrategia, lote, workers):
+    """Vacía la tabla, carga todas las filas y devuelve las métricas de la carga"""
+    cursor = conn.cursor()
+    cursor.execute(f"TRUNCATE TABLE {tabla}")
+    conn.commit()
+
+    muestreo = MuestreoRecursos(INTERVALO_MUESTREO)
+    rss_inicio = muestreo.rss()
+    muestreo.start()
+    cpu_inicio = tiempo_cpu()
+    inicio = time.perf_counter()
+    try:
+        if estrategia == 'copy_paralelo':
+            cargar_copy_paralelo(cursor, tabla, filas, lote, workers)
+        else:
+            CARGADORES[estrategia](cursor, tabla, filas, lote)
+        conn.commit()
+    finally:
+        duracion = time.perf_counter() - inicio
+        cpu = tiempo_cpu() - cpu_inicio
+        pico = muestreo.detener()
+
+    cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+    cargadas = cursor.fetchone()[0]
+    conn.commit()
+    if cargadas != len(filas):
+        raise RuntimeError(f"{estrategia} cargó {cargadas:,} de {len(filas):,} filas en {tabla}")
+    return {
+        'tabla': tabla,
+        'estrategia': estrategia,
+        'lote': lote,
+        'segundos': round(duracion, 4),
+        'filas_por_segundo': round(len(filas) / duracion),
+        'cpu_segundos': round(cpu, 4),
+        'cpu_pct': round(100 * cpu / duracion, 1),
+        'rss_pico_mb': round(pico / 1024 / 1024, 1),
+        'rss_extra_mb': round((pico - rss_inicio) / 1024 / 1024, 1),
+    }
+
+
+def lista(tipo):
+    """Convierte 'a,b,c' en una tupla de valores del tipo indicado"""
+    return lambda texto: tuple(tipo(v) for v in texto.split(','))
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Micro-benchmark de estrategias de carga")
+    parser.add_argument('--filas', type=int, default=FILAS,
+                        help=f"Filas por tabla (default: {FILAS:,})")
+    parser.add_argument('--tablas', type=lista(str), default=TABLAS,
+                        help=f"Tablas a cargar (default: {','.join(TABLAS)})")
+    parser.add_argument('--estrategias', type=lista(str), default=ESTRATEGIAS,
+                        help=f"Estrategias a medir (default: {','.join(ESTRATEGIAS)})")
+    parser.add_argument('--lotes', type=lista(int), default=LOTES,
+                        help=f"Filas por lote de las estrategias INSERT (default: {','.join(map(str, LOTES))})")
+    parser.add_argument('--buffers', type=lista(int), default=BUFFERS,
+                        help=f"Filas por buffer de las estrategias COPY (default: {','.join(map(str, BUFFERS))})")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f"Procesos de copy_paralelo (default: {WORKERS})")
+    parser.add_argument('--semilla', type=int, default=SEMILLA,
+                        help=f"Semilla de generación (default: {SEMILLA})")
+    parser.add_argument('--salida', help=f"JSON de resultados (default: {LOGS_DIR}/benchmark_carga_<fecha>.json)")
+    args = parser.parse_args(argv)
+    for estrategia in args.estrategias:
+        if estrategia not in ESTRATEGIAS:
+            parser.error(f"Estrategia desconocida: {estrategia} (válidas: {', '.join(ESTRATEGIAS)})")
+    for tabla in args.tablas:
+        if tabla not in TABLAS:
+            parser.error(f"Tabla no soportada: {tabla} (válidas: {', '.join(TABLAS)})")
+
+    print("\n" + "="*80)
+    print("  MICRO-BENCHMARK - ESTRATEGIAS DE CARGA")
+    print("="*80)
+    print(f"  Filas por tabla: {args.filas:,} | Lotes INSERT: {', '.join(map(str, args.lotes))} | "
+          f"Buffers COPY: {', '.join(map(str, args.buffers))} | Workers: {args.workers}")
+
+    vocabulario = Vocabulario.cargar(args.semilla)
+    conn = conectar_db()
+    resultados = []
+    try:
+        preparar_esquema(conn, args.tablas)
+        for tabla in args.tablas:
+            filas = generar_filas(tabla, args.filas, args.semilla, vocabulario)
+            print(f"\n📊 {tabla} ({len(filas):,} filas)")
+            print(f"   {'Estrategia':<17} {'Lote':>7} {'Tiempo':>9} {'Filas/s':>11} "
+                  f"{'CPU':>8} {'CPU %':>6} {'RSS pico':>9} {'RSS extra':>10}")
+            for estrategia in args.estrategias:
+                tamanos = args.lotes if estrategia in ESTRATEGIAS_INSERT else args.buffers
+                for lote in tamanos:
+                    r = medir(conn, tabla, filas, estrategia, min(lote, len(filas)), args.workers)
+                    resultados.append(r)
+                    print(f"   {estrategia:<17} {lote:>7,} {r['segundos']:>8.2f}s {r['filas_por_segundo']:>11,} "
+                          f"{r['cpu_segundos']:>7.2f}s {r['cpu_pct']:>5.0f}% {r['rss_pico_mb']:>7.1f}MB "
+                          f"{r['rss_extra_mb']:>8.1f}MB")
+            mejor = max((r for r in resultados if r['tabla'] == tabla), key=lambda r: r['filas_por_segundo'])
+            print(f"   🚀 Mejor: {mejor['estrategia']} con lote {mejor['lote']:,} "
+                  f"({mejor['filas_por_segundo']:,} filas/s)")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        eliminar_esquema(conn)
+        conn.close()
+
+    salida = args.salida or os.path.join(
+        LOGS_DIR, f"benchmark_carga_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump({'fecha': datetime.now().isoformat(timespec='seconds'), 'filas': args.filas,
+                   'semilla': args.semilla, 'workers': args.workers, 'resultados': resultados},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
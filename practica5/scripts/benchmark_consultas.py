@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Benchmark de las consultas analíticas de consultas.sql
+Sistema E-Commerce
+
+Lee las diez consultas SELECT de la sección 3.1 de data/sql/dml/consultas.sql
+(cada una va precedida de su \\echo '--- N. TÍTULO ---') y mide cada una:
+
+- en caliente: una ejecución de calentamiento y después N ejecuciones en la
+  misma conexión;
+- en frío: cada ejecución en una conexión nueva (cachés de catálogo y de
+  planes vacías). Si el servidor tiene pg_buffercache_evict (PostgreSQL 17,
+  extensión pg_buffercache) también se vacían los shared_buffers; la caché
+  de páginas del sistema operativo no se puede vaciar desde un cliente.
+
+De cada modo se guardan las latencias (ejecución y lectura de todas las
+filas) con sus percentiles y un EXPLAIN (ANALYZE, BUFFERS) con el plan
+completo y los bloques leídos de caché y de disco.
+
+Los resultados se guardan en JSON (LOGS_DIR) junto con la carga que hay en
+la base (etiqueta de la última ejecución del motor y filas por tabla). Con
+una línea base guardada antes (--guardar-linea-base) se marcan como
+regresión las consultas cuya mediana empeora más de --tolerancia, y el
+script termina con código 1.
+
+Uso:
+    python benchmark_consultas.py [--nivel leve|moderado|masivo] [--consultas 1,4,10]
+                                  [--repeticiones N] [--repeticiones-frio N]
+                                  [--linea-base RUTA] [--guardar-linea-base]
+                                  [--tolerancia F] [--archivo RUTA] [--salida RUTA]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime
+import numpy as np
+import psycopg2
+import poblar
+from control_carga import crear_tablas_control, ultima_ejecucion_completada
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'ecommerce_db'),
+    'user': os.getenv('DB_USER', 'ecommerce_user'),
+    'password': os.getenv('DB_PASSWORD', 'ecommerce_pass')
+}
+
+# consultas.sql en el repositorio o montado en el contenedor (./data/sql:/sql)
+RUTAS_CONSULTAS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sql', 'dml', 'consultas.sql'),
+    '/sql/dml/consultas.sql',
+]
+LOGS_DIR = os.getenv('LOGS_DIR', 'logs')
+
+REPETICIONES = 10
+REPETICIONES_FRIO = 3
+
+# Regresión: la mediana empeora más de TOLERANCIA y más de MIN_DIFERENCIA_MS
+TOLERANCIA = 0.20
+MIN_DIFERENCIA_MS = 1.0
+
+PERCENTILES = (50, 90, 95, 99)
+MODOS = ('caliente', 'frio')
+
+TABLAS = ['Cliente', 'Categoria', 'Producto', 'Pedido', 'DetallePedido', 'Pago', 'Envio']
+
+MARCA_CONSULTA = re.compile(r"^\\echo '--- (\d+)\. (.+?) ---'\s*$")
+
+
+def conectar_db():
+    """Conexión a PostgreSQL"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.autocommit = False
+        return conn
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def leer_consultas(ruta):
+    """[(numero, titulo, sql)] de las consultas numeradas del archivo
+
+    Cada consulta empieza en su \\echo '--- N. TÍTULO ---' y termina en la
+    primera línea acabada en ';'. Se omiten las líneas de comentario y los
+    comandos de psql.
+    """
+    consultas = []
+    actual = None
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.rstrip()
+            marca = MARCA_CONSULTA.match(linea)
+            if marca:
+                actual = (int(marca.group(1)), marca.group(2), [])
+                consultas.append(actual)
+                continue
+            if actual is None or linea.startswith('\\') or linea.lstrip().startswith('--'):
+                continue
+            actual[2].append(linea)
+            if linea.endswith(';'):
+                actual = None
+    return [(numero, titulo, "\n".join(lineas).strip().rstrip(';'))
+            for numero, titulo, lineas in consultas]
+
+
+def huella(sql):
+    """Hash corto del texto de la consulta, para detectar cambios frente a la línea base"""
+    return hashlib.md5(" ".join(sql.split()).encode()).hexdigest()[:12]
+
+
+def describir_datos(conn):
+    """Carga presente en la base: etiqueta y parámetros de la última ejecución y filas por tabla"""
+    crear_tablas_control(conn)
+    parametros = ultima_ejecucion_completada(conn)
+    cursor = conn.cursor()
+    filas = {}
+    for tabla in TABLAS:
+        cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+        filas[tabla] = cursor.fetchone()[0]
+    cursor.execute("SHOW server_version")
+    version = cursor.fetchone()[0]
+    conn.commit()
+    return {
+        'etiqueta': parametros['etiqueta'] if parametros else None,
+        'semilla': parametros['semilla'] if parametros else None,
+        'filas': filas,
+        'servidor': version,
+    }
+
+
+def puede_vaciar_buffers(conn):
+    """Indica si está instalada pg_buffercache_evict (PostgreSQL 17+)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'pg_buffercache_evict')")
+    disponible = cursor.fetchone()[0]
+    conn.commit()
+    return disponible
+
+
+def vaciar_buffers(conn):
+    """Expulsa de shared_buffers todas las páginas de la base"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COUNT(*) FROM pg_buffercache
+        WHERE reldatabase = (SELECT oid FROM pg_database WHERE datname = current_database())
+          AND pg_buffercache_evict(bufferid)
+    """)
+    conn.commit()
+
+
+def ejecutar(cursor, sql):
+    """Milisegundos en ejecutar la consulta y leer todas sus filas"""
+    inicio = time.perf_counter()
+    cursor.execute(sql)
+    cursor.fetchall()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def explicar(cursor, sql):
+    """EXPLAIN (ANALYZE, BUFFERS) de la consulta: tiempos, bloques y plan completo"""
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+    plan = cursor.fetchone()[0][0]
+    raiz = plan['Plan']
+    return {
+        'planificacion_ms': plan['Planning Time'],
+        'ejecucion_ms': plan['Execution Time'],
+        'bloques_cache': raiz.get('Shared Hit Blocks', 0),
+        'bloques_leidos': raiz.get('Shared Read Blocks', 0),
+        'bloques_temporales': raiz.get('Temp Read Blocks', 0) + raiz.get('Temp Written Blocks', 0),
+        'plan': plan,
+    }
+
+
+def resumir(latencias):
+    """Mínimo, máximo, media y percentiles (ms) de las latencias"""
+    valores = np.array(latencias)
+    resumen = {'min': valores.min(), 'max': valores.max(), 'media': valores.mean()}
+    resumen.update({f'p{p}': np.percentile(valores, p) for p in PERCENTILES})
+    return {clave: round(float(valor), 3) for clave, valor in resumen.items()}
+
+
+def medir_caliente(conn, sql, repeticiones):
+    """Calentamiento y N ejecuciones en la misma conexión, y EXPLAIN al final"""
+    cursor = conn.cursor()
+    try:
+        ejecutar(cursor, sql)
+        latencias = [ejecutar(cursor, sql) for _ in range(repeticiones)]
+        explain = explicar(cursor, sql)
+    finally:
+        conn.rollback()
+    return latencias, explain
+
+
+def medir_frio(sql, repeticiones, vaciar):
+    """N ejecuciones, cada una en una conexión nueva (y con shared_buffers vacíos si se puede)"""
+    latencias = []
+    explain = None
+    for i in range(repeticiones + 1):
+        conn = conectar_db()
+        try:
+            if vaciar:
+                vaciar_buffers(conn)
+            cursor = conn.cursor()
+            # La última repetición es el EXPLAIN (también en frío)
+            if i < repeticiones:
+                latencias.append(ejecutar(cursor, sql))
+            else:
+                explain = explicar(cursor, sql)
+        finally:
+            conn.rollback()
+            conn.close()
+    return latencias, explain
+
+
+def medir_consulta(conn, numero, titulo, sql, repeticiones, repeticiones_frio, vaciar):
+    """Resultado de una consulta en los dos modos"""
+    resultado = {'numero': numero, 'titulo': titulo, 'huella': huella(sql)}
+    mediciones = {
+        'caliente': medir_caliente(conn, sql, repeticiones),
+        'frio': medir_frio(sql, repeticiones_frio, vaciar),
+    }
+    for modo, (latencias, explain) in mediciones.items():
+        resultado[modo] = {'latencias_ms': [round(ms, 3) for ms in latencias],
+                           'percentiles_ms': resumir(latencias), 'explain': explain}
+    return resultado
+
+
+def comparar(resultados, base, tolerancia):
+    """Compara las medianas con la línea base; devuelve las regresiones [(numero, modo, base, actual)]"""
+    if base['datos']['etiqueta'] != resultados['datos']['etiqueta']:
+        print(f"⚠️  La línea base se midió con otra carga ({base['datos']['etiqueta']}); "
+              "la comparación puede no ser representativa")
+    anteriores = {c['numero']: c for c in base['consultas']}
+
+    regresiones = []
+    print(f"\n   {'Consulta':<10} {'Modo':<9} {'Base p50':>11} {'Actual p50':>11} {'Cambio':>9}")
+    for consulta in resultados['consultas']:
+        anterior = anteriores.get(consulta['numero'])
+        if anterior is None:
+            continue
+        nota = "  (consulta modificada)" if anterior['huella'] != consulta['huella'] else ""
+        for modo in MODOS:
+            antes = anterior[modo]['percentiles_ms']['p50']
+            ahora = consulta[modo]['percentiles_ms']['p50']
+            cambio = (ahora - antes) / antes if antes else 0.0
+            if cambio > tolerancia and ahora - antes > MIN_DIFERENCIA_MS:
+                regresiones.append((consulta['numero'], modo, antes, ahora))
+                marca = "⚠️  regresión"
+            elif cambio < -tolerancia and antes - ahora > MIN_DIFERENCIA_MS:
+                marca = "🚀 mejora"
+            else:
+                marca = ""
+            print(f"   {consulta['numero']:<10} {modo:<9} {antes:>9.2f}ms {ahora:>9.2f}ms "
+                  f"{cambio:>+8.0%}  {marca}{nota}")
+    return regresiones
+
+
+def guardar_json(ruta, datos):
+    """Escribe el JSON creando el directorio si hace falta"""
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2, default=str)
+
+
+def ruta_linea_base(etiqueta):
+    """Línea base por defecto de una carga (una por nivel o escala)"""
+    nombre = re.sub(r'[^a-z0-9.]+', '_', (etiqueta or 'sin_carga').lower()).strip('_')
+    return os.path.join(LOGS_DIR, f"benchmark_consultas_base_{nombre}.json")
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de las consultas analíticas de consultas.sql")
+    parser.add_argument('--nivel', choices=['leve', 'moderado', 'masivo'],
+                        help="Poblar antes la base con este nivel (por defecto se usan los datos actuales)")
+    parser.add_argument('--consultas', type=lambda t: {int(n) for n in t.split(',')},
+                        help="Números de las consultas a medir, separados por comas (default: todas)")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES,
+                        help=f"Ejecuciones en caliente por consulta (default: {REPETICIONES})")
+    parser.add_argument('--repeticiones-frio', type=int, default=REPETICIONES_FRIO,
+                        help=f"Ejecuciones en frío por consulta (default: {REPETICIONES_FRIO})")
+    parser.add_argument('--linea-base',
+                        help="JSON con el que comparar (default: el guardado para la carga actual)")
+    parser.add_argument('--guardar-linea-base', action='store_true',
+                        help="Guardar estos resultados como línea base")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f"Empeoramiento de la mediana que se considera regresión (default: {TOLERANCIA})")
+    parser.add_argument('--archivo', default=next((r for r in RUTAS_CONSULTAS if os.path.exists(r)),
+                                                  RUTAS_CONSULTAS[-1]),
+                        help="Archivo de consultas (default: data/sql/dml/consultas.sql)")
+    parser.add_argument('--salida', help=f"JSON de resultados (default: {LOGS_DIR}/benchmark_consultas_<fecha>.json)")
+    args = parser.parse_args(argv)
+
+    consultas = leer_consultas(args.archivo)
+    if args.consultas:
+        consultas = [c for c in consultas if c[0] in args.consultas]
+    if not consultas:
+        print(f"❌ No hay consultas que medir en {args.archivo}")
+        sys.exit(1)
+
+    if args.nivel:
+        poblar.main(['--nivel', args.nivel])
+
+    print("\n" + "="*80)
+    print("  BENCHMARK - CONSULTAS ANALÍTICAS (consultas.sql)")
+    print("="*80)
+
+    conn = conectar_db()
+    try:
+        datos = describir_datos(conn)
+        vaciar = puede_vaciar_buffers(conn)
+        print(f"  Carga: {datos['etiqueta'] or 'desconocida'} | Pedidos: {datos['filas']['Pedido']:,} | "
+              f"PostgreSQL {datos['servidor']}")
+        print(f"  Consultas: {len(consultas)} | Repeticiones: {args.repeticiones} en caliente, "
+              f"{args.repeticiones_frio} en frío "
+              f"({'shared_buffers vaciados' if vaciar else 'conexión nueva; shared_buffers sin vaciar'})")
+
+        resultados = {'fecha': datetime.now().isoformat(timespec='seconds'), 'datos': datos,
+                      'repeticiones': {'caliente': args.repeticiones, 'frio': args.repeticiones_frio},
+                      'buffers_vaciados': vaciar, 'consultas': []}
+        print(f"\n   {'Consulta':<52} {'p50':>9} {'p95':>9} {'Frío p50':>9} {'Leídos':>8}")
+        for numero, titulo, sql in consultas:
+            resultado = medir_consulta(conn, numero, titulo, sql, args.repeticiones,
+                                       args.repeticiones_frio, vaciar)
+            resultados['consultas'].append(resultado)
+            caliente, frio = resultado['caliente'], resultado['frio']
+            print(f"   {numero:>2}. {titulo[:48]:<48} {caliente['percentiles_ms']['p50']:>7.2f}ms "
+                  f"{caliente['percentiles_ms']['p95']:>7.2f}ms {frio['percentiles_ms']['p50']:>7.2f}ms "
+                  f"{frio['explain']['bloques_leidos']:>8,}")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    salida = args.salida or os.path.join(
+        LOGS_DIR, f"benchmark_consultas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    guardar_json(salida, resultados)
+    print(f"\n✓ Resultados guardados en {salida}")
+
+    linea_base = args.linea_base or ruta_linea_base(datos['etiqueta'])
+    regresiones = []
+    if args.guardar_linea_base:
+        guardar_json(linea_base, resultados)
+        print(f"✓ Línea base guardada en {linea_base}")
+    elif os.path.exists(linea_base):
+        with open(linea_base, encoding='utf-8') as f:
+            base = json.load(f)
+        print(f"\n📊 Comparación con la línea base {linea_base} ({base['fecha']})")
+        regresiones = comparar(resultados, base, args.tolerancia)
+        if regresiones:
+            print(f"\n⚠️  {len(regresiones)} regresiones (mediana más de {args.tolerancia:.0%} peor)")
+        else:
+            print("\n✓ Sin regresiones respecto a la línea base")
+    else:
+        print(f"ℹ️  Sin línea base en {linea_base} (usa --guardar-linea-base para crearla)")
+
+    if regresiones:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
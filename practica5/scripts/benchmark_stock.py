@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Prueba de concurrencia del trigger de stock: por fila vs por sentencia
+Sistema E-Commerce
+
+Varias sesiones insertan pedidos a la vez sobre unos pocos productos muy
+vendidos. Cada pedido es un solo INSERT de varias filas en DetallePedido con
+los productos en orden aleatorio y se confirma por separado. Se comparan dos
+versiones de validar_stock_producto():
+
+- fila:      la versión original, BEFORE INSERT FOR EACH ROW; bloquea cada
+             producto en el orden de las filas, así que dos pedidos con los
+             mismos productos en distinto orden pueden interbloquearse
+- sentencia: la de schema.sql, AFTER INSERT FOR EACH STATEMENT; agrupa las
+             unidades por producto, bloquea en orden de Id y descuenta con
+             un solo UPDATE. Se lee del propio schema.sql, sin copiarla aquí
+
+Las dos variantes llevan además, leídos también de schema.sql, la tabla
+resumen_ventas_producto y su trigger trg_resumen_ventas_insert: en la base
+cada inserción de detalles bloquea también las filas del resumen de sus
+productos, y esa contención forma parte de lo que se mide.
+
+Un pedido que falla por interbloqueo se deshace y se reintenta. Al final se
+comprueba que el stock descontado coincide con las unidades insertadas.
+
+La prueba se ejecuta en un esquema propio (ESQUEMA), primero en el
+search_path, con tablas mínimas de Producto y DetallePedido y que se elimina
+al terminar: no necesita una base poblada y no modifica los datos de la
+práctica.
+
+Uso:
+    python benchmark_stock.py [--sesiones N] [--pedidos N] [--productos N] [--semilla S]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import threading
+from decimal import Decimal
+import psycopg2
+from psycopg2 import errors
+from cache_datos import RUTAS_ESQUEMA
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'ecommerce_db'),
+    'user': os.getenv('DB_USER', 'ecommerce_user'),
+    'password': os.getenv('DB_PASSWORD', 'ecommerce_pass')
+}
+
+ESQUEMA = 'benchmark_stock'
+
+# Sesiones concurrentes, pedidos por sesión y productos "calientes"
+SESIONES = 8
+PEDIDOS = 100
+PRODUCTOS = 50
+SEMILLA = 42
+
+# Productos por pedido y unidades por producto
+MIN_PRODUCTOS_PEDIDO, MAX_PRODUCTOS_PEDIDO = 2, 5
+MAX_CANTIDAD = 3
+
+# Stock inicial suficiente para que ningún pedido falle por falta de stock
+STOCK_INICIAL = 10_000_000
+
+TABLAS = """
+    CREATE TABLE Producto (
+        Id_Producto INTEGER PRIMARY KEY,
+        Stock INTEGER NOT NULL CHECK (Stock >= 0)
+    );
+    CREATE TABLE DetallePedido (
+        Id_Detalle BIGSERIAL PRIMARY KEY,
+        Id_Pedido BIGINT NOT NULL,
+        Id_Producto INTEGER NOT NULL REFERENCES Producto,
+        Cantidad INTEGER NOT NULL CHECK (Cantidad > 0),
+        Precio_Unitario DECIMAL(10, 2) NOT NULL
+    );
+"""
+
+# Precio de todas las líneas (solo lo usa el resumen de ventas)
+PRECIO = Decimal('10.00')
+
+# Lo que se toma tal cual de schema.sql (el trigger de stock solo en sentencia)
+DEFINICIONES_ESQUEMA = {
+    'sentencia': [('FUNCTION', 'validar_stock_producto'), ('TRIGGER', 'trg_validar_stock')],
+    'comunes': [('TABLE', 'resumen_ventas_producto'), ('FUNCTION', 'actualizar_resumen_ventas'),
+                ('TRIGGER', 'trg_resumen_ventas_insert')],
+}
+
+# Sentencia completa de cada tipo de objeto en schema.sql
+PATRONES_ESQUEMA = {
+    'TABLE': r"CREATE TABLE (?:IF NOT EXISTS )?{}\s*\(.*?\n\);",
+    'FUNCTION': r"CREATE OR REPLACE FUNCTION {}\(\).*?\$\$ LANGUAGE plpgsql;",
+    'TRIGGER': r"CREATE (?:OR REPLACE )?TRIGGER {}\s.*?;",
+}
+
+# Versión original (por fila) del trigger de stock, que ya no está en schema.sql
+FUNCION_FILA = """
+    CREATE OR REPLACE FUNCTION validar_stock_producto_fila()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        stock_actual INTEGER;
+    BEGIN
+        SELECT Stock INTO stock_actual
+        FROM Producto
+        WHERE Id_Producto = NEW.Id_Producto;
+
+        IF stock_actual < NEW.Cantidad THEN
+            RAISE EXCEPTION 'Stock insuficiente. Disponible: %, Solicitado: %', stock_actual, NEW.Cantidad;
+        END IF;
+
+        UPDATE Producto
+        SET Stock = Stock - NEW.Cantidad
+        WHERE Id_Producto = NEW.Id_Producto;
+
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER trg_validar_stock BEFORE INSERT ON DetallePedido
+    FOR EACH ROW EXECUTE FUNCTION validar_stock_producto_fila();
+"""
+
+VARIANTES = ('fila', 'sentencia')
+
+# Segundos que cada sesión espera a las demás antes de empezar
+ESPERA_BARRERA = 60
+
+
+def conectar_db():
+    """Conexión a PostgreSQL con el esquema de la prueba en el search_path"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, options=f"-c search_path={ESQUEMA}")
+        conn.autocommit = False
+        return conn
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def definiciones_esquema(variante):
+    """Sentencias de schema.sql que instala la variante, tal como están en el archivo"""
+    ruta = next((r for r in RUTAS_ESQUEMA if os.path.exists(r)), None)
+    if ruta is None:
+        raise RuntimeError("No se encontró schema.sql")
+    with open(ruta, encoding='utf-8') as f:
+        esquema = f.read()
+    sentencias = []
+    for tipo, nombre in DEFINICIONES_ESQUEMA.get(variante, []) + DEFINICIONES_ESQUEMA['comunes']:
+        encontrada = re.search(PATRONES_ESQUEMA[tipo].format(nombre), esquema, re.DOTALL | re.IGNORECASE)
+        if encontrada is None:
+            raise RuntimeError(f"schema.sql no tiene {tipo} {nombre}")
+        sentencias.append(encontrada.group(0))
+    return sentencias
+
+
+def preparar(conn, variante, productos):
+    """(Re)crea el esquema con sus tablas, los triggers de la variante y el stock inicial
+
+    Las funciones, triggers y la tabla de resumen de schema.sql se crean en
+    ESQUEMA: la conexión lo tiene primero en el search_path.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {ESQUEMA}")
+    cursor.execute(TABLAS)
+    if variante == 'fila':
+        cursor.execute(FUNCION_FILA)
+    for sentencia in definiciones_esquema(variante):
+        cursor.execute(sentencia)
+    cursor.execute("INSERT INTO Producto SELECT g, %s FROM generate_series(1, %s) g",
+                   (STOCK_INICIAL, productos))
+    conn.commit()
+
+
+def eliminar_esquema(conn):
+    """Elimina el esquema de la prueba"""
+    conn.rollback()
+    conn.cursor().execute(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE")
+    conn.commit()
+
+
+def generar_pedidos(rng, pedidos, productos):
+    """[[(id_producto, cantidad)]] con los productos de cada pedido en orden aleatorio"""
+    return [
+        [(id_producto, rng.randint(1, MAX_CANTIDAD))
+         for id_producto in rng.sample(range(1, productos + 1),
+                                       rng.randint(MIN_PRODUCTOS_PEDIDO, min(MAX_PRODUCTOS_PEDIDO, productos)))]
+        for _ in range(pedidos)
+    ]
+
+
+def _sesion(pedidos, primer_pedido, barrera, resultado):
+    """Inserta y confirma los pedidos de una sesión; reintenta los interbloqueados
+
+    Cualquier otro error (también no poder conectar) queda en
+    resultado['error'] y rompe la barrera, para que ni las demás sesiones
+    ni medir() esperen indefinidamente.
+    """
+    conn = None
+    try:
+        conn = conectar_db()
+        cursor = conn.cursor()
+        interbloqueos = 0
+        barrera.wait()
+        for i, lineas in enumerate(pedidos):
+            filas = [(primer_pedido + i, id_producto, cantidad, PRECIO) for id_producto, cantidad in lineas]
+            while True:
+                try:
+                    cursor.execute(
+                        "INSERT INTO DetallePedido (Id_Pedido, Id_Producto, Cantidad, Precio_Unitario) VALUES "
+                        + ", ".join(["(%s, %s, %s, %s)"] * len(filas)),
+                        [valor for fila in filas for valor in fila])
+                    conn.commit()
+                    break
+                except errors.DeadlockDetected:
+                    conn.rollback()
+                    interbloqueos += 1
+        resultado['interbloqueos'] = interbloqueos
+    except BaseException as e:
+        resultado['error'] = e
+        barrera.abort()
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def medir(conn, variante, pedidos_por_sesion, productos):
+    """Ejecuta todas las sesiones a la vez; devuelve (segundos, interbloqueos, productos incorrectos)"""
+    preparar(conn, variante, productos)
+    resultados = [{} for _ in pedidos_por_sesion]
+    barrera = threading.Barrier(len(pedidos_por_sesion) + 1, timeout=ESPERA_BARRERA)
+    hilos = [threading.Thread(target=_sesion, args=(pedidos, i * len(pedidos), barrera, resultados[i]))
+             for i, pedidos in enumerate(pedidos_por_sesion)]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        barrera.wait()
+    except threading.BrokenBarrierError:
+        # Una sesión falló o no llegó a tiempo: su error se informa tras el join
+        barrera.abort()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    fallos = [r['error'] for r in resultados if 'error' in r]
+    if fallos:
+        # Las sesiones que solo encontraron la barrera rota no son la causa
+        causa = next((e for e in fallos if not isinstance(e, threading.BrokenBarrierError)), fallos[0])
+        raise RuntimeError(f"{len(fallos)} sesiones fallaron ({variante}): {causa!r}") from causa
+
+    # El stock descontado y las unidades del resumen de cada producto deben
+    # ser la suma de sus unidades
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COUNT(*) FROM Producto p
+        LEFT JOIN (SELECT Id_Producto, SUM(Cantidad) AS unidades FROM DetallePedido GROUP BY Id_Producto) d
+          ON d.Id_Producto = p.Id_Producto
+        LEFT JOIN resumen_ventas_producto r ON r.Id_Producto = p.Id_Producto
+        WHERE p.Stock <> %s - COALESCE(d.unidades, 0)
+           OR COALESCE(r.Unidades_Vendidas, 0) <> COALESCE(d.unidades, 0)
+    """, (STOCK_INICIAL,))
+    incorrectos = cursor.fetchone()[0]
+    conn.commit()
+    return duracion, sum(r.get('interbloqueos', 0) for r in resultados), incorrectos
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Prueba de concurrencia del trigger de stock por fila vs por sentencia")
+    parser.add_argument('--sesiones', type=int, default=SESIONES,
+                        help=f"Sesiones concurrentes (default: {SESIONES})")
+    parser.add_argument('--pedidos', type=int, default=PEDIDOS,
+                        help=f"Pedidos por sesión (default: {PEDIDOS})")
+    parser.add_argument('--productos', type=int, default=PRODUCTOS,
+                        help=f"Productos entre los que se reparten los pedidos (default: {PRODUCTOS})")
+    parser.add_argument('--semilla', type=int, default=SEMILLA,
+                        help=f"Semilla de generación (default: {SEMILLA})")
+    args = parser.parse_args(argv)
+    if args.productos < MIN_PRODUCTOS_PEDIDO:
+        parser.error(f"--productos debe ser al menos {MIN_PRODUCTOS_PEDIDO}")
+
+    print("\n" + "="*80)
+    print("  PRUEBA DE CONCURRENCIA - TRIGGER DE STOCK (FILA VS SENTENCIA)")
+    print("="*80)
+    print(f"  Sesiones: {args.sesiones} | Pedidos por sesión: {args.pedidos:,} | "
+          f"Productos: {args.productos}")
+
+    rng = random.Random(args.semilla)
+    pedidos_por_sesion = [generar_pedidos(rng, args.pedidos, args.productos) for _ in range(args.sesiones)]
+    total = args.sesiones * args.pedidos
+
+    conn = conectar_db()
+    try:
+        resultados = {}
+        for variante in VARIANTES:
+            duracion, interbloqueos, incorrectos = medir(conn, variante, pedidos_por_sesion, args.productos)
+            resultados[variante] = duracion
+            estado = "✓" if incorrectos == 0 else f"⚠️  {incorrectos:,} productos con stock o resumen incorrecto"
+            print(f"   {variante:<10} {duracion:>8.2f}s | {total / duracion:>9,.0f} pedidos/s | "
+                  f"Interbloqueos: {interbloqueos:>5,} | {estado}")
+
+        print(f"\n🚀 Por sentencia: {resultados['fila'] / resultados['sentencia']:.1f}x más pedidos por segundo")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+    finally:
+        eliminar_esquema(conn)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
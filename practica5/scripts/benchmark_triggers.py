@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Benchmark de triggers de totales: por fila vs por sentencia
+Sistema E-Commerce
+
+Compara dos versiones de actualizar_total_pedido() al insertar detalles en
+lote, como los tramos del nivel moderado:
+
+- fila:      la versión original, FOR EACH ROW; cada detalle recalcula el
+             SUM de todo su pedido y hace un UPDATE de Pedido
+- sentencia: la instalada desde schema.sql, FOR EACH STATEMENT con tablas
+             de transición; un solo UPDATE por pedido afectado con el delta
+             agregado. Se mide tal cual está en la base, sin copiarla aquí
+
+Solo se miden los triggers de totales: los de stock y de las tablas de
+resumen de DetallePedido y Pedido se desactivan en las dos variantes.
+
+Cada medición se hace dentro de una transacción que se deshace al final: la
+versión por fila se instala ahí mismo con otro nombre de función (el DDL de
+PostgreSQL es transaccional), los
+pedidos y detalles usan Id explícitos por encima de los existentes y no se
+consumen valores de las secuencias. La base de datos queda como estaba.
+
+Requiere una base ya poblada (toma clientes y productos existentes).
+
+Uso:
+    python benchmark_triggers.py [--pedidos N] [--lote N] [--repeticiones N] [--semilla S]
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+import psycopg2
+from copy_buffers import crear_buffer, copiar_buffer
+from generador_vectorizado import ESTADOS_PEDIDO, rng_tramo, decimales, generar_lote_pedidos
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'ecommerce_db'),
+    'user': os.getenv('DB_USER', 'ecommerce_user'),
+    'password': os.getenv('DB_PASSWORD', 'ecommerce_pass')
+}
+
+# Pedidos del nivel moderado y pedidos por sentencia COPY
+PEDIDOS = 15000
+LOTE = 1000
+REPETICIONES = 3
+SEMILLA = 42
+
+TRIGGERS_TOTAL = {
+    'trg_actualizar_total_insert': 'INSERT',
+    'trg_actualizar_total_update': 'UPDATE',
+    'trg_actualizar_total_delete': 'DELETE',
+}
+
+# Versión original (por fila) de schema.sql; la de la base no se reemplaza
+FUNCION_FILA = """
+    CREATE OR REPLACE FUNCTION actualizar_total_pedido_fila()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        UPDATE Pedido
+        SET Total = (
+            SELECT COALESCE(SUM(Cantidad * Precio_Unitario), 0)
+            FROM DetallePedido
+            WHERE Id_Pedido = COALESCE(NEW.Id_Pedido, OLD.Id_Pedido)
+        )
+        WHERE Id_Pedido = COALESCE(NEW.Id_Pedido, OLD.Id_Pedido);
+
+        RETURN COALESCE(NEW, OLD);
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+VARIANTES = ('fila', 'sentencia')
+
+
+def conectar_db():
+    """Conexión a PostgreSQL"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.autocommit = False
+        return conn
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def instalar_variante(cursor, variante):
+    """Prepara los triggers de totales de la variante (sin commit)
+
+    sentencia usa la función y los triggers instalados desde schema.sql;
+    fila los sustituye por la versión original.
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM pg_trigger
+        WHERE tgrelid = 'detallepedido'::regclass AND tgname = ANY(%s) AND tgenabled <> 'D'
+    """, (list(TRIGGERS_TOTAL),))
+    if cursor.fetchone()[0] != len(TRIGGERS_TOTAL):
+        raise RuntimeError("Faltan los triggers de totales de schema.sql o están desactivados")
+    if variante == 'fila':
+        cursor.execute(FUNCION_FILA)
+        for trigger, evento in TRIGGERS_TOTAL.items():
+            cursor.execute(f"DROP TRIGGER {trigger} ON DetallePedido")
+            cursor.execute(f"""
+                CREATE TRIGGER {trigger} AFTER {evento} ON DetallePedido
+                FOR EACH ROW EXECUTE FUNCTION actualizar_total_pedido_fila()
+            """)
+    # Solo se miden los triggers de totales: el de stock y los de las tablas de
+    # resumen se desactivan en ambas variantes. Si no, en fila cada UPDATE de
+    # Pedido.Total dispararía además trg_resumen_pedidos_update
+    cursor.execute("""
+        SELECT tgrelid::regclass, tgname FROM pg_trigger
+        WHERE tgrelid IN ('detallepedido'::regclass, 'pedido'::regclass)
+          AND NOT tgisinternal AND tgname <> ALL(%s)
+    """, (list(TRIGGERS_TOTAL),))
+    for tabla, trigger in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {tabla} DISABLE TRIGGER {trigger}")
+
+
+def generar_pedidos(conn, pedidos, semilla):
+    """Pedidos (con Total 0) y detalles generados como en la carga del nivel moderado"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT Id_Cliente FROM Cliente")
+    clientes = np.array([r[0] for r in cursor.fetchall()], dtype=np.int64)
+    cursor.execute("SELECT Id_Producto, (Precio * 100)::bigint FROM Producto WHERE Activo")
+    productos = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+    cursor.execute("SELECT COALESCE(MAX(Id_Pedido), 0), (SELECT COALESCE(MAX(Id_Detalle), 0) FROM DetallePedido) "
+                   "FROM Pedido")
+    max_pedido, max_detalle = cursor.fetchone()
+    conn.commit()
+    if not len(clientes) or not len(productos):
+        raise RuntimeError("Se necesitan clientes y productos: ejecuta antes uno de los scripts de poblado")
+
+    rng = rng_tramo(semilla, 'Benchmark', 0)
+    lote = generar_lote_pedidos(rng, pedidos, clientes, productos[:, 0], productos[:, 1],
+                                datetime.now(), 365, 1, 5, max_cantidad=8,
+                                max_horas_pago=72, max_dias_envio=7)
+    ids_pedido = max_pedido + 1 + np.arange(pedidos)
+    filas_pedido = list(zip(ids_pedido.tolist(), lote['id_cliente'].tolist(), lote['fecha'].tolist(),
+                            [ESTADOS_PEDIDO[e] for e in lote['estado'].tolist()], [Decimal(0)] * pedidos))
+    detalles = list(zip((max_detalle + 1 + np.arange(len(lote['detalle_pedido']))).tolist(),
+                        ids_pedido[lote['detalle_pedido']].tolist(), lote['detalle_producto'].tolist(),
+                        lote['cantidad'].tolist(), decimales(lote['precio_unitario'])))
+    # Índice del primer detalle de cada pedido, para partir los lotes por pedidos
+    inicios = np.concatenate(([0], np.cumsum(lote['num_detalles'])))
+    return filas_pedido, detalles, inicios
+
+
+def copiar(cursor, tabla, filas):
+    """COPY de las filas a la tabla en una sola sentencia"""
+    buffer = crear_buffer(tabla, 'binario')
+    for fila in filas:
+        buffer.escribir(fila)
+    copiar_buffer(cursor, buffer)
+
+
+def medir(conn, variante, filas_pedido, detalles, inicios, lote):
+    """Inserta los detalles por lotes de pedidos con la variante instalada y deshace todo"""
+    cursor = conn.cursor()
+    try:
+        instalar_variante(cursor, variante)
+        copiar(cursor, 'Pedido', filas_pedido)
+
+        inicio = time.perf_counter()
+        for primero in range(0, len(filas_pedido), lote):
+            ultimo = min(primero + lote, len(filas_pedido))
+            copiar(cursor, 'DetallePedido', detalles[inicios[primero]:inicios[ultimo]])
+        duracion = time.perf_counter() - inicio
+
+        # Actualizaciones de Pedido en esta transacción y totales resultantes
+        cursor.execute("SELECT n_tup_upd FROM pg_stat_xact_user_tables WHERE relname = 'pedido'")
+        actualizaciones = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT COUNT(*) FROM Pedido p
+            JOIN (SELECT Id_Pedido, SUM(Cantidad * Precio_Unitario) AS suma
+                  FROM DetallePedido WHERE Id_Pedido >= %(desde)s GROUP BY Id_Pedido) d
+              ON d.Id_Pedido = p.Id_Pedido
+            WHERE p.Total <> d.suma
+        """, {'desde': filas_pedido[0][0]})
+        incorrectos = cursor.fetchone()[0]
+    finally:
+        conn.rollback()
+    return duracion, actualizaciones, incorrectos
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de triggers de totales por fila vs por sentencia")
+    parser.add_argument('--pedidos', type=int, default=PEDIDOS,
+                        help=f"Pedidos a insertar (default: {PEDIDOS}, nivel moderado)")
+    parser.add_argument('--lote', type=int, default=LOTE,
+                        help=f"Pedidos por sentencia COPY de detalles (default: {LOTE})")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES,
+                        help=f"Mediciones por variante; se informa la mediana (default: {REPETICIONES})")
+    parser.add_argument('--semilla', type=int, default=SEMILLA,
+                        help=f"Semilla de generación (default: {SEMILLA})")
+    args = parser.parse_args(argv)
+
+    print("\n" + "="*80)
+    print("  BENCHMARK - TRIGGERS DE TOTALES (FILA VS SENTENCIA)")
+    print("="*80)
+    print(f"  Pedidos: {args.pedidos:,} | Lote: {args.lote:,} pedidos por COPY | "
+          f"Repeticiones: {args.repeticiones}")
+
+    conn = conectar_db()
+    try:
+        filas_pedido, detalles, inicios = generar_pedidos(conn, args.pedidos, args.semilla)
+        print(f"✓ {len(filas_pedido):,} pedidos y {len(detalles):,} detalles generados")
+
+        resultados = {}
+        for variante in VARIANTES:
+            mediciones = [medir(conn, variante, filas_pedido, detalles, inicios, args.lote)
+                          for _ in range(args.repeticiones)]
+            duracion = float(np.median([m[0] for m in mediciones]))
+            _, actualizaciones, incorrectos = mediciones[-1]
+            resultados[variante] = duracion
+            estado = "✓" if incorrectos == 0 else f"⚠️  {incorrectos:,} totales incorrectos"
+            print(f"   {variante:<10} {duracion:>8.3f}s | {len(detalles) / duracion:>12,.0f} detalles/s | "
+                  f"UPDATE de Pedido: {actualizaciones:>9,} | {estado}")
+
+        print(f"\n🚀 Por sentencia: {resultados['fila'] / resultados['sentencia']:.1f}x más rápido")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
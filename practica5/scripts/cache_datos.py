@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Caché en disco de los datos generados
+Sistema E-Commerce
+
+Los datos de una carga completa dependen solo de sus cantidades, la semilla,
+la fecha de referencia, el tamaño de tramo y el formato de COPY, además del
+esquema y de la versión de Faker con que se muestreó el vocabulario. La
+primera carga con una combinación dada guarda, a la vez que los envía, los
+flujos COPY de cada tramo comprimidos con gzip:
+
+    CACHE_DIR/datos/<clave>/<Tabla>/<tramo>.copy.gz
+
+Las cargas siguientes con la misma clave no generan nada: envían esos
+archivos con COPY FREEZE, una conexión por tabla y todas las tablas a la
+vez. La conciliación, los resúmenes y los índices se aplican después igual
+que en una carga generada, así que el resultado es el mismo.
+
+La fecha de referencia no forma parte de la clave: se guarda en el
+manifiesto. Una carga sin --fecha-referencia reutiliza la de la caché (así
+sigue sirviendo otro día) y una con otra fecha explícita la regenera y la
+reemplaza, de modo que hay como mucho una caché por combinación.
+
+Los archivos se escriben en <clave>.parcial, que solo pasa a <clave> (con
+su manifiesto) cuando la carga termina bien: una carga interrumpida nunca
+deja una caché incompleta.
+
+La clave incluye la huella (md5) de schema.sql, así que un cambio de esquema
+invalida la caché. Un cambio en los generadores exige subir VERSION_DATOS.
+"""
+
+import os
+import json
+import gzip
+import time
+import shutil
+import hashlib
+import threading
+from datetime import date
+from contextlib import contextmanager
+import faker
+from tqdm import tqdm
+from copy_buffers import TAMANO_LECTURA, crear_buffer
+from vocabulario import CACHE_DIR
+
+# Versión de los datos generados (cambiarla invalida la caché)
+VERSION_DATOS = 2
+
+# schema.sql en el repositorio y en el contenedor app
+RUTAS_ESQUEMA = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'sql', 'ddl', 'schema.sql'),
+    '/sql/ddl/schema.sql',
+]
+
+# Compresión rápida: escribir la caché no debe frenar la primera carga
+NIVEL_COMPRESION = 1
+
+MANIFIESTO = 'manifiesto.json'
+
+
+def huella_esquema(rutas=RUTAS_ESQUEMA):
+    """md5 de schema.sql (el mismo que da md5sum) o None si no se encuentra"""
+    for ruta in rutas:
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as f:
+                return hashlib.md5(f.read()).hexdigest()
+    return None
+
+
+class CacheDatos:
+    """Flujos COPY de una carga completa guardados por tramo y tabla"""
+
+    def __init__(self, parametros, esquema, directorio=None):
+        self.parametros = {
+            **parametros, 'esquema': esquema,
+            'version': VERSION_DATOS, 'faker': faker.VERSION,
+        }
+        huella = hashlib.md5(json.dumps(self.parametros, sort_keys=True).encode('utf-8')).hexdigest()
+        self.clave = f"s{parametros['semilla']}_{huella[:16]}"
+        self.ruta = os.path.join(directorio or CACHE_DIR, 'datos', self.clave)
+        self.parcial = f"{self.ruta}.parcial"
+        # {tabla: {archivo: filas}} de los tramos escritos en esta ejecución
+        self.archivos = {}
+        self._cerrojo = threading.Lock()
+
+    def disponible(self, fecha_referencia=None):
+        """True si ya hay una caché completa para esta clave (y la fecha, si se indica)"""
+        if not os.path.exists(os.path.join(self.ruta, MANIFIESTO)):
+            return False
+        return fecha_referencia is None or self.fecha_referencia() == fecha_referencia
+
+    def fecha_referencia(self):
+        """Fecha de referencia de la caché completa, o None si no hay"""
+        if not os.path.exists(os.path.join(self.ruta, MANIFIESTO)):
+            return None
+        return date.fromisoformat(self.manifiesto()['fecha_referencia'])
+
+    def manifiesto(self):
+        with open(os.path.join(self.ruta, MANIFIESTO), encoding='utf-8') as f:
+            return json.load(f)
+
+    def preparar(self):
+        """Empieza una caché nueva (descarta la de una carga interrumpida)"""
+        shutil.rmtree(self.parcial, ignore_errors=True)
+        os.makedirs(self.parcial)
+        self.archivos = {}
+
+    @contextmanager
+    def tramo(self, tabla, indice):
+        """Archivo gzip para el flujo COPY de un tramo de la tabla
+
+        Entrega un diccionario con el archivo; quien copia pone en 'filas'
+        las filas enviadas. El archivo solo se conserva si el bloque
+        termina bien y tiene filas.
+        """
+        directorio = os.path.join(self.parcial, tabla)
+        os.makedirs(directorio, exist_ok=True)
+        nombre = f"{indice:06d}.copy.gz"
+        ruta = os.path.join(directorio, nombre)
+        registro = {'archivo': None, 'filas': 0}
+        with gzip.open(f"{ruta}.tmp", 'wb', compresslevel=NIVEL_COMPRESION) as archivo:
+            registro['archivo'] = archivo
+            yield registro
+        if registro['filas']:
+            os.replace(f"{ruta}.tmp", ruta)
+            with self._cerrojo:
+                self.archivos.setdefault(tabla, {})[nombre] = registro['filas']
+        else:
+            os.remove(f"{ruta}.tmp")
+
+    def publicar(self, primer_id, fecha_referencia):
+        """Escribe el manifiesto y deja la caché disponible; devuelve los bytes en disco"""
+        manifiesto = {
+            'clave': self.clave,
+            'parametros': self.parametros,
+            'fecha_referencia': fecha_referencia.isoformat(),
+            'primer_id': primer_id,
+            'archivos': self.archivos,
+        }
+        with open(os.path.join(self.parcial, MANIFIESTO), 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+        # Reemplaza la caché de la misma clave con otra fecha (u otra carga idéntica)
+        shutil.rmtree(self.ruta, ignore_errors=True)
+        os.rename(self.parcial, self.ruta)
+        return sum(os.path.getsize(os.path.join(raiz, archivo))
+                   for raiz, _, archivos in os.walk(self.ruta) for archivo in archivos)
+
+    def descartar(self):
+        """Elimina la caché a medio escribir"""
+        shutil.rmtree(self.parcial, ignore_errors=True)
+
+
+def _cargar_tabla(conectar, ruta, tabla, archivos, formato, progreso, resultados):
+    """Vacía la tabla y le envía sus archivos con COPY FREEZE en una transacción"""
+    inicio = time.perf_counter()
+    conn = conectar()
+    try:
+        cursor = conn.cursor()
+        # FREEZE exige vaciar la tabla en la misma transacción; sus FK ya no existen
+        cursor.execute(f"TRUNCATE TABLE {tabla}")
+        sentencia = crear_buffer(tabla, formato).sentencia_copy(freeze=True)
+        for nombre, filas in sorted(archivos.items()):
+            with gzip.open(os.path.join(ruta, tabla, nombre), 'rb') as f:
+                cursor.copy_expert(sentencia, f, size=TAMANO_LECTURA)
+            progreso.update(filas)
+        conn.commit()
+        resultados[tabla] = (sum(archivos.values()), time.perf_counter() - inicio, None)
+    except Exception as e:
+        conn.rollback()
+        resultados[tabla] = (0, time.perf_counter() - inicio, e)
+    finally:
+        conn.close()
+
+
+def cargar_cache(cache, conectar, desc="Cargando caché"):
+    """Carga todas las tablas de la caché en paralelo, una conexión por tabla
+
+    conectar() abre cada conexión. Devuelve {tabla: (filas, segundos)}.
+    """
+    manifiesto = cache.manifiesto()
+    formato = manifiesto['parametros']['formato']
+    archivos = manifiesto['archivos']
+    resultados = {}
+    with tqdm(total=sum(sum(a.values()) for a in archivos.values()), desc=desc) as progreso:
+        hilos = [threading.Thread(target=_cargar_tabla,
+                                  args=(conectar, cache.ruta, tabla, archivos_tabla, formato, progreso, resultados))
+                 for tabla, archivos_tabla in archivos.items()]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+    errores = [(tabla, error) for tabla, (_, _, error) in resultados.items() if error is not None]
+    if errores:
+        raise RuntimeError("; ".join(f"{tabla}: {error}" for tabla, error in errores)) from errores[0][1]
+    return {tabla: (filas, segundos) for tabla, (filas, segundos, _) in resultados.items()}
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Conciliación de reglas de negocio tras la carga
+Sistema E-Commerce
+
+La carga desactiva los triggers de DetallePedido (trg_validar_stock y
+trg_actualizar_total_*), así que después se aplica lo que habrían hecho,
+pero con unas pocas sentencias sobre conjuntos en lugar de fila a fila:
+
+- Pedido.Total = SUM(Cantidad * Precio_Unitario) de sus detalles
+- Pago.Monto = Total de su pedido
+- Producto.Stock descontado con las unidades vendidas de cada producto
+
+Los productos cuyas ventas superan su stock habrían hecho fallar el trigger.
+Con el modo 'ajustar' se considera que se repusieron justo antes de las
+ventas (el stock final queda en 0); con 'marcar' se informan y se dejan sin
+descontar para revisarlos.
+
+Solo se tienen en cuenta los pedidos con Id >= desde_id (los de la carga).
+Todo ocurre en una transacción, junto con la marca de la fase en la tabla
+de control, para que un --resume no descuente el stock dos veces.
+"""
+
+import time
+
+MODOS_STOCK = ('ajustar', 'marcar')
+
+# Productos con ventas por encima del stock que se listan en modo 'marcar'
+MAX_PRODUCTOS_LISTADOS = 10
+
+
+def conciliar_totales(cursor, desde_id):
+    """Recalcula Total de los pedidos cuyo valor no coincide con sus detalles"""
+    cursor.execute("""
+        UPDATE Pedido p SET Total = d.suma
+        FROM (
+            SELECT Id_Pedido, SUM(Cantidad * Precio_Unitario) AS suma
+            FROM DetallePedido WHERE Id_Pedido >= %(desde)s GROUP BY Id_Pedido
+        ) d
+        WHERE p.Id_Pedido = d.Id_Pedido AND p.Total <> d.suma
+    """, {'desde': desde_id})
+    corregidos = cursor.rowcount
+    cursor.execute("""
+        UPDATE Pedido p SET Total = 0
+        WHERE p.Id_Pedido >= %s AND p.Total <> 0
+          AND NOT EXISTS (SELECT 1 FROM DetallePedido d WHERE d.Id_Pedido = p.Id_Pedido)
+    """, (desde_id,))
+    return corregidos + cursor.rowcount
+
+
+def conciliar_pagos(cursor, desde_id):
+    """Iguala Monto al Total del pedido (chk_monto_positivo exige Total > 0)"""
+    cursor.execute("""
+        UPDATE Pago pa SET Monto = p.Total
+        FROM Pedido p
+        WHERE p.Id_Pedido = pa.Id_Pedido AND pa.Id_Pedido >= %s
+          AND pa.Monto <> p.Total AND p.Total > 0
+    """, (desde_id,))
+    return cursor.rowcount
+
+
+def conciliar_stock(cursor, desde_id, modo):
+    """Descuenta las unidades vendidas; devuelve (descontados, [(id, stock, vendidas)] sin stock)"""
+    cursor.execute("""
+        CREATE TEMP TABLE vendido ON COMMIT DROP AS
+        SELECT Id_Producto, SUM(Cantidad) AS unidades
+        FROM DetallePedido WHERE Id_Pedido >= %s GROUP BY Id_Producto
+    """, (desde_id,))
+    cursor.execute("""
+        SELECT p.Id_Producto, p.Stock, v.unidades
+        FROM vendido v JOIN Producto p ON p.Id_Producto = v.Id_Producto
+        WHERE v.unidades > p.Stock
+        ORDER BY v.unidades - p.Stock DESC, p.Id_Producto
+    """)
+    sin_stock = cursor.fetchall()
+
+    # En modo 'marcar' los productos sin stock suficiente no se tocan
+    cursor.execute(f"""
+        UPDATE Producto p SET Stock = GREATEST(p.Stock - v.unidades, 0)
+        FROM vendido v
+        WHERE p.Id_Producto = v.Id_Producto
+          {'AND v.unidades <= p.Stock' if modo == 'marcar' else ''}
+    """)
+    return cursor.rowcount, sin_stock
+
+
+def conciliar(conn, desde_id, modo_stock='ajustar', al_confirmar=None):
+    """Aplica las reglas de los triggers desactivados en una sola transacción
+
+    al_confirmar(cursor) se ejecuta justo antes del commit (p. ej. para
+    registrar la fase en la tabla de control).
+    """
+    inicio = time.perf_counter()
+    cursor = conn.cursor()
+    totales = conciliar_totales(cursor, desde_id)
+    pagos = conciliar_pagos(cursor, desde_id)
+    descontados, sin_stock = conciliar_stock(cursor, desde_id, modo_stock)
+    if al_confirmar is not None:
+        al_confirmar(cursor)
+    conn.commit()
+
+    print(f"✓ Totales corregidos: {totales:,} | Pagos corregidos: {pagos:,} | "
+          f"Productos con stock descontado: {descontados:,} ({time.perf_counter() - inicio:.2f}s)")
+    if sin_stock:
+        faltan = sum(vendidas - stock for _, stock, vendidas in sin_stock)
+        accion = "repuestos antes de las ventas" if modo_stock == 'ajustar' else "sin descontar"
+        print(f"⚠️  {len(sin_stock):,} productos vendieron más que su stock "
+              f"(faltaban {faltan:,} unidades): {accion}")
+        if modo_stock == 'marcar':
+            for id_producto, stock, vendidas in sin_stock[:MAX_PRODUCTOS_LISTADOS]:
+                print(f"   Producto {id_producto}: stock {stock:,}, vendidas {vendidas:,}")
+    return {'totales': totales, 'pagos': pagos, 'descontados': descontados, 'sin_stock': len(sin_stock)}
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Puntos de control de la carga
+Sistema E-Commerce
+
+Tablas de control para reanudar una carga interrumpida (--resume):
+
+- carga_ejecucion: una fila por ejecución del motor, con los parámetros que
+  determinan los datos (semilla, cantidades, fecha de referencia...) y el
+  primer Id de cada bloque reservado en las secuencias.
+- carga_tramo: una fila por tramo confirmado, insertada en la misma
+  transacción que su COPY, con el estado inicial del generador NumPy del
+  tramo.
+- carga_estructura: definiciones de los índices y restricciones que se
+  eliminaron antes de la carga, para restaurarlos aunque la ejecución se
+  interrumpa (estructuras_carga.py).
+
+Las fases posteriores a la carga que no se pueden repetir (como descontar
+el stock) se anotan en carga_ejecucion.Fases en su misma transacción.
+
+Como cada tramo se genera solo a partir de la semilla y de su primer Id, al
+reanudar basta con saltar los tramos confirmados y regenerar el resto: el
+resultado es idéntico al de una carga sin interrupciones.
+"""
+
+import json
+from psycopg2.extras import Json
+
+DDL_CONTROL = """
+    CREATE TABLE IF NOT EXISTS carga_ejecucion (
+        Id_Ejecucion SERIAL PRIMARY KEY,
+        Parametros JSONB NOT NULL,
+        Primer_Id JSONB NOT NULL DEFAULT '{}',
+        Estado VARCHAR(20) NOT NULL DEFAULT 'en_curso',
+        Inicio TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        Fin TIMESTAMP,
+        CONSTRAINT chk_carga_estado CHECK (Estado IN ('en_curso', 'completada', 'abandonada'))
+    );
+
+    CREATE TABLE IF NOT EXISTS carga_tramo (
+        Id_Ejecucion INT NOT NULL REFERENCES carga_ejecucion(Id_Ejecucion) ON DELETE CASCADE,
+        Tabla VARCHAR(30) NOT NULL,
+        Indice INT NOT NULL,
+        Filas INT NOT NULL,
+        Estado_Rng JSONB NOT NULL,
+        Confirmado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (Id_Ejecucion, Tabla, Indice)
+    );
+
+    CREATE TABLE IF NOT EXISTS carga_estructura (
+        Id_Ejecucion INT NOT NULL REFERENCES carga_ejecucion(Id_Ejecucion) ON DELETE CASCADE,
+        Nombre VARCHAR(63) NOT NULL,
+        Tabla VARCHAR(63) NOT NULL,
+        Tipo CHAR(1) NOT NULL,
+        Definicion TEXT NOT NULL,
+        PRIMARY KEY (Id_Ejecucion, Tabla, Nombre),
+        CONSTRAINT chk_estructura_tipo CHECK (Tipo IN ('i', 'u', 'c', 'f'))
+    );
+
+    ALTER TABLE carga_ejecucion ADD COLUMN IF NOT EXISTS Fases TEXT[] NOT NULL DEFAULT '{}';
+"""
+
+
+def crear_tablas_control(conn):
+    """Crea las tablas de control si no existen"""
+    cursor = conn.cursor()
+    cursor.execute(DDL_CONTROL)
+    conn.commit()
+
+
+def iniciar_ejecucion(conn, parametros):
+    """Abandona las ejecuciones pendientes y registra una nueva; devuelve su Id"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE carga_ejecucion SET Estado = 'abandonada', Fin = CURRENT_TIMESTAMP
+        WHERE Estado = 'en_curso'
+    """)
+    # Los tramos de ejecuciones anteriores ya no sirven para reanudar
+    cursor.execute("DELETE FROM carga_tramo")
+    cursor.execute("INSERT INTO carga_ejecucion (Parametros) VALUES (%s) RETURNING Id_Ejecucion",
+                   (Json(parametros),))
+    id_ejecucion = cursor.fetchone()[0]
+    # Las estructuras que una ejecución abandonada no llegó a restaurar pasan a la nueva
+    cursor.execute("UPDATE carga_estructura SET Id_Ejecucion = %s", (id_ejecucion,))
+    conn.commit()
+    return id_ejecucion
+
+
+def ejecucion_pendiente(conn):
+    """Última ejecución sin terminar: (id, parametros, primer_id) o None"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT Id_Ejecucion, Parametros, Primer_Id FROM carga_ejecucion
+        WHERE Estado = 'en_curso' ORDER BY Id_Ejecucion DESC LIMIT 1
+    """)
+    fila = cursor.fetchone()
+    conn.commit()
+    return fila
+
+
+def ultima_ejecucion_completada(conn):
+    """Parámetros de la última carga completada (qué datos hay en la base) o None"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT Parametros FROM carga_ejecucion
+        WHERE Estado = 'completada' ORDER BY Id_Ejecucion DESC LIMIT 1
+    """)
+    fila = cursor.fetchone()
+    conn.commit()
+    return fila[0] if fila else None
+
+
+def guardar_primer_id(conn, id_ejecucion, primer_id):
+    """Registra los bloques de Id reservados ({tabla: primer Id})"""
+    cursor = conn.cursor()
+    cursor.execute("UPDATE carga_ejecucion SET Primer_Id = Primer_Id || %s WHERE Id_Ejecucion = %s",
+                   (Json(primer_id), id_ejecucion))
+    conn.commit()
+
+
+def tramos_confirmados(conn, id_ejecucion, tabla):
+    """{indice: estado del generador} de los tramos ya confirmados de la tabla"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT Indice, Estado_Rng FROM carga_tramo WHERE Id_Ejecucion = %s AND Tabla = %s",
+                   (id_ejecucion, tabla))
+    confirmados = dict(cursor.fetchall())
+    conn.commit()
+    return confirmados
+
+
+def registrar_tramo(cursor, id_ejecucion, tabla, indice, filas, estado_rng):
+    """Registra un tramo en la transacción de su COPY (no hace commit)"""
+    cursor.execute("""
+        INSERT INTO carga_tramo (Id_Ejecucion, Tabla, Indice, Filas, Estado_Rng)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (id_ejecucion, tabla, indice, filas, Json(estado_rng)))
+
+
+def guardar_estructuras(conn, id_ejecucion, estructuras):
+    """Registra estructuras [(tabla, nombre, tipo, definicion)] antes de eliminarlas"""
+    cursor = conn.cursor()
+    for tabla, nombre, tipo, definicion in estructuras:
+        cursor.execute("""
+            INSERT INTO carga_estructura (Id_Ejecucion, Tabla, Nombre, Tipo, Definicion)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT DO NOTHING
+        """, (id_ejecucion, tabla, nombre, tipo, definicion))
+    conn.commit()
+
+
+def estructuras_guardadas(conn, id_ejecucion):
+    """[(tabla, nombre, tipo, definicion)] pendientes de restaurar"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT Tabla, Nombre, Tipo, Definicion FROM carga_estructura
+        WHERE Id_Ejecucion = %s ORDER BY Tabla, Nombre
+    """, (id_ejecucion,))
+    estructuras = cursor.fetchall()
+    conn.commit()
+    return estructuras
+
+
+def descartar_estructuras(conn, id_ejecucion):
+    """Olvida las estructuras ya restauradas"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM carga_estructura WHERE Id_Ejecucion = %s", (id_ejecucion,))
+    conn.commit()
+
+
+def fase_completada(conn, id_ejecucion, fase):
+    """Indica si la ejecución ya confirmó una fase posterior a la carga"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT %s = ANY(Fases) FROM carga_ejecucion WHERE Id_Ejecucion = %s",
+                   (fase, id_ejecucion))
+    completada = cursor.fetchone()[0]
+    conn.commit()
+    return completada
+
+
+def registrar_fase(cursor, id_ejecucion, fase):
+    """Registra una fase en la transacción que la aplica (no hace commit)"""
+    cursor.execute("UPDATE carga_ejecucion SET Fases = array_append(Fases, %s) WHERE Id_Ejecucion = %s",
+                   (fase, id_ejecucion))
+
+
+def finalizar_ejecucion(conn, id_ejecucion):
+    """Marca la ejecución como completada"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE carga_ejecucion SET Estado = 'completada', Fin = CURRENT_TIMESTAMP
+        WHERE Id_Ejecucion = %s
+    """, (id_ejecucion,))
+    conn.commit()
+
+
+def mismo_estado(estado_a, estado_b):
+    """Compara dos estados de generador (los guardados pasan por JSON)"""
+    return json.loads(json.dumps(estado_a)) == json.loads(json.dumps(estado_b))
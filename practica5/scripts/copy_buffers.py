@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Buffers de COPY FROM STDIN
+Sistema E-Commerce
+
+Buffers reutilizables que acumulan filas (tuplas de valores Python) para
+enviarlas con COPY en dos formatos:
+
+- texto:   formato por defecto de COPY, con el escape de \\, \\t, \\n y \\r
+- binario: formato PGCOPY; enteros, booleanos, timestamps y numeric se
+           empaquetan con struct directamente en un bytearray, sin pasar por
+           una cadena intermedia y sin que el servidor tenga que parsearlos
+
+Para cargas pequeñas hay además un buffer "valores" con la misma interfaz
+que envía sus filas como un único INSERT multi-fila (execute_values).
+
+FuenteCopy envía las filas de un iterable (p. ej. un generador) sin
+acumularlas: es un archivo de solo lectura que codifica las filas a medida
+que copy_expert le pide bloques, así que la memoria no depende del número
+de filas del COPY.
+
+Con copia, copiar_buffer y copiar_filas escriben además en un archivo los
+bytes exactos que recibe el servidor (CopiaLectura), p. ej. para guardar el
+flujo en la caché de datos (cache_datos.py).
+
+Los tipos de cada columna siguen data/sql/ddl/schema.sql.
+"""
+
+import struct
+from datetime import datetime
+from itertools import islice
+from io import StringIO
+from psycopg2.extras import execute_values
+
+# Columnas (con Id explícito) y tipo de cada una, según schema.sql
+ESQUEMA = {
+    'Cliente': (
+        ('Id_Cliente', 'int4'), ('Nombre', 'text'), ('Email', 'text'),
+        ('Telefono', 'text'), ('Fecha_Registro', 'timestamp'), ('Activo', 'bool'),
+    ),
+    'Categoria': (
+        ('Id_Categoria', 'int4'), ('Nombre', 'text'), ('Descripcion', 'text'), ('Activo', 'bool'),
+    ),
+    'Producto': (
+        ('Id_Producto', 'int4'), ('Id_Categoria', 'int4'), ('Nombre', 'text'),
+        ('Descripcion', 'text'), ('Precio', 'numeric'), ('Stock', 'int4'), ('Activo', 'bool'),
+    ),
+    'Pedido': (
+        ('Id_Pedido', 'int4'), ('Id_Cliente', 'int4'), ('Fecha_Pedido', 'timestamp'),
+        ('Estado', 'text'), ('Total', 'numeric'),
+    ),
+    'DetallePedido': (
+        ('Id_Detalle', 'int4'), ('Id_Pedido', 'int4'), ('Id_Producto', 'int4'),
+        ('Cantidad', 'int4'), ('Precio_Unitario', 'numeric'),
+    ),
+    'Pago': (
+        ('Id_Pago', 'int4'), ('Id_Pedido', 'int4'), ('Fecha_Pago', 'timestamp'),
+        ('Metodo', 'text'), ('Monto', 'numeric'),
+    ),
+    'Envio': (
+        ('Id_Envio', 'int4'), ('Id_Pedido', 'int4'), ('Direccion', 'text'),
+        ('Ciudad', 'text'), ('Fecha_Envio', 'timestamp'),
+    ),
+}
+
+COLUMNAS = {tabla: tuple(col for col, _ in cols) for tabla, cols in ESQUEMA.items()}
+
+FORMATOS = ('texto', 'binario')
+
+# Tamaño de bloque que copy_expert pide al buffer en cada lectura
+TAMANO_LECTURA = 1 << 16
+
+# Filas que FuenteCopy codifica de una vez al rellenar una lectura
+FILAS_POR_BLOQUE = 256
+
+# Formato PGCOPY: firma, flags y longitud de la extensión de cabecera
+CABECERA_PGCOPY = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+FIN_PGCOPY = struct.pack('>h', -1)
+
+# Timestamps binarios: microsegundos desde 2000-01-01
+ORDINAL_2000 = datetime(2000, 1, 1).toordinal()
+
+_ESCAPES_TEXTO = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+_INT2 = struct.Struct('>h')
+_INT4_CAMPO = struct.Struct('>ii')
+_INT8_CAMPO = struct.Struct('>iq')
+_BOOL_CAMPO = struct.Struct('>ib')
+_LARGO = struct.Struct('>i')
+_NUMERIC_CABECERA = struct.Struct('>ihhhH')
+
+
+class _LectorMemoria:
+    """Archivo de solo lectura sobre un bytearray, sin copiar el buffer completo
+
+    Cada lectura abre y libera su memoryview para que el bytearray pueda
+    volver a crecer cuando se reutilice el buffer.
+    """
+
+    def __init__(self, datos, largo):
+        self.datos = datos
+        self.largo = largo
+        self.pos = 0
+
+    def read(self, n=-1):
+        fin = self.largo if n is None or n < 0 else min(self.pos + n, self.largo)
+        with memoryview(self.datos) as vista:
+            bloque = vista[self.pos:fin].tobytes()
+        self.pos = fin
+        return bloque
+
+
+class BufferTexto:
+    """Acumula filas en formato texto de COPY"""
+
+    formato = 'texto'
+    fin = b''
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.filas = 0
+        self._buffer = StringIO()
+
+    def escribir(self, fila):
+        campos = []
+        for valor in fila:
+            if valor is None:
+                campos.append('\\N')
+            elif isinstance(valor, str):
+                campos.append(valor.translate(_ESCAPES_TEXTO))
+            else:
+                campos.append(str(valor))
+        self._buffer.write('\t'.join(campos))
+        self._buffer.write('\n')
+        self.filas += 1
+
+    def sentencia_copy(self, freeze=False):
+        opciones = " WITH (FREEZE)" if freeze else ""
+        return f"COPY {self.tabla} ({', '.join(COLUMNAS[self.tabla])}) FROM STDIN{opciones}"
+
+    def archivo(self):
+        self._buffer.seek(0)
+        return self._buffer
+
+    def extraer(self):
+        """Devuelve lo escrito desde la última extracción, codificado, y lo descarta"""
+        datos = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return datos
+
+    def reiniciar(self):
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self.filas = 0
+
+
+class BufferValores:
+    """Acumula filas para un INSERT ... VALUES multi-fila"""
+
+    formato = 'valores'
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.filas = 0
+        self._filas = []
+
+    def escribir(self, fila):
+        self._filas.append(fila)
+        self.filas += 1
+
+    def sentencia_insert(self):
+        return f"INSERT INTO {self.tabla} ({', '.join(COLUMNAS[self.tabla])}) VALUES %s"
+
+    def valores(self):
+        return self._filas
+
+    def reiniciar(self):
+        self._filas = []
+        self.filas = 0
+
+
+class BufferBinario:
+    """Acumula filas en formato binario PGCOPY dentro de un bytearray reutilizable"""
+
+    formato = 'binario'
+    fin = FIN_PGCOPY
+
+    def __init__(self, tabla, capacidad=1 << 20):
+        self.tabla = tabla
+        self.filas = 0
+        self._tipos = tuple(tipo for _, tipo in ESQUEMA[tabla])
+        self._conteo = _INT2.pack(len(self._tipos))
+        self._datos = bytearray(capacidad)
+        self._pos = 0
+        self.reiniciar()
+
+    def _reservar(self, n):
+        """Garantiza espacio para n bytes más, duplicando la capacidad si hace falta"""
+        necesario = self._pos + n
+        if necesario > len(self._datos):
+            self._datos.extend(bytes(max(necesario, 2 * len(self._datos)) - len(self._datos)))
+
+    def _poner_bytes(self, b):
+        n = len(b)
+        self._reservar(n)
+        self._datos[self._pos:self._pos + n] = b
+        self._pos += n
+
+    def escribir(self, fila):
+        datos = self._datos
+        self._poner_bytes(self._conteo)
+
+        for tipo, valor in zip(self._tipos, fila):
+            if valor is None:
+                self._reservar(4)
+                _LARGO.pack_into(datos, self._pos, -1)
+                self._pos += 4
+            elif tipo == 'int4':
+                self._reservar(8)
+                _INT4_CAMPO.pack_into(datos, self._pos, 4, valor)
+                self._pos += 8
+            elif tipo == 'text':
+                b = valor.encode('utf-8')
+                self._reservar(4 + len(b))
+                _LARGO.pack_into(datos, self._pos, len(b))
+                datos[self._pos + 4:self._pos + 4 + len(b)] = b
+                self._pos += 4 + len(b)
+            elif tipo == 'timestamp':
+                self._reservar(12)
+                _INT8_CAMPO.pack_into(datos, self._pos, 8, microsegundos_2000(valor))
+                self._pos += 12
+            elif tipo == 'bool':
+                self._reservar(5)
+                _BOOL_CAMPO.pack_into(datos, self._pos, 1, 1 if valor else 0)
+                self._pos += 5
+            elif tipo == 'numeric':
+                self._escribir_numeric(valor)
+            else:
+                raise ValueError(f"Tipo no soportado en COPY binario: {tipo}")
+
+        self.filas += 1
+
+    def _escribir_numeric(self, valor):
+        """Empaqueta un Decimal como numeric de PostgreSQL (dígitos en base 10000)"""
+        signo, digitos, exponente = valor.as_tuple()
+        dscale = max(0, -exponente)
+        # Alinear la parte fraccionaria a grupos de 4 dígitos decimales
+        relleno = (-dscale) % 4
+        entero = abs(int(valor.scaleb(dscale))) * 10 ** relleno
+        grupos_fraccion = (dscale + relleno) // 4
+
+        grupos = []
+        while entero:
+            entero, resto = divmod(entero, 10000)
+            grupos.append(resto)
+        grupos.reverse()
+
+        peso = len(grupos) - grupos_fraccion - 1
+        while grupos and grupos[-1] == 0:
+            grupos.pop()
+        if not grupos:
+            peso = 0
+
+        n = len(grupos)
+        self._reservar(12 + 2 * n)
+        _NUMERIC_CABECERA.pack_into(self._datos, self._pos, 8 + 2 * n, n, peso,
+                                    0x4000 if signo and n else 0, dscale)
+        self._pos += 12
+        for grupo in grupos:
+            _INT2.pack_into(self._datos, self._pos, grupo)
+            self._pos += 2
+
+    def sentencia_copy(self, freeze=False):
+        opciones = "FORMAT binary, FREEZE" if freeze else "FORMAT binary"
+        return f"COPY {self.tabla} ({', '.join(COLUMNAS[self.tabla])}) FROM STDIN WITH ({opciones})"
+
+    def archivo(self):
+        self._poner_bytes(FIN_PGCOPY)
+        return _LectorMemoria(self._datos, self._pos)
+
+    def extraer(self):
+        """Devuelve los bytes escritos desde la última extracción y los descarta
+
+        La primera extracción incluye la cabecera PGCOPY; el final (fin) lo
+        añade quien cierra el flujo.
+        """
+        datos = bytes(self._datos[:self._pos])
+        self._pos = 0
+        return datos
+
+    def __getstate__(self):
+        # Al enviarlo a otro proceso solo viajan los bytes escritos
+        estado = self.__dict__.copy()
+        estado['_datos'] = self._datos[:self._pos]
+        return estado
+
+    def reiniciar(self):
+        """Vacía el buffer conservando la capacidad ya reservada"""
+        self._pos = 0
+        self.filas = 0
+        self._poner_bytes(CABECERA_PGCOPY)
+
+
+class FuenteCopy:
+    """Archivo de solo lectura que codifica las filas de un iterable a medida que COPY las lee
+
+    En cada lectura se codifican (con un buffer de texto o binario) solo las
+    filas necesarias para llenar el bloque pedido. filas cuenta las filas
+    enviadas hasta el momento.
+    """
+
+    def __init__(self, tabla, formato, filas):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de COPY desconocido: {formato}")
+        self.buffer = crear_buffer(tabla, formato)
+        self.filas = 0
+        self._filas = iter(filas)
+        self._pendiente = bytearray(self.buffer.extraer())
+
+    def read(self, n=-1):
+        n = TAMANO_LECTURA if n is None or n < 0 else n
+        while self._filas is not None and len(self._pendiente) < n:
+            antes = self.filas
+            for fila in islice(self._filas, FILAS_POR_BLOQUE):
+                self.buffer.escribir(fila)
+                self.filas += 1
+            self._pendiente += self.buffer.extraer()
+            if self.filas == antes:
+                self._filas = None
+                self._pendiente += self.buffer.fin
+        bloque = bytes(self._pendiente[:n])
+        del self._pendiente[:n]
+        return bloque
+
+
+class CopiaLectura:
+    """Archivo de solo lectura que copia en destino, codificado, todo lo que entrega a COPY"""
+
+    def __init__(self, origen, destino):
+        self.origen = origen
+        self.destino = destino
+
+    def read(self, n=-1):
+        bloque = self.origen.read(n)
+        self.destino.write(bloque.encode('utf-8') if isinstance(bloque, str) else bloque)
+        return bloque
+
+
+def microsegundos_2000(fecha):
+    """Microsegundos entre 2000-01-01 y un datetime sin zona horaria"""
+    segundos = ((fecha.toordinal() - ORDINAL_2000) * 86400
+                + fecha.hour * 3600 + fecha.minute * 60 + fecha.second)
+    return segundos * 1000000 + fecha.microsecond
+
+
+def crear_buffer(tabla, formato):
+    """Crea un buffer vacío de la tabla en el formato indicado"""
+    if formato == 'binario':
+        return BufferBinario(tabla)
+    if formato == 'texto':
+        return BufferTexto(tabla)
+    if formato == 'valores':
+        return BufferValores(tabla)
+    raise ValueError(f"Formato de COPY desconocido: {formato}")
+
+
+def es_buffer(valor):
+    """True si el valor es uno de los buffers de este módulo (y no un iterable de filas)"""
+    return isinstance(valor, (BufferTexto, BufferBinario, BufferValores))
+
+
+def copiar_buffer(cursor, buffer, freeze=False, copia=None):
+    """Envía el buffer con COPY (o INSERT multi-fila) y devuelve las filas cargadas
+
+    Con freeze=True usa COPY ... FREEZE: la tabla debe haberse creado o
+    vaciado en la misma transacción. copia es un archivo binario donde se
+    escribe además el flujo COPY (no se usa con INSERT multi-fila).
+    """
+    if buffer.filas == 0:
+        return 0
+    if buffer.formato == 'valores':
+        # Una sola sentencia por buffer
+        execute_values(cursor, buffer.sentencia_insert(), buffer.valores(), page_size=buffer.filas)
+        return buffer.filas
+    archivo = buffer.archivo() if copia is None else CopiaLectura(buffer.archivo(), copia)
+    cursor.copy_expert(buffer.sentencia_copy(freeze), archivo, size=TAMANO_LECTURA)
+    return buffer.filas
+
+
+def copiar_filas(cursor, tabla, filas, formato, freeze=False, copia=None):
+    """Envía las filas de un iterable con COPY sin acumularlas y devuelve las filas cargadas
+
+    En formato valores (INSERT multi-fila) las filas se reúnen en un
+    BufferValores, pensado para cargas pequeñas.
+    """
+    if formato == 'valores':
+        buffer = crear_buffer(tabla, formato)
+        for fila in filas:
+            buffer.escribir(fila)
+        return copiar_buffer(cursor, buffer)
+    fuente = FuenteCopy(tabla, formato, filas)
+    archivo = fuente if copia is None else CopiaLectura(fuente, copia)
+    cursor.copy_expert(fuente.buffer.sentencia_copy(freeze), archivo, size=TAMANO_LECTURA)
+    return fuente.filas
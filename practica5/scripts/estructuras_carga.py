@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Índices y restricciones durante la carga masiva
+Sistema E-Commerce
+
+Lee del catálogo (pg_indexes y pg_constraint) las definiciones de todos los
+índices y restricciones de las tablas a cargar, salvo las claves primarias,
+para eliminarlos antes del COPY y restaurarlos tal cual al terminar. Así la
+carga no mantiene índices fila a fila ni comprueba UNIQUE, CHECK (como la
+expresión regular de chk_email_formato) ni claves foráneas por cada fila.
+
+Tipos de estructura:
+
+- i: índice sin restricción asociada (CREATE INDEX ...)
+- u: restricción UNIQUE; se guarda la definición de su índice, que se
+  recrea en paralelo y se asocia con ADD CONSTRAINT ... UNIQUE USING INDEX
+- c: restricción CHECK
+- f: clave foránea
+
+Los CHECK y las claves foráneas se vuelven a añadir como NOT VALID (solo
+catálogo, sin recorrer la tabla) y después se validan con VALIDATE
+CONSTRAINT en paralelo, una tabla por conexión. Una restricción que ya era
+NOT VALID antes de la carga se restaura igual, sin validarla.
+
+capturar_claves_foraneas da además las FK que unen las tablas con
+cualquier otra, también las de tablas que no se cargan: impiden pasar las
+tablas a UNLOGGED (--fast-unsafe) aunque sus índices sigan activos.
+"""
+
+from indices_paralelo import ejecutar_en_paralelo
+
+# Índices sin restricción asociada (las PK, UNIQUE y EXCLUDE se tratan aparte)
+CONSULTA_INDICES = """
+    SELECT i.tablename, i.indexname, 'i', i.indexdef
+    FROM pg_indexes i
+    WHERE i.schemaname = current_schema() AND i.tablename = ANY(%s)
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_constraint c
+          WHERE c.contype IN ('p', 'u', 'x')
+            AND c.conindid = format('%%I.%%I', i.schemaname, i.indexname)::regclass
+      )
+"""
+
+# UNIQUE con la definición de su índice; CHECK y FK con la de la restricción
+CONSULTA_RESTRICCIONES = """
+    SELECT t.relname, c.conname, c.contype,
+           CASE WHEN c.contype = 'u' THEN pg_get_indexdef(c.conindid)
+                ELSE pg_get_constraintdef(c.oid) END
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    WHERE t.relnamespace = current_schema()::regnamespace AND t.relname = ANY(%s)
+      AND c.contype IN ('u', 'c', 'f')
+"""
+
+# FK desde o hacia las tablas (en ambos sentidos bloquean SET UNLOGGED)
+CONSULTA_CLAVES_FORANEAS = """
+    SELECT t.relname, c.conname, c.contype, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    JOIN pg_class r ON r.oid = c.confrelid
+    WHERE c.contype = 'f' AND t.relnamespace = current_schema()::regnamespace
+      AND (t.relname = ANY(%s) OR r.relname = ANY(%s))
+"""
+
+# Orden de eliminación: primero las FK, que dependen de los índices únicos
+ORDEN_ELIMINAR = ('f', 'u', 'c', 'i')
+
+
+def capturar_estructuras(conn, tablas):
+    """[(tabla, nombre, tipo, definicion)] de las tablas indicadas"""
+    tablas = [tabla.lower() for tabla in tablas]
+    cursor = conn.cursor()
+    cursor.execute(CONSULTA_INDICES, (tablas,))
+    estructuras = cursor.fetchall()
+    cursor.execute(CONSULTA_RESTRICCIONES, (tablas,))
+    estructuras += cursor.fetchall()
+    conn.commit()
+    return sorted(estructuras)
+
+
+def capturar_claves_foraneas(conn, tablas):
+    """[(tabla, nombre, 'f', definicion)] de las FK que salen de las tablas o apuntan a ellas"""
+    tablas = [tabla.lower() for tabla in tablas]
+    cursor = conn.cursor()
+    cursor.execute(CONSULTA_CLAVES_FORANEAS, (tablas, tablas))
+    claves = cursor.fetchall()
+    conn.commit()
+    return sorted(claves)
+
+
+def eliminar_estructuras(conn, estructuras):
+    """Elimina las estructuras (FK primero) en una sola transacción"""
+    cursor = conn.cursor()
+    for tipo in ORDEN_ELIMINAR:
+        for tabla, nombre, tipo_estructura, _ in estructuras:
+            if tipo_estructura != tipo:
+                continue
+            if tipo == 'i':
+                cursor.execute(f"DROP INDEX IF EXISTS {nombre}")
+            else:
+                cursor.execute(f"ALTER TABLE {tabla} DROP CONSTRAINT IF EXISTS {nombre}")
+    conn.commit()
+
+
+def _existentes(cursor):
+    """Índices {(tabla, nombre)} y restricciones {(tabla, nombre): validada} que ya existen"""
+    cursor.execute("SELECT tablename, indexname FROM pg_indexes WHERE schemaname = current_schema()")
+    indices = set(cursor.fetchall())
+    cursor.execute("""
+        SELECT t.relname, c.conname, c.convalidated FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid
+        WHERE t.relnamespace = current_schema()::regnamespace
+    """)
+    restricciones = {(tabla, nombre): validada for tabla, nombre, validada in cursor.fetchall()}
+    return indices, restricciones
+
+
+def restaurar_estructuras(conn, conectar, estructuras):
+    """Restaura las estructuras eliminadas; devuelve los errores [(nombre, error)]
+
+    Se omite lo que ya existe (p. ej. restaurado antes de una interrupción):
+    los índices se buscan en pg_indexes y las restricciones en pg_constraint.
+    Una UNIQUE cuyo índice ya existe solo se asocia al índice, y un CHECK o
+    una FK añadidos como NOT VALID que no llegaron a validarse se validan.
+    """
+    cursor = conn.cursor()
+    indices_existentes, restricciones_existentes = _existentes(cursor)
+    conn.commit()
+    pendientes = [e for e in estructuras
+                  if (e[0], e[1]) not in (indices_existentes if e[2] == 'i' else restricciones_existentes)]
+    errores = []
+
+    # 1. Índices, incluidos los de las restricciones UNIQUE, en paralelo
+    indices = [(nombre, tabla, definicion) for tabla, nombre, tipo, definicion in pendientes
+               if tipo in ('i', 'u') and (tabla, nombre) not in indices_existentes]
+    resultados = ejecutar_en_paralelo(conn, conectar, indices, desc="Índices")
+    errores += [(nombre, error) for nombre, _, _, error in resultados if error]
+
+    # 2. Restricciones: UNIQUE sobre su índice, CHECK y FK sin validar
+    por_validar = {}
+    for tabla, nombre, tipo, definicion in estructuras:
+        if (tipo in ('c', 'f') and restricciones_existentes.get((tabla, nombre)) is False
+                and not definicion.endswith(' NOT VALID')):
+            por_validar.setdefault(tabla, []).append(nombre)
+    for tabla, nombre, tipo, definicion in pendientes:
+        if tipo == 'u':
+            sql = f"ALTER TABLE {tabla} ADD CONSTRAINT {nombre} UNIQUE USING INDEX {nombre}"
+        elif tipo in ('c', 'f'):
+            ya_no_valida = definicion.endswith(' NOT VALID')
+            sql = f"ALTER TABLE {tabla} ADD CONSTRAINT {nombre} {definicion}"
+            if not ya_no_valida:
+                sql += " NOT VALID"
+                por_validar.setdefault(tabla, []).append(nombre)
+        else:
+            continue
+        try:
+            cursor.execute(sql)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            errores.append((nombre, str(e).strip()))
+            if tabla in por_validar and nombre in por_validar[tabla]:
+                por_validar[tabla].remove(nombre)
+
+    # 3. Validación: las de una misma tabla se bloquean entre sí, así que van juntas
+    validaciones = [
+        (f"validar {tabla}", tabla,
+         "; ".join(f"ALTER TABLE {tabla} VALIDATE CONSTRAINT {nombre}" for nombre in nombres))
+        for tabla, nombres in por_validar.items() if nombres
+    ]
+    resultados = ejecutar_en_paralelo(conn, conectar, validaciones, desc="Validación")
+    errores += [(nombre, error) for nombre, _, _, error in resultados if error]
+    return errores
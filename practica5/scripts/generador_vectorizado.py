@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Generación vectorizada con NumPy
+Sistema E-Commerce
+
+Genera de una sola vez, como arreglos, las columnas numéricas y temporales
+de un lote completo de filas (ids, fechas, estados, cantidades, precios y
+totales), en lugar de hacer varias llamadas a random.* por fila.
+
+Importes en centavos (int64) para que los totales sean exactos: el total de
+un pedido es la suma de Cantidad * Precio_Unitario de sus detalles, igual
+que lo calcula el trigger actualizar_total_pedido().
+"""
+
+import zlib
+from decimal import Decimal
+import numpy as np
+
+ESTADOS_PEDIDO = ['Pendiente', 'Procesando', 'Enviado', 'Entregado', 'Cancelado']
+METODOS_PAGO = ['Tarjeta', 'PayPal', 'Transferencia', 'Efectivo', 'Criptomoneda']
+
+# Índices en ESTADOS_PEDIDO de los pedidos que tienen pago / envío
+ESTADOS_CON_PAGO = [1, 2, 3]     # Procesando, Enviado, Entregado
+ESTADOS_CON_ENVIO = [2, 3]       # Enviado, Entregado
+
+# Con catálogos pequeños se barajan todos los productos por pedido; con
+# catálogos grandes se sortea con reemplazo y se repiten las filas con duplicados
+MAX_PRODUCTOS_PERMUTACION = 1000
+
+
+def rng_tramo(semilla, tabla, indice):
+    """Generador NumPy determinista para un tramo de una tabla"""
+    return np.random.default_rng([semilla, zlib.crc32(tabla.encode()), indice])
+
+
+def fechas_aleatorias(rng, n, referencia, dias_atras):
+    """n fechas uniformes (datetime64[s]) en los dias_atras días previos a referencia"""
+    segundos = rng.integers(0, dias_atras * 86400, size=n, endpoint=True)
+    return np.datetime64(referencia, 's') - segundos.astype('timedelta64[s]')
+
+
+def decimales(centavos):
+    """Convierte un arreglo de centavos en una lista de Decimal con 2 decimales"""
+    return [Decimal(c).scaleb(-2) for c in centavos.tolist()]
+
+
+def generar_lote_clientes(rng, n, referencia, dias_atras, prob_activo):
+    """Columnas numéricas de n clientes: fecha de registro y activo"""
+    return {
+        'fecha_registro': fechas_aleatorias(rng, n, referencia, dias_atras),
+        'activo': rng.random(n) < prob_activo,
+    }
+
+
+def generar_lote_productos(rng, n, categorias, precio_min, precio_max, stock_max, prob_activo):
+    """Columnas numéricas de n productos: categoría, precio (centavos), stock y activo"""
+    categorias = np.asarray(categorias)
+    return {
+        'id_categoria': categorias[rng.integers(0, len(categorias), size=n)],
+        'precio': np.rint(rng.uniform(precio_min, precio_max, size=n) * 100).astype(np.int64),
+        'stock': rng.integers(0, stock_max, size=n, endpoint=True),
+        'activo': rng.random(n) < prob_activo,
+    }
+
+
+def elegir_productos(rng, n, total_productos, por_pedido):
+    """Índices de productos sin reemplazo dentro de cada pedido: matriz (n, por_pedido)"""
+    if total_productos <= MAX_PRODUCTOS_PERMUTACION:
+        claves = rng.random((n, total_productos))
+        return np.argsort(claves, axis=1)[:, :por_pedido]
+
+    elegidos = rng.integers(0, total_productos, size=(n, por_pedido))
+    while True:
+        ordenados = np.sort(elegidos, axis=1)
+        repetidos = (ordenados[:, 1:] == ordenados[:, :-1]).any(axis=1)
+        if not repetidos.any():
+            return elegidos
+        elegidos[repetidos] = rng.integers(0, total_productos, size=(int(repetidos.sum()), por_pedido))
+
+
+def generar_lote_pedidos(rng, n, clientes, productos_ids, productos_precios, referencia,
+                         dias_atras, min_detalles, max_detalles, max_cantidad,
+                         max_horas_pago, max_dias_envio):
+    """Genera n pedidos completos como arreglos
+
+    clientes, productos_ids y productos_precios (centavos) son arreglos con
+    los candidatos. Devuelve las columnas de pedidos, sus detalles (agrupados
+    por pedido y en orden), y las máscaras de pedidos con pago y con envío.
+    """
+    clientes = np.asarray(clientes)
+    productos_ids = np.asarray(productos_ids)
+    productos_precios = np.asarray(productos_precios, dtype=np.int64)
+    por_pedido = min(max_detalles, len(productos_ids))
+
+    id_cliente = clientes[rng.integers(0, len(clientes), size=n)]
+    fecha = fechas_aleatorias(rng, n, referencia, dias_atras)
+    estado = rng.integers(0, len(ESTADOS_PEDIDO), size=n)
+
+    # Detalles: una matriz (n, por_pedido) de la que se toman las primeras num_detalles columnas
+    num_detalles = np.minimum(rng.integers(min_detalles, max_detalles, size=n, endpoint=True), por_pedido)
+    elegidos = elegir_productos(rng, n, len(productos_ids), por_pedido)
+    mascara = np.arange(por_pedido) < num_detalles[:, None]
+
+    detalle_pedido = np.repeat(np.arange(n), num_detalles)
+    detalle_posicion = np.nonzero(mascara)[1]
+    detalle_producto = productos_ids[elegidos[mascara]]
+    cantidad = rng.integers(1, max_cantidad, size=len(detalle_pedido), endpoint=True)
+    variacion = rng.uniform(0.9, 1.1, size=len(detalle_pedido))
+    precio_unitario = np.maximum(
+        np.rint(productos_precios[elegidos[mascara]] * variacion).astype(np.int64), 1)
+
+    # Total exacto por pedido: los detalles de cada pedido son contiguos
+    inicios = np.concatenate(([0], np.cumsum(num_detalles)[:-1]))
+    total = np.add.reduceat(cantidad * precio_unitario, inicios)
+
+    return {
+        'id_cliente': id_cliente,
+        'fecha': fecha,
+        'estado': estado,
+        'total': total,
+        'num_detalles': num_detalles,
+        'detalle_pedido': detalle_pedido,
+        'detalle_posicion': detalle_posicion,
+        'detalle_producto': detalle_producto,
+        'cantidad': cantidad,
+        'precio_unitario': precio_unitario,
+        'con_pago': np.isin(estado, ESTADOS_CON_PAGO),
+        'metodo_pago': rng.integers(0, len(METODOS_PAGO), size=n),
+        'fecha_pago': fecha + rng.integers(1, max_horas_pago, size=n, endpoint=True).astype('timedelta64[h]'),
+        'con_envio': np.isin(estado, ESTADOS_CON_ENVIO),
+        'fecha_envio': fecha + rng.integers(1, max_dias_envio, size=n, endpoint=True).astype('timedelta64[D]'),
+    }
\ No newline at end of file
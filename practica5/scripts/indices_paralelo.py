@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Reconstrucción de índices en paralelo
+Sistema E-Commerce
+
+Después de una carga con COPY los índices secundarios se vuelven a crear.
+En lugar de ejecutar los CREATE INDEX uno tras otro en una sola conexión,
+aquí se reparten entre un pequeño pool de conexiones: cada conexión toma el
+siguiente índice pendiente de una cola ordenada de la tabla más grande a la
+más pequeña, así los índices de DetallePedido y Pedido empiezan primero y
+los de las tablas pequeñas rellenan los huecos al final.
+
+Varias sesiones pueden crear índices sobre la misma tabla a la vez
+(CREATE INDEX toma un bloqueo SHARE, compatible consigo mismo). El mismo
+pool valida las restricciones restauradas (VALIDATE CONSTRAINT), con un
+trabajo por tabla porque esas validaciones sí se bloquean entre sí. Cada sesión
+ajusta maintenance_work_mem y max_parallel_maintenance_workers para que el
+conjunto quepa en el límite de memoria y de CPU del contenedor de la base de
+datos (MEMORIA_BD y CPUS_BD, como en deploy.resources de docker-compose.yml).
+"""
+
+import os
+import re
+import time
+import queue
+import threading
+import psutil
+from tqdm import tqdm
+
+# Recursos del contenedor de PostgreSQL (si no se indican, los de esta máquina)
+MEMORIA_BD = os.getenv('MEMORIA_BD', '')
+CPUS_BD = int(os.getenv('CPUS_BD', os.cpu_count() or 1))
+
+# Fracción de la memoria libre (límite - shared_buffers) para construir índices
+FRACCION_MEMORIA_INDICES = 0.5
+
+# Límites de maintenance_work_mem por sesión
+MIN_MEMORIA_SESION = 64 * 1024 * 1024
+MAX_MEMORIA_SESION = 1024 * 1024 * 1024
+
+# PostgreSQL exige al menos 32MB de maintenance_work_mem por participante
+# de un CREATE INDEX paralelo; con menos reduce los workers
+MEMORIA_POR_PARTICIPANTE = 32 * 1024 * 1024
+
+_UNIDADES = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parsear_memoria(texto):
+    """Convierte '2G', '512M' o '512MB' en bytes"""
+    coincidencia = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*', texto.upper())
+    if not coincidencia:
+        raise ValueError(f"Cantidad de memoria no válida: {texto!r}")
+    return int(float(coincidencia.group(1)) * _UNIDADES[coincidencia.group(2)])
+
+
+def limite_memoria():
+    """Límite de memoria de la base de datos: MEMORIA_BD, el cgroup o la RAM total"""
+    if MEMORIA_BD:
+        return parsear_memoria(MEMORIA_BD)
+    for ruta in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(ruta) as f:
+                valor = f.read().strip()
+        except OSError:
+            continue
+        if valor.isdigit():
+            return min(int(valor), psutil.virtual_memory().total)
+    return psutil.virtual_memory().total
+
+
+def planificar_sesiones(conn, num_trabajos, conexiones=None):
+    """Número de conexiones y ajustes por sesión
+
+    Devuelve (conexiones, maintenance_work_mem en bytes, workers paralelos).
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_size_bytes(current_setting('shared_buffers'))")
+    shared_buffers = cursor.fetchone()[0]
+    conn.commit()
+
+    conexiones = max(1, min(conexiones or CPUS_BD, num_trabajos))
+    disponible = max(limite_memoria() - shared_buffers, 0) * FRACCION_MEMORIA_INDICES
+    memoria = int(min(max(disponible // conexiones, MIN_MEMORIA_SESION), MAX_MEMORIA_SESION))
+
+    # Los CPU que sobran tras dar uno a cada sesión se reparten como workers
+    workers = max(CPUS_BD // conexiones - 1, 0)
+    workers = min(workers, max(memoria // MEMORIA_POR_PARTICIPANTE - 1, 0))
+    return conexiones, memoria, workers
+
+
+def ordenar_por_tabla(conn, trabajos):
+    """Ordena los trabajos (nombre, tabla, sql) de la tabla más grande a la más pequeña"""
+    cursor = conn.cursor()
+    tamanos = {}
+    for tabla in {trabajo[1] for trabajo in trabajos}:
+        cursor.execute("SELECT pg_table_size(%s::regclass)", (tabla.lower(),))
+        tamanos[tabla] = cursor.fetchone()[0]
+    conn.commit()
+    return sorted(trabajos, key=lambda trabajo: -tamanos[trabajo[1]])
+
+
+def _ejecutar(conn, cola, resultados, progreso):
+    """Bucle de una sesión: ejecuta trabajos de la cola hasta vaciarla"""
+    cursor = conn.cursor()
+    while True:
+        try:
+            nombre, tabla, sql = cola.get_nowait()
+        except queue.Empty:
+            return
+        inicio = time.perf_counter()
+        try:
+            cursor.execute(sql)
+            error = None
+        except Exception as e:
+            error = str(e).strip()
+        resultados.append((nombre, tabla, time.perf_counter() - inicio, error))
+        progreso.update(1)
+
+
+def ejecutar_en_paralelo(conn, conectar, trabajos, conexiones=None, desc="Índices"):
+    """Ejecuta los trabajos [(nombre, tabla, sql)] en un pool de conexiones
+
+    conn se usa para planificar; conectar() abre cada conexión del pool.
+    Devuelve [(nombre, tabla, segundos, error)] en orden de finalización.
+    """
+    if not trabajos:
+        return []
+    trabajos = ordenar_por_tabla(conn, trabajos)
+    conexiones, memoria, workers = planificar_sesiones(conn, len(trabajos), conexiones)
+    print(f"✓ {conexiones} conexiones | maintenance_work_mem: {memoria // 1024 // 1024} MB | "
+          f"workers paralelos por índice: {workers}")
+
+    cola = queue.Queue()
+    for trabajo in trabajos:
+        cola.put(trabajo)
+
+    pool = []
+    for _ in range(conexiones):
+        sesion = conectar()
+        sesion.autocommit = True
+        cursor = sesion.cursor()
+        cursor.execute(f"SET maintenance_work_mem = '{memoria // 1024}kB'")
+        cursor.execute(f"SET max_parallel_maintenance_workers = {workers}")
+        pool.append(sesion)
+
+    resultados = []
+    inicio = time.perf_counter()
+    with tqdm(total=len(trabajos), desc=desc) as progreso:
+        hilos = [threading.Thread(target=_ejecutar, args=(sesion, cola, resultados, progreso))
+                 for sesion in pool]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    for sesion in pool:
+        sesion.close()
+
+    mostrar_tiempos(resultados, duracion)
+    return resultados
+
+
+def mostrar_tiempos(resultados, duracion):
+    """Tiempo de cada trabajo y tiempo real frente a la suma secuencial"""
+    print(f"\n   {'Trabajo':<28} {'Tabla':<15} {'Tiempo':>9}")
+    for nombre, tabla, segundos, error in sorted(resultados, key=lambda r: -r[2]):
+        print(f"   {nombre:<28} {tabla:<15} {segundos:>8.2f}s" + (f"  ⚠️  {error}" if error else ""))
+
+    suma = sum(r[2] for r in resultados)
+    print(f"   Tiempo real: {duracion:.2f}s | Suma secuencial: {suma:.2f}s | "
+          f"Aceleración: {suma / duracion if duracion else 1:.1f}x")
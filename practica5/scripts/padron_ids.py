@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Padrón compacto de Id elegibles para los pedidos
+Sistema E-Commerce
+
+Los pedidos eligen su cliente entre los clientes activos y sus productos
+entre los activos con stock. Antes se leían de la base con LIMIT (los
+primeros 100,000 clientes y 50,000 productos por orden de Id), así que en el
+nivel masivo la mayoría de los clientes no tenía pedidos y la mitad del
+catálogo no se vendía.
+
+El padrón guarda todos los Id elegibles en arreglos NumPy (int32 para los
+Id, int64 para los precios en centavos): 500,000 clientes y 100,000
+productos ocupan unos pocos MB y se heredan en los workers con fork.
+
+- padron_generado: en una carga completa no hace falta consultar la base.
+  Las columnas numéricas de cada tramo dependen solo de su semilla, así que
+  se vuelven a generar (sin el texto) y se toman los Id de las filas
+  elegibles dentro del bloque de Id reservado para la tabla.
+- padron_consultado: cuando la tabla tiene filas de otras cargas
+  (--anexar) se lee de la base, completa y por bloques.
+"""
+
+import numpy as np
+
+# Filas por lectura del cursor de padron_consultado
+FILAS_POR_LECTURA = 100000
+
+
+def _arreglos(ids, valores):
+    """Une los trozos de Id (int32) y de valores (int64)"""
+    ids = np.concatenate(ids).astype(np.int32) if ids else np.empty(0, dtype=np.int32)
+    valores = np.concatenate(valores).astype(np.int64) if valores else np.empty(0, dtype=np.int64)
+    return ids, valores
+
+
+def padron_generado(tramos, primer_id, generar_lote, elegibles, valores=None):
+    """(ids, valores) de las filas elegibles de una tabla cargada entera en esta ejecución
+
+    tramos son los (indice, inicio, fin) de la carga; generar_lote(inicio, fin)
+    vuelve a generar las columnas numéricas del tramo; elegibles(lote) da la
+    máscara de filas elegibles y valores(lote), si se indica, un valor por fila.
+    """
+    partes_ids, partes_valores = [], []
+    for _, inicio, fin in tramos:
+        lote = generar_lote(inicio, fin)
+        mascara = elegibles(lote)
+        partes_ids.append(primer_id + inicio + np.flatnonzero(mascara))
+        if valores is not None:
+            partes_valores.append(valores(lote)[mascara])
+    return _arreglos(partes_ids, partes_valores)
+
+
+def padron_consultado(conn, consulta):
+    """(ids, valores) leídos de la base con un cursor en el servidor
+
+    La consulta devuelve el Id y, opcionalmente, un valor entero por fila;
+    sin segunda columna los valores quedan vacíos.
+    """
+    partes_ids, partes_valores = [], []
+    with conn.cursor(name='padron_ids') as cursor:
+        cursor.itersize = FILAS_POR_LECTURA
+        cursor.execute(consulta)
+        while True:
+            filas = cursor.fetchmany(FILAS_POR_LECTURA)
+            if not filas:
+                break
+            bloque = np.array(filas, dtype=np.int64).reshape(len(filas), -1)
+            partes_ids.append(bloque[:, 0])
+            if bloque.shape[1] > 1:
+                partes_valores.append(bloque[:, 1])
+    conn.commit()
+    return _arreglos(partes_ids, partes_valores)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Perfiles de ajuste para la carga rápida (--fast-unsafe)
+Sistema E-Commerce
+
+Los datos de la carga se pueden regenerar por completo a partir de la
+semilla, así que durante la carga no hace falta la durabilidad de WAL. En
+modo --fast-unsafe:
+
+- las tablas cargadas pasan a UNLOGGED (sus filas no se escriben en WAL) y
+  se desactiva su autovacuum con autovacuum_enabled = false;
+- cada sesión de carga usa synchronous_commit = off y más work_mem y
+  maintenance_work_mem.
+
+Al terminar se restaura LOGGED y el autovacuum_enabled original de cada
+tabla. ALTER TABLE ... SET LOGGED reescribe la tabla en WAL, por lo que el
+ahorro real depende del almacenamiento: el motor informa del WAL generado
+para comparar una carga normal con una rápida.
+
+Si el servidor se cae durante la carga, PostgreSQL vacía las tablas
+UNLOGGED; por eso una carga rápida solo se puede reanudar si sus tablas
+siguen teniendo filas.
+"""
+
+# Perfiles por nivel. En leve las tablas no se convierten: reescribirlas
+# cuesta más que el WAL de unos cientos de filas.
+PERFILES = {
+    'leve': {
+        'unlogged': False,
+        'autovacuum': True,
+        'sesion': {'synchronous_commit': 'off', 'work_mem': '16MB', 'maintenance_work_mem': '64MB'},
+    },
+    'moderado': {
+        'unlogged': True,
+        'autovacuum': False,
+        'sesion': {'synchronous_commit': 'off', 'work_mem': '32MB', 'maintenance_work_mem': '256MB'},
+    },
+    'masivo': {
+        'unlogged': True,
+        'autovacuum': False,
+        'sesion': {'synchronous_commit': 'off', 'work_mem': '64MB', 'maintenance_work_mem': '512MB'},
+    },
+}
+
+# Perfil por defecto de una carga por escala, según la estrategia elegida
+PERFIL_ESTRATEGIA = {'valores': 'leve', 'copy': 'moderado', 'copy_paralelo': 'masivo'}
+
+
+def aplicar_ajustes_sesion(conn, ajustes):
+    """SET de cada parámetro en la sesión (persisten tras el commit)"""
+    cursor = conn.cursor()
+    for parametro, valor in ajustes.items():
+        cursor.execute("SELECT set_config(%s, %s, false)", (parametro, valor))
+    conn.commit()
+
+
+def capturar_ajustes_tabla(conn, tablas):
+    """{tabla: {'logged': bool, 'autovacuum': valor original o None}}"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT relname, relpersistence = 'p',
+               (SELECT split_part(opcion, '=', 2) FROM unnest(reloptions) AS opcion
+                WHERE opcion LIKE 'autovacuum_enabled=%%')
+        FROM pg_class
+        WHERE relnamespace = current_schema()::regnamespace AND relname = ANY(%s)
+    """, ([tabla.lower() for tabla in tablas],))
+    ajustes = {tabla: {'logged': logged, 'autovacuum': autovacuum}
+               for tabla, logged, autovacuum in cursor.fetchall()}
+    conn.commit()
+    return ajustes
+
+
+def aplicar_modo_rapido(conn, perfil, ajustes_originales):
+    """Convierte las tablas a UNLOGGED y desactiva su autovacuum según el perfil
+
+    Las FK que unen las tablas con otras deben haberse eliminado antes. Si
+    aun así una tabla no se puede convertir, se avisa y se carga normal.
+    Devuelve las tablas que quedaron UNLOGGED.
+    """
+    cursor = conn.cursor()
+    convertidas = []
+    for tabla in ajustes_originales:
+        if not perfil['autovacuum']:
+            cursor.execute(f"ALTER TABLE {tabla} SET (autovacuum_enabled = false)")
+        if perfil['unlogged']:
+            cursor.execute("SAVEPOINT unlogged")
+            try:
+                cursor.execute(f"ALTER TABLE {tabla} SET UNLOGGED")
+                convertidas.append(tabla)
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT unlogged")
+                print(f"⚠️  {tabla} sigue LOGGED: {str(e).strip()}")
+    conn.commit()
+    return convertidas
+
+
+def restaurar_ajustes_tabla(conn, ajustes_originales):
+    """Vuelve a LOGGED y al autovacuum_enabled original de cada tabla"""
+    cursor = conn.cursor()
+    for tabla, original in ajustes_originales.items():
+        if original['logged']:
+            cursor.execute(f"ALTER TABLE {tabla} SET LOGGED")
+        if original['autovacuum'] is None:
+            cursor.execute(f"ALTER TABLE {tabla} RESET (autovacuum_enabled)")
+        else:
+            cursor.execute(f"ALTER TABLE {tabla} SET (autovacuum_enabled = {original['autovacuum']})")
+    conn.commit()
+
+
+def tablas_vaciadas(conn, tablas):
+    """Tablas sin ninguna fila (p. ej. UNLOGGED vaciadas tras una caída)"""
+    cursor = conn.cursor()
+    vacias = []
+    for tabla in tablas:
+        cursor.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {tabla})")
+        if cursor.fetchone()[0]:
+            vacias.append(tabla)
+    conn.commit()
+    return vacias
@@ -0,0 +1,1336 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Motor de Poblado por Escala
+Sistema E-Commerce
+
+Un único motor para todos los tamaños de datos. El tamaño se indica con un
+factor de escala continuo respecto al nivel masivo (escala 1.0 = 500,000
+clientes, 100,000 productos y 1,000,000 pedidos), o con uno de los niveles
+predefinidos:
+
+- leve:     100 clientes, 50 productos, 200 pedidos
+- moderado: 10,000 clientes, 5,000 productos, 15,000 pedidos
+- masivo:   500,000 clientes, 100,000 productos, 1,000,000 pedidos
+
+La estrategia de carga se elige según las filas estimadas:
+
+- valores:       INSERT multi-fila (execute_values), índices activos
+- copy:          COPY FROM STDIN en un proceso, índices reconstruidos al final
+- copy_paralelo: COPY FROM STDIN con varios workers
+
+Uso:
+    python poblar.py [--nivel leve|moderado|masivo | --escala F]
+                     [--clientes N] [--productos N] [--pedidos N] [--anexar] [--resume]
+                     [--fast-unsafe [--perfil leve|moderado|masivo]]
+                     [--estrategia auto|valores|copy|copy_paralelo] [--workers N]
+                     [--semilla S] [--formato binario|texto]
+                     [--fecha-referencia AAAA-MM-DD] [--stock ajustar|marcar]
+                     [--comparar-vacuum-full] [--sin-cache] [--sin-freeze]
+
+Cada tabla se divide en tramos de COPY_BUFFER_SIZE filas. Cada tramo se
+genera con su propia semilla (semilla global + tabla + número de tramo), por
+lo que el resultado es idéntico para una misma semilla sin importar el
+número de workers ni la estrategia. Las columnas numéricas y de fecha de
+cada tramo se generan vectorizadas con NumPy (generador_vectorizado.py) y las de texto se
+arman combinando pools de vocabulario muestreados una sola vez de Faker
+(vocabulario.py).
+
+Con --anexar no se vacían las tablas: las filas se agregan a las existentes
+con Id nuevos y semillas distintas, los índices se mantienen activos si la
+carga es pequeña respecto a los datos actuales y al final solo se analizan
+las tablas afectadas.
+
+Cada tramo confirmado queda registrado en la tabla de control carga_tramo
+en la misma transacción que su COPY (control_carga.py). Si la carga se
+interrumpe, --resume retoma la última ejecución pendiente con sus mismos
+parámetros y bloques de Id, salta los tramos confirmados y regenera solo
+los demás, con un resultado idéntico al de una carga sin interrupciones.
+
+Antes de una carga con COPY se eliminan todos los índices y restricciones
+de las tablas (salvo las PK), leídos del catálogo, y al final se restauran
+tal cual: los índices repartidos entre varias conexiones y las restricciones
+añadidas como NOT VALID y validadas después (estructuras_carga.py,
+indices_paralelo.py).
+
+En una carga completa con COPY cada tabla (Pedido junto con sus detalles,
+pagos y envíos) se vacía y se carga con COPY FREEZE en una sola transacción:
+las filas quedan congeladas y con los hint bits puestos, así que al final
+basta con un ANALYZE por tabla en paralelo en lugar de VACUUM FULL. Con
+workers > 1 los workers solo generan los tramos y este proceso los envía.
+El precio es que los puntos de control de esa tabla solo se confirman con
+ella: si la carga se interrumpe, --resume la repite entera. --sin-freeze
+confirma cada tramo por separado (sin FREEZE; las filas las congela luego el
+autovacuum) para que --resume siga desde el último tramo confirmado.
+
+Con --fast-unsafe las tablas se cargan como UNLOGGED, sin autovacuum y con
+synchronous_commit=off, según el perfil de ajuste del nivel
+(perfiles_carga.py); al final vuelven a LOGGED con sus ajustes originales.
+
+Los triggers de DetallePedido y Pedido se desactivan durante la carga; al
+terminar los pedidos, sus reglas (totales, montos de pago y descuento de
+stock) se aplican con unas pocas sentencias sobre conjuntos (conciliacion.py)
+y las tablas de resumen de las vistas se reconstruyen en bloque
+(resumenes.py).
+
+Los Id se escriben explícitos a partir de bloques contiguos reservados en
+las secuencias SERIAL antes de cada tabla (reserva_ids.py), así que los
+workers no necesitan RETURNING y la carga no supone una tabla vacía. Los
+pedidos eligen cliente y productos entre todos los elegibles, guardados en
+arreglos compactos que se reconstruyen desde las semillas de los tramos sin
+leerlos de la base (padron_ids.py).
+
+Dentro de cada worker la carga es un pipeline: el hilo principal prepara
+tramos y los deja en una cola acotada (PROFUNDIDAD_COLA) que un hilo COPY
+(o INSERT, en la estrategia valores) vacía en su propia conexión. Los
+generadores de tramo son perezosos: sortean y arman las filas de
+FILAS_POR_LOTE en FILAS_POR_LOTE a medida que la etapa COPY las lee y las
+codifica (FuenteCopy, en copy_buffers.py), así que la memoria del generador
+no depende del tamaño de los tramos. El tiempo de armar las filas se mide
+aparte y cuenta como generación. Solo los tramos generados en otro proceso
+para COPY FREEZE viajan ya codificados.
+
+Cada fase de la ejecución (vaciado, índices, carga de cada tabla con sus
+segundos de generación y de transferencia, conciliación, ANALYZE...) se
+mide por separado con telemetria.py: duración, CPU y picos de memoria y
+CPU muestreados en segundo plano. El informe se guarda en LOGS_DIR como
+JSON y como métricas de Prometheus, también si la carga falla.
+
+Una carga completa con COPY guarda además los flujos COPY de cada tramo,
+comprimidos, en la caché de datos (cache_datos.py, CACHE_DIR/datos) con una
+clave de las cantidades, la semilla, el formato y la huella de schema.sql.
+Las cargas siguientes con la misma clave no generan nada: envían esos
+archivos con COPY FREEZE, todas las tablas en paralelo. Sin
+--fecha-referencia se usa la fecha guardada en la caché (hoy si no hay
+caché). --sin-cache no la usa ni la escribe.
+"""
+
+import os
+import sys
+import copy
+import time
+import queue
+import argparse
+import threading
+import traceback
+from collections import deque
+from contextlib import nullcontext
+import multiprocessing as mp
+from datetime import datetime, date
+import numpy as np
+import psycopg2
+from tqdm import tqdm
+from copy_buffers import FORMATOS, crear_buffer, copiar_buffer, copiar_filas, es_buffer
+from generador_vectorizado import (
+    ESTADOS_PEDIDO, METODOS_PAGO, rng_tramo, decimales,
+    generar_lote_clientes, generar_lote_productos, generar_lote_pedidos,
+)
+from vocabulario import Vocabulario
+from reserva_ids import reservar_bloques
+from perfiles_carga import (
+    PERFILES, PERFIL_ESTRATEGIA, aplicar_ajustes_sesion, capturar_ajustes_tabla,
+    aplicar_modo_rapido, restaurar_ajustes_tabla, tablas_vaciadas,
+)
+from indices_paralelo import ejecutar_en_paralelo
+from estructuras_carga import (
+    capturar_estructuras, capturar_claves_foraneas, eliminar_estructuras, restaurar_estructuras,
+)
+from control_carga import (
+    crear_tablas_control, iniciar_ejecucion, ejecucion_pendiente, guardar_primer_id,
+    tramos_confirmados, registrar_tramo, finalizar_ejecucion, mismo_estado,
+    guardar_estructuras, estructuras_guardadas, descartar_estructuras,
+    fase_completada, registrar_fase,
+)
+from conciliacion import MODOS_STOCK, conciliar
+from resumenes import RESUMENES, reconstruir_resumenes
+from padron_ids import padron_generado, padron_consultado
+from telemetria import Telemetria
+from cache_datos import CacheDatos, huella_esquema, cargar_cache
+
+# Configuración
+SEMILLA = 42
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'ecommerce_db'),
+    'user': os.getenv('DB_USER', 'ecommerce_user'),
+    'password': os.getenv('DB_PASSWORD', 'ecommerce_pass')
+}
+
+# Cantidades de la escala 1.0 (nivel masivo)
+CLIENTES = 500000
+PRODUCTOS = 100000
+PEDIDOS = 1000000
+MIN_DETALLES = 1
+MAX_DETALLES = 5
+
+# Rango admitido para --escala y mínimos por tabla de una escala muy pequeña
+ESCALA_MIN = 0.001
+ESCALA_MAX = 10.0
+MIN_FILAS = 10
+
+# Niveles predefinidos (cantidades de los antiguos scripts por nivel)
+NIVELES = {
+    'leve': {'clientes': 100, 'productos': 50, 'pedidos': 200},
+    'moderado': {'clientes': 10000, 'productos': 5000, 'pedidos': 15000},
+    'masivo': {'clientes': CLIENTES, 'productos': PRODUCTOS, 'pedidos': PEDIDOS},
+}
+
+# Estrategias de carga, de la más ligera a la más pesada
+ESTRATEGIAS = ('valores', 'copy', 'copy_paralelo')
+
+# Filas estimadas a partir de las cuales conviene cada estrategia. Por debajo
+# de UMBRAL_COPY reconstruir índices y hacer VACUUM cuesta más que insertar
+# con los índices activos; por encima de UMBRAL_PARALELO la generación en un
+# solo proceso es el cuello de botella.
+UMBRAL_COPY = 20000
+UMBRAL_PARALELO = 2000000
+
+# Al anexar, los índices se reconstruyen solo si la carga supera esta
+# fracción de las filas ya existentes; si no, se mantienen activos
+FRACCION_RECONSTRUIR_INDICES = 0.25
+
+# Filas por pedido: 1 pedido + 3 detalles de media + 3/5 pagos + 2/5 envíos
+FILAS_POR_PEDIDO = 1 + (MIN_DETALLES + MAX_DETALLES) / 2 + 0.6 + 0.4
+
+# Tamaño de buffer para COPY (también es el tamaño de cada tramo)
+COPY_BUFFER_SIZE = 50000
+
+# Filas de un tramo que se arman juntas como objetos Python: la memoria del
+# generador depende de este tamaño y no del de los tramos. Cambiarlo cambia
+# los datos generados
+FILAS_POR_LOTE = 2048
+
+# Tramos generados que pueden esperar su COPY por cada worker (acota la memoria)
+PROFUNDIDAD_COLA = 2
+
+# Tablas que recibe cada tramo; con COPY FREEZE se vacían juntas en su transacción
+TABLAS_TRAMO = {
+    'Cliente': ['Cliente'],
+    'Producto': ['Producto'],
+    'Pedido': ['Pedido', 'DetallePedido', 'Pago', 'Envio'],
+}
+
+CATEGORIAS = [
+    'Electrónica', 'Ropa', 'Hogar', 'Deportes', 'Libros',
+    'Juguetes', 'Alimentos', 'Belleza', 'Automotriz', 'Jardinería',
+    'Música', 'Cine', 'Gaming', 'Oficina', 'Mascotas', 'Farmacia',
+    'Construcción', 'Arte', 'Fotografía', 'Tecnología'
+]
+
+# Triggers que se desactivan durante la carga; sus efectos se aplican en
+# bloque al final (conciliación y reconstrucción de los resúmenes)
+TRIGGERS_CARGA = {
+    'DetallePedido': [
+        'trg_validar_stock', 'trg_actualizar_total_insert',
+        'trg_actualizar_total_update', 'trg_actualizar_total_delete',
+        'trg_resumen_ventas_insert', 'trg_resumen_ventas_update', 'trg_resumen_ventas_delete',
+    ],
+    'Pedido': [
+        'trg_resumen_pedidos_insert', 'trg_resumen_pedidos_update', 'trg_resumen_pedidos_delete',
+    ],
+}
+
+# Tablas que conservan sus índices y restricciones durante la carga: Categoria
+# se llena con INSERT ... ON CONFLICT (Nombre), que necesita su índice único
+TABLAS_CON_ESTRUCTURAS = ('Categoria',)
+
+# Estado compartido con los workers (se asigna en el proceso padre y en cada worker)
+_contexto = {}
+_progreso = None
+
+# Telemetría de la ejecución en curso (solo en el proceso principal)
+_telemetria = None
+
+
+def conectar_db():
+    """Conexión a PostgreSQL"""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.autocommit = False
+        if _contexto.get('ajustes_sesion'):
+            aplicar_ajustes_sesion(conn, _contexto['ajustes_sesion'])
+        return conn
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def parsear_argumentos(argv=None):
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Poblado de la BD E-Commerce por nivel o escala")
+    tamano = parser.add_mutually_exclusive_group()
+    tamano.add_argument('--nivel', choices=NIVELES, default=None,
+                        help="Nivel predefinido (default: masivo)")
+    tamano.add_argument('--escala', '--scale', type=float, default=None,
+                        help=f"Factor de escala respecto a masivo ({ESCALA_MIN} a {ESCALA_MAX:g})")
+    parser.add_argument('--clientes', type=int, default=None,
+                        help="Clientes a generar (sustituye al nivel/escala)")
+    parser.add_argument('--productos', type=int, default=None,
+                        help="Productos a generar (sustituye al nivel/escala)")
+    parser.add_argument('--pedidos', type=int, default=None,
+                        help="Pedidos a generar (sustituye al nivel/escala)")
+    parser.add_argument('--anexar', '--append', action='store_true',
+                        help="Agrega las filas a los datos existentes en lugar de vaciar las tablas")
+    parser.add_argument('--resume', '--reanudar', action='store_true',
+                        help="Reanuda la última carga interrumpida (ignora nivel, escala y cantidades)")
+    parser.add_argument('--fast-unsafe', '--rapido-inseguro', action='store_true',
+                        help="Carga con tablas UNLOGGED, sin autovacuum y synchronous_commit=off")
+    parser.add_argument('--perfil', choices=PERFILES, default=None,
+                        help="Perfil de ajuste de --fast-unsafe (default: el del nivel o la estrategia)")
+    parser.add_argument('--stock', choices=MODOS_STOCK, default='ajustar',
+                        help="Productos que venden más que su stock: ajustar (reponer) o marcar (default: ajustar)")
+    parser.add_argument('--comparar-vacuum-full', action='store_true',
+                        help="Mide además un VACUUM FULL ANALYZE final para comparar tiempos")
+    parser.add_argument('--estrategia', choices=('auto',) + ESTRATEGIAS, default='auto',
+                        help="Estrategia de carga (default: auto, según el tamaño)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WORKERS_POBLADO', os.cpu_count() or 1)),
+                        help="Procesos de la estrategia copy_paralelo (default: WORKERS_POBLADO o CPUs)")
+    parser.add_argument('--semilla', type=int, default=SEMILLA,
+                        help=f"Semilla global de generación (default: {SEMILLA})")
+    parser.add_argument('--formato', choices=FORMATOS, default=os.getenv('FORMATO_COPY', 'binario'),
+                        help="Formato de COPY: binario (PGCOPY) o texto (default: binario)")
+    parser.add_argument('--fecha-referencia', type=date.fromisoformat, default=None,
+                        help="Fecha 'actual' para generar fechas relativas "
+                             "(default: la de la caché de datos o, si no hay, hoy)")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="No usa ni guarda la caché de datos generados (CACHE_DIR/datos)")
+    parser.add_argument('--sin-freeze', action='store_true',
+                        help="Confirma cada tramo por separado en lugar de cargar cada tabla con COPY FREEZE "
+                             "en una transacción (--resume no repite la tabla interrumpida)")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    if args.escala is not None and not ESCALA_MIN <= args.escala <= ESCALA_MAX:
+        parser.error(f"--escala debe estar entre {ESCALA_MIN} y {ESCALA_MAX:g}")
+    for tabla in ('clientes', 'productos', 'pedidos'):
+        if getattr(args, tabla) is not None and getattr(args, tabla) < 0:
+            parser.error(f"--{tabla} no puede ser negativo")
+    if args.nivel is None and args.escala is None:
+        args.nivel = 'masivo'
+    return args
+
+
+def calcular_cantidades(nivel=None, escala=None, explicitas=None):
+    """Clientes, productos y pedidos de un nivel predefinido o de una escala
+
+    explicitas ({tabla: n o None}) sustituye las cantidades indicadas.
+    """
+    if nivel is not None:
+        cantidades = dict(NIVELES[nivel])
+    else:
+        cantidades = {
+            'clientes': max(MIN_FILAS, round(CLIENTES * escala)),
+            'productos': max(MIN_FILAS, round(PRODUCTOS * escala)),
+            'pedidos': max(MIN_FILAS, round(PEDIDOS * escala)),
+        }
+    for tabla, n in (explicitas or {}).items():
+        if n is not None:
+            cantidades[tabla] = n
+    return cantidades
+
+
+def filas_estimadas(cantidades):
+    """Filas totales aproximadas que genera una carga"""
+    return (cantidades['clientes'] + cantidades['productos']
+            + cantidades['pedidos'] * FILAS_POR_PEDIDO)
+
+
+def elegir_estrategia(cantidades, workers):
+    """Estrategia de carga más rápida para el tamaño estimado"""
+    filas = filas_estimadas(cantidades)
+    if filas < UMBRAL_COPY:
+        return 'valores'
+    if filas < UMBRAL_PARALELO or workers == 1:
+        return 'copy'
+    return 'copy_paralelo'
+
+
+def calcular_tramos(total, tamano=None):
+    """Divide el rango de filas [0, total) en tramos (indice, inicio, fin)"""
+    tamano = tamano or COPY_BUFFER_SIZE
+    return [(i, inicio, min(inicio + tamano, total))
+            for i, inicio in enumerate(range(0, total, tamano))]
+
+
+def tablas_afectadas(cantidades):
+    """Tablas que recibe filas una carga con estas cantidades"""
+    tablas = []
+    if cantidades['clientes']:
+        tablas.append('Cliente')
+    if cantidades['productos']:
+        tablas += ['Categoria', 'Producto']
+    if cantidades['pedidos']:
+        tablas += ['Pedido', 'DetallePedido', 'Pago', 'Envio']
+    return tablas
+
+
+def filas_existentes(conn, tablas):
+    """Filas actuales de las tablas según el catálogo (reltuples, sin COUNT(*))"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)::bigint FROM pg_class
+        WHERE relkind = 'r' AND relname = ANY(%s)
+    """, ([t.lower() for t in tablas],))
+    filas = cursor.fetchone()[0]
+    conn.commit()
+    return filas
+
+
+def analizar_tablas(conn, tablas):
+    """ANALYZE solo de las tablas indicadas, en paralelo (una tabla por conexión)"""
+    ejecutar_en_paralelo(conn, conectar_db, [(f"analyze {tabla}", tabla, f"ANALYZE {tabla}") for tabla in tablas],
+                         desc="ANALYZE")
+
+
+def desactivar_triggers(conn):
+    """Desactiva los triggers de DetallePedido y Pedido (los totales se generan ya calculados)"""
+    cursor = conn.cursor()
+    for tabla, triggers in TRIGGERS_CARGA.items():
+        for trigger in triggers:
+            cursor.execute(f"ALTER TABLE {tabla} DISABLE TRIGGER {trigger}")
+    conn.commit()
+    print("✓ Triggers desactivados")
+
+
+def reactivar_triggers(conn):
+    """Reactiva los triggers de DetallePedido y Pedido"""
+    cursor = conn.cursor()
+    for tabla, triggers in TRIGGERS_CARGA.items():
+        for trigger in triggers:
+            cursor.execute(f"ALTER TABLE {tabla} ENABLE TRIGGER {trigger}")
+    conn.commit()
+    print("✓ Triggers reactivados")
+
+
+def desactivar_estructuras(conn, tablas):
+    """Elimina índices y restricciones (salvo PK) de las tablas que se cargan con COPY"""
+    print("\n🔧 Eliminando índices y restricciones...")
+    tablas = [tabla for tabla in tablas if tabla not in TABLAS_CON_ESTRUCTURAS]
+    estructuras = capturar_estructuras(conn, tablas)
+    # Se guardan antes de eliminarlas para poder restaurarlas tras una interrupción
+    guardar_estructuras(conn, _contexto['id_ejecucion'], estructuras)
+    eliminar_estructuras(conn, estructuras)
+    print(f"✓ {len(estructuras)} índices y restricciones eliminados")
+
+
+def desactivar_claves_foraneas(conn, tablas):
+    """Elimina las FK que unen las tablas con otras, que impiden pasarlas a UNLOGGED
+
+    Se guardan y restauran igual que el resto de estructuras.
+    """
+    claves = capturar_claves_foraneas(conn, tablas)
+    if not claves:
+        return
+    guardar_estructuras(conn, _contexto['id_ejecucion'], claves)
+    eliminar_estructuras(conn, claves)
+    print(f"✓ {len(claves)} claves foráneas eliminadas para el modo UNLOGGED")
+
+
+def reactivar_estructuras(conn):
+    """Restaura los índices y restricciones eliminados, en varias conexiones"""
+    estructuras = estructuras_guardadas(conn, _contexto['id_ejecucion'])
+    if not estructuras:
+        return
+    print(f"\n🔧 Restaurando {len(estructuras)} índices y restricciones...")
+    errores = restaurar_estructuras(conn, conectar_db, estructuras)
+    for nombre, error in errores:
+        print(f"⚠️  {nombre}: {error}")
+    if errores:
+        # Se conservan las definiciones para reintentar en la siguiente ejecución
+        raise RuntimeError(f"{len(errores)} índices o restricciones no se pudieron restaurar")
+    descartar_estructuras(conn, _contexto['id_ejecucion'])
+    print("✓ Índices y restricciones restaurados")
+
+
+def limpiar_datos(conn):
+    """Limpia datos"""
+    print("\n🗑️  Limpiando datos...")
+    cursor = conn.cursor()
+
+    tablas = ['Pago', 'Envio', 'DetallePedido', 'Pedido', 'Producto', 'Categoria', 'Cliente'] + list(RESUMENES)
+    for tabla in tablas:
+        cursor.execute(f"TRUNCATE TABLE {tabla} RESTART IDENTITY CASCADE")
+
+    conn.commit()
+    print("✓ Datos limpiados")
+
+
+def conciliar_carga(conn, modo_stock):
+    """Aplica en bloque las reglas de los triggers desactivados, una vez por ejecución"""
+    print("\n⚖️  Conciliando totales, pagos y stock...")
+    id_ejecucion = _contexto['id_ejecucion']
+    if fase_completada(conn, id_ejecucion, 'conciliacion'):
+        print("✓ Conciliación ya aplicada en esta ejecución")
+        return
+    conciliar(conn, _contexto['primer_id']['Pedido'], modo_stock,
+              al_confirmar=lambda cursor: registrar_fase(cursor, id_ejecucion, 'conciliacion'))
+
+
+def clave_tramo(tabla, inicio):
+    """Clave del tramo para su semilla: el primer Id del tramo
+
+    Es la misma para una carga dada sin importar workers ni estrategia, y
+    distinta entre cargas sucesivas en modo anexar.
+    """
+    return int(_contexto['primer_id'][tabla] + inicio)
+
+
+def rng_para_tramo(tabla, inicio):
+    """Generador NumPy del tramo que empieza en la fila inicio de la tabla"""
+    return rng_tramo(_contexto['semilla'], tabla, clave_tramo(tabla, inicio))
+
+
+def lote_clientes(rng, n):
+    """Columnas numéricas de un tramo de clientes (al generarlo y al reconstruir el padrón)"""
+    return generar_lote_clientes(rng, n, _contexto['fecha_referencia'], 5 * 365, 0.9)
+
+
+def lote_productos(rng, n):
+    """Columnas numéricas de un tramo de productos (al generarlo y al reconstruir el padrón)"""
+    return generar_lote_productos(rng, n, _contexto['categorias'], 5, 15000, 3000, 0.95)
+
+
+def _lotes_tramo(rng, n, sortear):
+    """Lotes (desde, hasta, columnas) de un tramo de n filas, de FILAS_POR_LOTE en FILAS_POR_LOTE
+
+    Las columnas numéricas se sortean para todo el tramo con sortear(rng, n),
+    igual que al reconstruir el padrón, pero solo al leer la primera fila:
+    los tramos en cola no ocupan memoria.
+    """
+    columnas = sortear(rng, n)
+    for desde in range(0, n, FILAS_POR_LOTE):
+        yield desde, min(desde + FILAS_POR_LOTE, n), columnas
+
+
+def filas_por_lotes(lotes, armar, reloj):
+    """Filas de un tramo armadas lote a lote a medida que se leen
+
+    armar(*lote) devuelve las columnas de un lote. Solo un lote de objetos
+    Python existe a la vez, así que la memoria no crece con el tramo. El
+    tiempo de obtener y armar cada lote se suma a reloj['segundos']: es
+    generación aunque ocurra mientras COPY lee el tramo.
+    """
+    lotes = iter(lotes)
+    while True:
+        comienzo = time.perf_counter()
+        lote = next(lotes, None)
+        if lote is None:
+            return
+        columnas = armar(*lote)
+        reloj['segundos'] += time.perf_counter() - comienzo
+        yield from zip(*columnas)
+
+
+def generar_tramo_clientes(rng, inicio, fin, reloj):
+    """Genera un tramo de clientes: sus filas, que se arman lote a lote al leerlas"""
+    vocabulario = _contexto['vocabulario']
+    primero = _contexto['primer_id']['Cliente'] + inicio
+
+    def armar(desde, hasta, lote):
+        # Los emails llevan el Id del cliente: únicos entre tramos, workers y
+        # cargas sucesivas sin guardar ni consultar los ya generados
+        ids = range(primero + desde, primero + hasta)
+        return (ids, vocabulario.nombres(rng, len(ids)), vocabulario.emails(rng, ids),
+                vocabulario.telefonos(rng, len(ids)), lote['fecha_registro'][desde:hasta].tolist(),
+                lote['activo'][desde:hasta].tolist())
+
+    return {'Cliente': filas_por_lotes(_lotes_tramo(rng, fin - inicio, lote_clientes), armar, reloj)}
+
+
+def generar_tramo_productos(rng, inicio, fin, reloj):
+    """Genera un tramo de productos: sus filas, que se arman lote a lote al leerlas"""
+    vocabulario = _contexto['vocabulario']
+    primero = _contexto['primer_id']['Producto'] + inicio
+
+    def armar(desde, hasta, lote):
+        k = hasta - desde
+        return (range(primero + desde, primero + hasta), lote['id_categoria'][desde:hasta].tolist(),
+                vocabulario.nombres_producto(rng, k), vocabulario.descripciones(rng, k, 200),
+                decimales(lote['precio'][desde:hasta]), lote['stock'][desde:hasta].tolist(),
+                lote['activo'][desde:hasta].tolist())
+
+    return {'Producto': filas_por_lotes(_lotes_tramo(rng, fin - inicio, lote_productos), armar, reloj)}
+
+
+def _lotes_pedidos(rng, inicio, fin):
+    """Lotes (filas_pedido, lote) del tramo de pedidos, sorteados de FILAS_POR_LOTE en FILAS_POR_LOTE
+
+    filas_pedido son las filas del total que ocupa el lote. Las tablas del
+    tramo se envían una tras otra, así que cada una recorre los lotes con su
+    propia copia del generador en lugar de guardarlos hasta la última.
+    """
+    rng = copy.deepcopy(rng)
+    for desde in range(inicio, fin, FILAS_POR_LOTE):
+        hasta = min(desde + FILAS_POR_LOTE, fin)
+        lote = generar_lote_pedidos(
+            rng, hasta - desde,
+            _contexto['clientes'], _contexto['productos_ids'], _contexto['productos_precios'],
+            _contexto['fecha_referencia'], 2 * 365, MIN_DETALLES, MAX_DETALLES,
+            max_cantidad=8, max_horas_pago=72, max_dias_envio=7)
+        yield np.arange(desde, hasta), lote
+
+
+def generar_tramo_pedidos(rng, inicio, fin, reloj):
+    """Genera un tramo de pedidos con sus detalles, pagos y envíos (filas armadas lote a lote al leerlas)"""
+    # Id a partir de los bloques reservados antes de la carga: la fila k del
+    # total usa el Id primero + k en Pedido, Pago y Envio, y MAX_DETALLES Id
+    # consecutivos desde primero + k * MAX_DETALLES en DetallePedido
+    primer_id = _contexto['primer_id']
+
+    def armar_pedidos(filas_pedido, lote):
+        return ((primer_id['Pedido'] + filas_pedido).tolist(), lote['id_cliente'].tolist(),
+                lote['fecha'].tolist(), [ESTADOS_PEDIDO[e] for e in lote['estado'].tolist()],
+                decimales(lote['total']))
+
+    def armar_detalles(filas_pedido, lote):
+        filas_detalle = filas_pedido[lote['detalle_pedido']]
+        return ((primer_id['DetallePedido'] + filas_detalle * MAX_DETALLES + lote['detalle_posicion']).tolist(),
+                (primer_id['Pedido'] + filas_detalle).tolist(), lote['detalle_producto'].tolist(),
+                lote['cantidad'].tolist(), decimales(lote['precio_unitario']))
+
+    # Pagos y envíos (como mucho uno por pedido)
+    def armar_pagos(filas_pedido, lote):
+        con_pago = lote['con_pago']
+        return ((primer_id['Pago'] + filas_pedido[con_pago]).tolist(),
+                (primer_id['Pedido'] + filas_pedido[con_pago]).tolist(), lote['fecha_pago'][con_pago].tolist(),
+                [METODOS_PAGO[m] for m in lote['metodo_pago'][con_pago].tolist()],
+                decimales(lote['total'][con_pago]))
+
+    # Las direcciones salen de otro generador: el del tramo se repite en cada tabla
+    vocabulario = _contexto['vocabulario']
+    rng_envios = rng_para_tramo('Envio', inicio)
+
+    def armar_envios(filas_pedido, lote):
+        con_envio = lote['con_envio']
+        n_envios = int(con_envio.sum())
+        return ((primer_id['Envio'] + filas_pedido[con_envio]).tolist(),
+                (primer_id['Pedido'] + filas_pedido[con_envio]).tolist(),
+                vocabulario.direcciones(rng_envios, n_envios), vocabulario.ciudades(rng_envios, n_envios),
+                lote['fecha_envio'][con_envio].tolist())
+
+    return {
+        'Pedido': filas_por_lotes(_lotes_pedidos(rng, inicio, fin), armar_pedidos, reloj),
+        'DetallePedido': filas_por_lotes(_lotes_pedidos(rng, inicio, fin), armar_detalles, reloj),
+        'Pago': filas_por_lotes(_lotes_pedidos(rng, inicio, fin), armar_pagos, reloj),
+        'Envio': filas_por_lotes(_lotes_pedidos(rng, inicio, fin), armar_envios, reloj),
+    }
+
+
+GENERADORES = {
+    'Cliente': generar_tramo_clientes,
+    'Producto': generar_tramo_productos,
+    'Pedido': generar_tramo_pedidos,
+}
+
+
+def llenar_buffers(datos):
+    """Codifica las filas de cada tabla en un buffer, para enviar el tramo a otro proceso"""
+    buffers = {}
+    for tabla, filas in datos.items():
+        buffer = crear_buffer(tabla, _contexto['formato'])
+        for fila in filas:
+            buffer.escribir(fila)
+        buffers[tabla] = buffer
+    return buffers
+
+
+def copiar_tramo(cursor, datos, freeze=False, indice=None):
+    """Envía cada tabla del tramo y devuelve las filas por tabla
+
+    datos tiene por tabla un iterable de filas, que se codifica mientras
+    COPY lo lee (copiar_filas), o un buffer ya codificado en otro proceso.
+    Si la ejecución escribe la caché de datos, el flujo de cada tabla se
+    guarda también como el tramo indice.
+    """
+    cache = _contexto.get('cache')
+    filas = {}
+    for tabla, valor in datos.items():
+        with cache.tramo(tabla, indice) if cache else nullcontext({'archivo': None}) as registro:
+            if es_buffer(valor):
+                n = copiar_buffer(cursor, valor, freeze, registro['archivo'])
+            else:
+                n = copiar_filas(cursor, tabla, valor, _contexto['formato'], freeze, registro['archivo'])
+            registro['filas'] = n
+        if n:
+            filas[tabla] = n
+    return filas
+
+
+def _inicializar_worker(contexto, progreso):
+    """Inicializa el estado global de un proceso worker"""
+    global _contexto, _progreso
+    _contexto = contexto
+    _progreso = progreso
+
+
+class EtapaCopy(threading.Thread):
+    """Etapa COPY del pipeline: vacía una cola acotada de tramos en su propia conexión
+
+    Con congelar (lista de tablas) la etapa vacía esas tablas y carga todos
+    los tramos con COPY FREEZE en una única transacción, que confirma al
+    terminar; si no, confirma cada tramo por separado.
+    """
+
+    def __init__(self, profundidad=PROFUNDIDAD_COLA, congelar=None):
+        super().__init__(daemon=True)
+        self.cola = queue.Queue(maxsize=profundidad)
+        self.congelar = congelar
+        self.totales = {}
+        # Segundos de generación de los tramos recibidos y de su transferencia;
+        # los lotes que se arman mientras COPY lee cuentan como generación
+        self.tiempos = {'generacion': 0.0, 'transferencia': 0.0}
+        self.error = None
+
+    def run(self):
+        conn = None
+        try:
+            conn = conectar_db()
+            cursor = conn.cursor()
+            if self.congelar:
+                # Sin RESTART IDENTITY: los bloques de Id ya están reservados. Las
+                # tablas que dependen de estas aún están vacías (se cargan después)
+                cursor.execute(f"TRUNCATE TABLE {', '.join(self.congelar)} CASCADE")
+            while True:
+                item = self.cola.get()
+                if item is None:
+                    break
+                filas, datos, tramo, reloj = item
+                inicio = time.perf_counter()
+                for t, n in copiar_tramo(cursor, datos, bool(self.congelar), tramo[1]).items():
+                    self.totales[t] = self.totales.get(t, 0) + n
+                # Punto de control en la misma transacción que los datos
+                registrar_tramo(cursor, _contexto['id_ejecucion'], *tramo)
+                if not self.congelar:
+                    conn.commit()
+                perezosa = reloj['segundos'] if reloj else 0.0
+                self.tiempos['generacion'] += perezosa
+                self.tiempos['transferencia'] += time.perf_counter() - inicio - perezosa
+                _progreso.put(filas)
+            conn.commit()
+        except BaseException as e:
+            # Guardar el error y seguir vaciando la cola para no bloquear al generador
+            self.error = e
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            while self.cola.get() is not None:
+                pass
+        finally:
+            if conn is not None and not conn.closed:
+                conn.close()
+
+    def enviar(self, filas, datos, tramo, segundos=0.0, reloj=None):
+        """Encola un tramo generado (tramo = tabla, indice, filas, estado_rng); bloquea si la cola está llena
+
+        segundos es lo que tardó en generarse el tramo y reloj, si lo hay,
+        acumula lo que tarden en armarse sus filas mientras COPY las lee.
+        """
+        self.tiempos['generacion'] += segundos
+        self.cola.put((filas, datos, tramo, reloj))
+
+    def terminar(self):
+        """Espera a que se carguen los tramos encolados y devuelve las filas por tabla y los tiempos"""
+        self.cola.put(None)
+        self.join()
+        if self.error is not None:
+            raise RuntimeError(f"Error en la etapa COPY: {self.error}") from self.error
+        return self.totales, self.tiempos
+
+
+def _generar_tramo(tabla, indice, inicio, fin, codificar=False):
+    """Genera un tramo: (filas, datos, tramo, segundos, reloj) listo para EtapaCopy.enviar
+
+    Con codificar=True las filas se codifican ya en buffers (el tramo se
+    envía a otro proceso) y segundos incluye todo; si no, la etapa COPY las
+    arma al leerlas y suma ese tiempo en reloj.
+    """
+    comienzo = time.perf_counter()
+    rng = rng_para_tramo(tabla, inicio)
+    estado = rng.bit_generator.state
+    reloj = {'segundos': 0.0}
+    datos = GENERADORES[tabla](rng, inicio, fin, reloj)
+    if codificar:
+        datos = llenar_buffers(datos)
+        reloj = None
+    return fin - inicio, datos, (tabla, indice, fin - inicio, estado), time.perf_counter() - comienzo, reloj
+
+
+def _cargar_tramos(tabla, tramos, congelar=None):
+    """Genera una lista de tramos mientras la etapa COPY carga los anteriores"""
+    etapa = EtapaCopy(congelar=congelar)
+    etapa.start()
+
+    for indice, inicio, fin in tramos:
+        if etapa.error is not None:
+            break
+        etapa.enviar(*_generar_tramo(tabla, indice, inicio, fin))
+
+    return etapa.terminar()
+
+
+def _cargar_tramos_congelados(pool, workers, tabla, tramos):
+    """Los workers generan los tramos y este proceso los carga con COPY FREEZE
+
+    COPY FREEZE exige vaciar la tabla en la misma transacción, así que todos
+    los tramos pasan por una sola conexión. Se mantienen como mucho
+    workers * PROFUNDIDAD_COLA tramos generados en espera para acotar la memoria.
+    """
+    etapa = EtapaCopy(congelar=TABLAS_TRAMO[tabla])
+    etapa.start()
+
+    en_curso = deque()
+    for tramo in tramos:
+        en_curso.append(pool.apply_async(_generar_tramo, (tabla,) + tramo + (True,)))
+        if len(en_curso) >= workers * PROFUNDIDAD_COLA:
+            etapa.enviar(*en_curso.popleft().get())
+            if etapa.error is not None:
+                break
+    while en_curso and etapa.error is None:
+        etapa.enviar(*en_curso.popleft().get())
+
+    return etapa.terminar()
+
+
+def repartir_tramos(tramos, workers):
+    """Asigna los tramos a los workers en round-robin"""
+    return [tramos[w::workers] for w in range(workers) if tramos[w::workers]]
+
+
+def tramos_pendientes(conn, tabla, tramos):
+    """Quita los tramos ya confirmados en la ejecución y comprueba su semilla"""
+    confirmados = tramos_confirmados(conn, _contexto['id_ejecucion'], tabla)
+    for indice, inicio, _ in tramos:
+        if indice in confirmados and not mismo_estado(confirmados[indice],
+                                                      rng_para_tramo(tabla, inicio).bit_generator.state):
+            raise RuntimeError(f"El tramo {indice} de {tabla} se generó con otra semilla; no se puede reanudar")
+    return [t for t in tramos if t[0] not in confirmados]
+
+
+def cargar_tabla_paralelo(conn, tabla, total, workers, desc):
+    """Carga una tabla por tramos, en paralelo si workers > 1
+
+    Devuelve las filas por tabla y los segundos de generación y de
+    transferencia, sumados entre todos los workers.
+    """
+    tramos = tramos_pendientes(conn, tabla, calcular_tramos(total))
+    hechas = total - sum(fin - inicio for _, inicio, fin in tramos)
+    totales = {}
+    tiempos = {'generacion': 0.0, 'transferencia': 0.0}
+
+    # COPY FREEZE solo si la tabla se carga entera en esta transacción
+    congelar = bool(_contexto['congelar'] and tramos and hechas == 0)
+
+    with tqdm(total=total, initial=hechas, desc=desc) as pbar:
+        if workers == 1:
+            # Mismo código que los workers, ejecutado en el proceso principal
+            _inicializar_worker(_contexto, _ProgresoLocal(pbar))
+            resultados = [_cargar_tramos(tabla, tramos, TABLAS_TRAMO[tabla] if congelar else None)]
+        elif congelar:
+            _inicializar_worker(_contexto, _ProgresoLocal(pbar))
+            ctx = mp.get_context('fork')
+            with ctx.Pool(workers, initializer=_inicializar_worker,
+                          initargs=(_contexto, None)) as pool:
+                resultados = [_cargar_tramos_congelados(pool, workers, tabla, tramos)]
+                pool.close()
+                pool.join()
+        else:
+            ctx = mp.get_context('fork')
+            progreso = ctx.Queue()
+            with ctx.Pool(workers, initializer=_inicializar_worker,
+                          initargs=(_contexto, progreso)) as pool:
+                asignaciones = [(tabla, lote) for lote in repartir_tramos(tramos, workers)]
+                pendiente = pool.starmap_async(_cargar_tramos, asignaciones)
+                while True:
+                    try:
+                        pbar.update(progreso.get(timeout=0.5))
+                    except queue.Empty:
+                        if pendiente.ready():
+                            break
+                resultados = pendiente.get()
+                pool.close()
+                pool.join()
+
+    for parcial, segundos in resultados:
+        for t, n in parcial.items():
+            totales[t] = totales.get(t, 0) + n
+        for fase, s in segundos.items():
+            tiempos[fase] += s
+    return totales, tiempos
+
+
+class _ProgresoLocal:
+    """Adaptador de la barra de progreso con la interfaz de una Queue"""
+
+    def __init__(self, pbar):
+        self.pbar = pbar
+
+    def put(self, n):
+        self.pbar.update(n)
+
+
+def registrar_carga(fase, totales, tiempos):
+    """Añade a la fase los tiempos de generación y transferencia y registra las filas de cada tabla"""
+    fase.update({f"{etapa}_segundos": round(s, 4) for etapa, s in tiempos.items()})
+    for tabla, filas in totales.items():
+        _telemetria.registrar_tabla(tabla, filas, fase['segundos'])
+
+
+def reservar_ids(conn, cantidades):
+    """Reserva los bloques de Id que aún no tenga la ejecución y los registra"""
+    nuevas = {t: n for t, n in cantidades.items() if t not in _contexto['primer_id']}
+    if nuevas:
+        reservados = reservar_bloques(conn, nuevas)
+        guardar_primer_id(conn, _contexto['id_ejecucion'], reservados)
+        _contexto['primer_id'].update(reservados)
+
+
+def poblar_clientes(conn, total, workers):
+    """Poblar clientes con la estrategia elegida"""
+    print(f"\n👥 Poblando {total:,} clientes ({_contexto['estrategia']}, {workers} workers)...")
+    reservar_ids(conn, {'Cliente': total})
+    with _telemetria.fase('carga_clientes') as fase:
+        totales, tiempos = cargar_tabla_paralelo(conn, 'Cliente', total, workers, "Generando clientes")
+    registrar_carga(fase, totales, tiempos)
+    print(f"✓ {totales.get('Cliente', 0):,} clientes insertados")
+
+
+def poblar_categorias(conn):
+    """Poblar categorías"""
+    print(f"\n📂 Poblando {len(CATEGORIAS)} categorías...")
+    cursor = conn.cursor()
+    insertadas = 0
+
+    for cat in CATEGORIAS:
+        cursor.execute("""
+            INSERT INTO Categoria (Nombre, Descripcion, Activo)
+            VALUES (%s, %s, TRUE)
+            ON CONFLICT (Nombre) DO NOTHING
+        """, (cat, f"Productos de {cat.lower()}"))
+        insertadas += cursor.rowcount
+
+    conn.commit()
+    print(f"✓ {insertadas} categorías insertadas")
+
+
+def poblar_productos(conn, total, workers):
+    """Poblar productos con la estrategia elegida"""
+    print(f"\n📦 Poblando {total:,} productos ({_contexto['estrategia']}, {workers} workers)...")
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT Id_Categoria FROM Categoria ORDER BY Id_Categoria")
+    _contexto['categorias'] = [r[0] for r in cursor.fetchall()]
+    conn.commit()
+    reservar_ids(conn, {'Producto': total})
+
+    with _telemetria.fase('carga_productos') as fase:
+        totales, tiempos = cargar_tabla_paralelo(conn, 'Producto', total, workers, "Generando productos")
+    registrar_carga(fase, totales, tiempos)
+    print(f"✓ {totales.get('Producto', 0):,} productos insertados")
+
+
+def cargar_padron(conn):
+    """Clientes activos y productos activos con stock (con su precio) entre los que se reparten los pedidos
+
+    En una carga completa se reconstruyen a partir de las semillas de los
+    tramos de Cliente y Producto; al anexar se leen de la base, ordenados
+    por Id para que el padrón sea el mismo en cada ejecución.
+    """
+    if _contexto['anexar']:
+        clientes, _ = padron_consultado(
+            conn, "SELECT Id_Cliente FROM Cliente WHERE Activo = TRUE ORDER BY Id_Cliente")
+        productos, precios = padron_consultado(conn, """
+            SELECT Id_Producto, (Precio * 100)::bigint FROM Producto
+            WHERE Activo = TRUE AND Stock > 0 ORDER BY Id_Producto
+        """)
+    else:
+        cantidades, primer_id = _contexto['cantidades'], _contexto['primer_id']
+        # Una tabla vaciada sin filas nuevas no tiene bloque reservado: su padrón queda vacío
+        clientes, _ = padron_generado(
+            calcular_tramos(cantidades['clientes']), primer_id.get('Cliente', 0),
+            lambda inicio, fin: lote_clientes(rng_para_tramo('Cliente', inicio), fin - inicio),
+            lambda lote: lote['activo'])
+        productos, precios = padron_generado(
+            calcular_tramos(cantidades['productos']), primer_id.get('Producto', 0),
+            lambda inicio, fin: lote_productos(rng_para_tramo('Producto', inicio), fin - inicio),
+            lambda lote: lote['activo'] & (lote['stock'] > 0),
+            lambda lote: lote['precio'])
+    _contexto['clientes'] = clientes
+    _contexto['productos_ids'] = productos
+    _contexto['productos_precios'] = precios
+    print(f"✓ Padrón: {len(clientes):,} clientes activos | {len(productos):,} productos con stock "
+          f"({(clientes.nbytes + productos.nbytes + precios.nbytes) / 1024 / 1024:.1f} MB)")
+
+
+def bloques_pedidos(total):
+    """Id a reservar por tabla para total pedidos"""
+    # Un bloque contiguo por tabla: la secuencia avanza una sola vez
+    return {'Pedido': total, 'DetallePedido': total * MAX_DETALLES, 'Pago': total, 'Envio': total}
+
+
+def poblar_pedidos(conn, total, workers):
+    """Poblar pedidos con sus detalles, pagos y envíos con la estrategia elegida"""
+    print(f"\n🛒 Poblando {total:,} pedidos con detalles ({_contexto['estrategia']}, {workers} workers)...")
+    cargar_padron(conn)
+    if not len(_contexto['clientes']) or not len(_contexto['productos_ids']):
+        raise RuntimeError("No hay clientes activos o productos con stock para generar pedidos")
+
+    reservar_ids(conn, bloques_pedidos(total))
+
+    with _telemetria.fase('carga_pedidos') as fase:
+        totales, tiempos = cargar_tabla_paralelo(conn, 'Pedido', total, workers, "Generando pedidos")
+    registrar_carga(fase, totales, tiempos)
+
+    print(f"✓ {totales.get('Pedido', 0):,} pedidos, {totales.get('DetallePedido', 0):,} detalles, "
+          f"{totales.get('Pago', 0):,} pagos, {totales.get('Envio', 0):,} envíos")
+
+
+def poblar_desde_cache(conn, cache, cantidades):
+    """Carga las tablas con los flujos COPY de la caché de datos, sin generar nada
+
+    Los bloques de Id se reservan igual que en una carga generada y deben
+    coincidir con los de la caché. Los tramos se registran como confirmados
+    para que --resume no vuelva a cargarlos.
+    """
+    print(f"\n💾 Cargando datos de la caché {cache.clave}...")
+    manifiesto = cache.manifiesto()
+    if cantidades['productos']:
+        poblar_categorias(conn)
+    reservar_ids(conn, {'Cliente': cantidades['clientes'], 'Producto': cantidades['productos'],
+                        **bloques_pedidos(cantidades['pedidos'])})
+    if manifiesto['primer_id'] != {t: _contexto['primer_id'][t] for t in manifiesto['primer_id']}:
+        raise RuntimeError("Los bloques de Id reservados no coinciden con los de la caché de datos; "
+                           "repite la carga con --sin-cache")
+
+    with _telemetria.fase('carga_cache') as fase:
+        resultados = cargar_cache(cache, conectar_db)
+    for tabla, (filas, segundos) in resultados.items():
+        _telemetria.registrar_tabla(tabla, filas, segundos)
+
+    cursor = conn.cursor()
+    for tabla, clave in (('Cliente', 'clientes'), ('Producto', 'productos'), ('Pedido', 'pedidos')):
+        for indice, inicio, fin in calcular_tramos(cantidades[clave]):
+            registrar_tramo(cursor, _contexto['id_ejecucion'], tabla, indice, fin - inicio,
+                            rng_para_tramo(tabla, inicio).bit_generator.state)
+    conn.commit()
+
+    print(f"✓ {sum(filas for filas, _ in resultados.values()):,} filas cargadas de la caché en "
+          f"{fase['segundos']:.2f}s ({len(resultados)} tablas en paralelo)")
+
+
+def mostrar_estadisticas(conn):
+    """Estadísticas detalladas"""
+    print("\n📊 Estadísticas de la base de datos:")
+    cursor = conn.cursor()
+
+    tablas = ['Cliente', 'Categoria', 'Producto', 'Pedido', 'DetallePedido', 'Pago', 'Envio']
+    total = 0
+
+    for tabla in tablas:
+        cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+        count = cursor.fetchone()[0]
+        total += count
+        print(f"   {tabla:15} {count:>15,} registros")
+
+    print(f"   {'TOTAL':15} {total:>15,} registros")
+
+
+def crear_cache(args, cantidades, estrategia):
+    """Caché de datos de la carga, o None si no se usa
+
+    Solo se guardan cargas completas con COPY. La clave no incluye la fecha
+    de referencia, que se guarda en la propia caché.
+    """
+    if args.anexar or args.sin_cache or estrategia == 'valores':
+        return None
+    esquema = huella_esquema()
+    if esquema is None:
+        print("⚠️  No se encontró schema.sql: caché de datos desactivada")
+        return None
+    return CacheDatos({
+        'semilla': args.semilla,
+        'cantidades': cantidades,
+        'tramo': COPY_BUFFER_SIZE,
+        'lote': FILAS_POR_LOTE,
+        'formato': args.formato,
+    }, esquema)
+
+
+def main(argv=None):
+    """Función principal"""
+    global _telemetria
+    args = parsear_argumentos(argv)
+
+    conn = conectar_db()
+    crear_tablas_control(conn)
+
+    cache = None
+    if args.resume:
+        pendiente = ejecucion_pendiente(conn)
+        if pendiente is None:
+            print("❌ No hay ninguna carga interrumpida que reanudar")
+            conn.close()
+            sys.exit(1)
+        id_ejecucion, parametros, primer_id = pendiente
+        if parametros['tramo'] != COPY_BUFFER_SIZE:
+            print(f"❌ La carga pendiente usó tramos de {parametros['tramo']:,} filas "
+                  f"(actual: {COPY_BUFFER_SIZE:,})")
+            conn.close()
+            sys.exit(1)
+        # Los datos dependen solo de estos parámetros: se toman de la ejecución original
+        args.semilla = parametros['semilla']
+        args.anexar = parametros['anexar']
+        args.fecha_referencia = date.fromisoformat(parametros['fecha_referencia'])
+        args.fast_unsafe = parametros.get('rapido_inseguro', False)
+        args.perfil = parametros.get('perfil')
+        args.stock = parametros.get('modo_stock', args.stock)
+        args.sin_freeze = parametros.get('sin_freeze', False)
+        ajustes_tabla = parametros.get('ajustes_tabla')
+        cantidades = parametros['cantidades']
+        if args.fast_unsafe:
+            con_tramos = [t for t in ('Cliente', 'Producto', 'Pedido')
+                          if tramos_confirmados(conn, id_ejecucion, t)]
+            vacias = tablas_vaciadas(conn, con_tramos)
+            if vacias:
+                print(f"❌ Las tablas UNLOGGED {', '.join(vacias)} se vaciaron (¿reinicio del servidor?); "
+                      "repite la carga sin --resume")
+                conn.close()
+                sys.exit(1)
+        etiqueta = f"{parametros['etiqueta']} (reanudada)"
+    else:
+        pendiente = ejecucion_pendiente(conn)
+        if pendiente and pendiente[1].get('ajustes_tabla'):
+            # Una carga rápida abandonada dejó tablas UNLOGGED o sin autovacuum
+            restaurar_ajustes_tabla(conn, pendiente[1]['ajustes_tabla'])
+        cantidades = calcular_cantidades(args.nivel, args.escala, {
+            'clientes': args.clientes, 'productos': args.productos, 'pedidos': args.pedidos})
+        etiqueta = f"nivel {args.nivel}" if args.nivel else f"escala {args.escala:g}"
+        estrategia = args.estrategia
+        if estrategia == 'auto':
+            estrategia = elegir_estrategia(cantidades, args.workers)
+        if args.perfil is None:
+            args.perfil = args.nivel or PERFIL_ESTRATEGIA[estrategia]
+        cache = crear_cache(args, cantidades, estrategia)
+        if args.fecha_referencia is None:
+            # Sin fecha explícita se reutiliza la de la caché, que así sirve también otro día
+            args.fecha_referencia = (cache.fecha_referencia() if cache is not None else None) or date.today()
+        ajustes_tabla = None
+        if args.fast_unsafe:
+            ajustes_tabla = capturar_ajustes_tabla(conn, tablas_afectadas(cantidades))
+        primer_id = {}
+        id_ejecucion = iniciar_ejecucion(conn, {
+            'semilla': args.semilla,
+            'cantidades': cantidades,
+            'fecha_referencia': args.fecha_referencia.isoformat(),
+            'anexar': args.anexar,
+            'tramo': COPY_BUFFER_SIZE,
+            'etiqueta': etiqueta,
+            'rapido_inseguro': args.fast_unsafe,
+            'perfil': args.perfil,
+            'modo_stock': args.stock,
+            'sin_freeze': args.sin_freeze,
+            'ajustes_tabla': ajustes_tabla,
+        })
+
+    tablas = tablas_afectadas(cantidades)
+    estrategia = args.estrategia
+    if estrategia == 'auto':
+        estrategia = elegir_estrategia(cantidades, args.workers)
+    workers = args.workers if estrategia == 'copy_paralelo' else 1
+
+    print("\n" + "="*80)
+    print(f"  POBLADO - {etiqueta.upper()}")
+    print("="*80)
+    print(f"  Clientes: {cantidades['clientes']:,} | Productos: {cantidades['productos']:,} | "
+          f"Pedidos: {cantidades['pedidos']:,}")
+    print(f"  Estrategia: {estrategia} | Workers: {workers} | Semilla: {args.semilla} | "
+          f"COPY: {args.formato} | Referencia: {args.fecha_referencia}")
+    if args.anexar:
+        print("  Modo: anexar (sin vaciar las tablas)")
+    if args.fast_unsafe:
+        print(f"  Modo: rápido inseguro (perfil {args.perfil}, WAL mínimo; reproducible con la semilla)")
+    print(f"  Ejecución de carga: {id_ejecucion}")
+
+    _contexto['semilla'] = args.semilla
+    _contexto['estrategia'] = estrategia
+    _contexto['anexar'] = args.anexar
+    # Una carga completa con COPY vacía y carga cada tabla en la misma transacción,
+    # salvo que se prefiera confirmar (y poder reanudar) tramo a tramo
+    _contexto['congelar'] = estrategia != 'valores' and not args.anexar and not args.sin_freeze
+    if _contexto['congelar']:
+        print("  COPY FREEZE: una transacción por tabla (--resume la repite entera; --sin-freeze confirma por tramo)")
+    _contexto['formato'] = 'valores' if estrategia == 'valores' else args.formato
+    _contexto['fecha_referencia'] = datetime.combine(args.fecha_referencia, datetime.min.time())
+    # Se carga antes de crear los workers para que lo hereden con fork
+    _contexto['vocabulario'] = Vocabulario.cargar(args.semilla)
+    _contexto['primer_id'] = primer_id
+    _contexto['id_ejecucion'] = id_ejecucion
+    _contexto['cantidades'] = cantidades
+    if args.fast_unsafe:
+        # Las conexiones que se abran desde aquí (también en los workers) usan el perfil
+        _contexto['ajustes_sesion'] = PERFILES[args.perfil]['sesion']
+        aplicar_ajustes_sesion(conn, _contexto['ajustes_sesion'])
+
+    # La caché de datos se lee solo si coinciden la clave y la fecha de referencia
+    usar_cache = cache is not None and cache.disponible(args.fecha_referencia)
+    if cache is not None:
+        print(f"  Caché de datos: {cache.clave} ({'disponible' if usar_cache else 'se guardará'})")
+    if cache is not None and not usar_cache:
+        try:
+            cache.preparar()
+            _contexto['cache'] = cache
+        except OSError as e:
+            print(f"⚠️  No se pudo preparar la caché de datos: {e}")
+
+    _telemetria = Telemetria('poblar', {'etiqueta': etiqueta, 'estrategia': estrategia, 'workers': workers})
+    _telemetria.datos.update({'id_ejecucion': id_ejecucion, 'cantidades': cantidades, 'semilla': args.semilla,
+                              'cache': 'leida' if usar_cache else 'escrita' if 'cache' in _contexto else None})
+    estado = 'error'
+
+    print(f"✓ Conectado a {DB_CONFIG['database']}")
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_current_wal_lsn()")
+    wal_inicio = cursor.fetchone()[0]
+    conn.commit()
+
+    try:
+        # Con pocas filas (o pocas respecto a las existentes al anexar) es
+        # más barato mantener los índices que reconstruirlos
+        reconstruir_indices = estrategia != 'valores'
+        if args.anexar:
+            existentes = filas_existentes(conn, tablas)
+            reconstruir_indices = reconstruir_indices and (
+                filas_estimadas(cantidades) > FRACCION_RECONSTRUIR_INDICES * existentes)
+            print(f"✓ {existentes:,} filas existentes en las tablas afectadas; "
+                  f"índices {'reconstruidos' if reconstruir_indices else 'activos'} durante la carga")
+        elif not args.resume:
+            with _telemetria.fase('limpieza'):
+                limpiar_datos(conn)
+
+        with _telemetria.fase('desactivar_triggers'):
+            desactivar_triggers(conn)
+        if reconstruir_indices:
+            with _telemetria.fase('eliminar_estructuras'):
+                desactivar_estructuras(conn, tablas)
+        if args.fast_unsafe:
+            # Después de quitar las FK: una tabla LOGGED no puede apuntar a una UNLOGGED
+            # ni al revés, así que se quitan aunque los índices sigan activos
+            with _telemetria.fase('modo_rapido'):
+                if PERFILES[args.perfil]['unlogged']:
+                    desactivar_claves_foraneas(conn, tablas)
+                convertidas = aplicar_modo_rapido(conn, PERFILES[args.perfil], ajustes_tabla)
+            print(f"✓ Perfil {args.perfil} aplicado (tablas UNLOGGED: "
+                  f"{', '.join(convertidas) if convertidas else 'ninguna'})")
+
+        if usar_cache:
+            poblar_desde_cache(conn, cache, cantidades)
+        else:
+            if cantidades['clientes']:
+                poblar_clientes(conn, cantidades['clientes'], workers)
+            if cantidades['productos']:
+                poblar_categorias(conn)
+                poblar_productos(conn, cantidades['productos'], workers)
+            if cantidades['pedidos']:
+                poblar_pedidos(conn, cantidades['pedidos'], workers)
+        if cantidades['pedidos']:
+            with _telemetria.fase('conciliacion'):
+                conciliar_carga(conn, args.stock)
+            with _telemetria.fase('resumenes'):
+                reconstruir_resumenes(conn)
+
+        with _telemetria.fase('reactivar_triggers'):
+            reactivar_triggers(conn)
+        if args.fast_unsafe:
+            with _telemetria.fase('restaurar_modo_rapido'):
+                restaurar_ajustes_tabla(conn, ajustes_tabla)
+            print("✓ Tablas LOGGED y autovacuum restaurados")
+        # También restaura lo que dejó pendiente una ejecución interrumpida
+        with _telemetria.fase('restaurar_estructuras'):
+            reactivar_estructuras(conn)
+
+        print("\n🔧 Optimizando base de datos...")
+        # Las filas de COPY FREEZE ya están congeladas y visibles para todos, y las
+        # de INSERT, anexadas o --sin-freeze las mantiene el autovacuum: basta con estadísticas
+        with _telemetria.fase('analyze') as fase:
+            analizar_tablas(conn, tablas + (list(RESUMENES) if cantidades['pedidos'] else []))
+        duracion_optimizacion = fase['segundos']
+        print(f"✓ Optimización completada en {duracion_optimizacion:.2f}s")
+
+        if args.comparar_vacuum_full:
+            # Medición de la ruta anterior (VACUUM FULL ANALYZE de toda la BD)
+            conn.autocommit = True
+            with _telemetria.fase('vacuum_full') as fase:
+                conn.cursor().execute("VACUUM FULL ANALYZE")
+            duracion_vacuum = fase['segundos']
+            conn.autocommit = False
+            print(f"📊 VACUUM FULL ANALYZE: {duracion_vacuum:.2f}s | "
+                  f"ahorro de la ruta actual: {duracion_vacuum - duracion_optimizacion:.2f}s")
+
+        finalizar_ejecucion(conn, id_ejecucion)
+        if 'cache' in _contexto:
+            try:
+                tamano_cache = cache.publicar(_contexto['primer_id'], args.fecha_referencia)
+                print(f"💾 Caché de datos guardada: {cache.ruta} ({tamano_cache / 1024 / 1024:.0f} MB)")
+            except OSError as e:
+                print(f"⚠️  No se pudo guardar la caché de datos: {e}")
+
+        with _telemetria.fase('estadisticas'):
+            mostrar_estadisticas(conn)
+
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM Cliente) + (SELECT COUNT(*) FROM Producto) +
+                       (SELECT COUNT(*) FROM Pedido) + (SELECT COUNT(*) FROM DetallePedido) +
+                       (SELECT COUNT(*) FROM Pago) + (SELECT COUNT(*) FROM Envio)
+            """)
+            total_reg = cursor.fetchone()[0]
+
+            cursor.execute("SELECT pg_database_size(%s), pg_wal_lsn_diff(pg_current_wal_lsn(), %s)::bigint",
+                           (DB_CONFIG['database'], wal_inicio))
+            tamano, wal = cursor.fetchone()
+            conn.commit()
+
+        # Métricas finales
+        total = _telemetria.resumen()
+        duracion = total['segundos']
+        _telemetria.metrica('registros', total_reg)
+        _telemetria.metrica('registros_por_segundo', round(total_reg / duracion))
+        _telemetria.metrica('bd_bytes', tamano)
+        _telemetria.metrica('wal_bytes', wal)
+
+        print(f"\n{'='*80}")
+        print("  MÉTRICAS DE RENDIMIENTO")
+        print(f"{'='*80}")
+        print(f"⏱️  Tiempo total: {duracion:.2f} segundos ({duracion/60:.2f} minutos)")
+        print(f"💾 Memoria pico: {total['rss_pico_bytes'] / 1024 / 1024:.2f} MB (proceso y workers)")
+        print(f"🖥️  CPU del cliente: {total['cpu_segundos']:.2f} s (pico {total['cpu_pico_pct']:.0f}%)")
+        print(f"🚀 Velocidad: {total_reg/duracion:.2f} registros/segundo")
+        print(f"💿 Tamaño de BD: {tamano / 1024 / 1024:.0f} MB")
+        print(f"📝 WAL generado: {wal / 1024 / 1024:.0f} MB")
+
+        print("\n⏱️  Fases:")
+        for fase in _telemetria.fases:
+            print(f"   {fase['fase']:<22} {fase['segundos']:>9.2f}s | CPU {fase['cpu_segundos']:>8.2f}s | "
+                  f"RSS pico {fase['rss_pico_bytes'] / 1024 / 1024:>8.1f} MB")
+        for tabla, datos in _telemetria.tablas.items():
+            print(f"   {tabla:<22} {datos['filas']:>12,} filas | {datos['filas_por_segundo']:>10,} filas/s")
+
+        estado = 'ok'
+        print(f"\n✅ POBLADO ({etiqueta.upper()}) COMPLETADO EXITOSAMENTE")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        traceback.print_exc()
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        conn.close()
+        if estado != 'ok' and 'cache' in _contexto:
+            cache.descartar()
+        try:
+            print(f"📈 Telemetría guardada en {_telemetria.guardar(estado)}")
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la telemetría: {e}")
+
+
+if __name__ == "__main__":
+    main()
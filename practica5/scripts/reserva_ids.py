@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Reserva de rangos de Id en bloque
+Sistema E-Commerce
+
+Reserva bloques contiguos de Id de las secuencias SERIAL de schema.sql para
+cargar filas con Id explícito (COPY o INSERT multi-fila) sin un RETURNING por
+fila y sin suponer que la tabla está vacía.
+
+Cada reserva avanza la secuencia una sola vez. Durante la reserva la
+secuencia queda bloqueada (ALTER SEQUENCE toma un bloqueo que excluye a
+nextval), así que ni otros cargadores ni los INSERT normales de la aplicación
+pueden obtener un Id dentro del bloque.
+"""
+
+from copy_buffers import COLUMNAS
+
+
+def secuencia(cursor, tabla):
+    """Nombre de la secuencia SERIAL de la columna Id de la tabla"""
+    id_col = COLUMNAS[tabla][0]
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (tabla.lower(), id_col.lower()))
+    return cursor.fetchone()[0]
+
+
+def reservar_bloque(conn, tabla, n):
+    """Reserva n Id contiguos de la tabla y devuelve el primero
+
+    El bloque reservado es [primero, primero + n). Hace commit de la
+    transacción de conn para liberar la secuencia cuanto antes.
+    """
+    cursor = conn.cursor()
+    nombre = secuencia(cursor, tabla)
+
+    # Bloquea la secuencia hasta el commit (no cambia su configuración)
+    cursor.execute(f"ALTER SEQUENCE {nombre} INCREMENT BY 1")
+    cursor.execute(f"SELECT last_value, is_called FROM {nombre}")
+    ultimo, usada = cursor.fetchone()
+    primero = ultimo + 1 if usada else ultimo
+
+    if n > 0:
+        cursor.execute("SELECT setval(%s, %s, true)", (nombre, primero + n - 1))
+    conn.commit()
+    return primero
+
+
+def reservar_bloques(conn, cantidades):
+    """Reserva un bloque por tabla ({tabla: n}) y devuelve {tabla: primer Id}"""
+    return {tabla: reservar_bloque(conn, tabla, n) for tabla, n in cantidades.items()}
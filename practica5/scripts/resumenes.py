@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Reconstrucción en bloque de las tablas de resumen
+Sistema E-Commerce
+
+resumen_ventas_producto y resumen_pedidos_cliente (las que hay detrás de
+vista_ventas_producto y vista_pedidos_cliente) se mantienen con triggers por
+sentencia en el uso normal. La carga masiva desactiva esos triggers, así que
+al terminar se vuelven a calcular aquí con un solo agregado por tabla, como
+hacían las vistas originales, en lugar de fila a fila.
+
+La reconstrucción es completa (TRUNCATE e INSERT ... SELECT en la misma
+transacción): se puede repetir sin riesgo, p. ej. al reanudar una carga o
+después de un TRUNCATE manual de Pedido o DetallePedido, que no dispara los
+triggers.
+
+Las tablas de resumen, sus triggers y las vistas que las usan se añadieron
+a schema.sql después de que existieran volúmenes ya inicializados, y
+/docker-entrypoint-initdb.d solo se ejecuta sobre un volumen vacío. Esas dos
+secciones de schema.sql se pueden repetir sin riesgo (CREATE TABLE IF NOT
+EXISTS, CREATE OR REPLACE), así que aplicar_ddl_resumenes las toma del
+archivo y las ejecuta sobre una base ya creada; si las tablas no existían,
+las rellena a continuación. El entrypoint lo hace al verificar el esquema y
+a mano basta con:
+
+    python resumenes.py [--reconstruir]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import psycopg2
+from cache_datos import RUTAS_ESQUEMA
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'ecommerce_db'),
+    'user': os.getenv('DB_USER', 'ecommerce_user'),
+    'password': os.getenv('DB_PASSWORD', 'ecommerce_pass')
+}
+
+# Secciones de schema.sql que se pueden volver a ejecutar: de la cabecera de
+# los resúmenes a la de los datos iniciales (incluye las vistas)
+SECCION_RESUMENES = (r"^-- =+\n-- RESÚMENES DE VENTAS Y PEDIDOS\n.*?"
+                     r"(?=^-- =+\n-- DATOS INICIALES)")
+
+RESUMENES = {
+    'resumen_ventas_producto': """
+        INSERT INTO resumen_ventas_producto
+            (Id_Producto, Total_Ventas, Unidades_Vendidas, Ingreso_Total, Suma_Precios)
+        SELECT Id_Producto, COUNT(*), SUM(Cantidad), SUM(Cantidad * Precio_Unitario), SUM(Precio_Unitario)
+        FROM DetallePedido
+        GROUP BY Id_Producto
+    """,
+    'resumen_pedidos_cliente': """
+        INSERT INTO resumen_pedidos_cliente
+            (Id_Cliente, Total_Pedidos, Total_Gastado, Ultima_Compra)
+        SELECT Id_Cliente, COUNT(*), SUM(Total), MAX(Fecha_Pedido)
+        FROM Pedido
+        GROUP BY Id_Cliente
+    """,
+}
+
+
+def reconstruir_resumenes(conn):
+    """Vuelve a calcular las tablas de resumen desde DetallePedido y Pedido"""
+    inicio = time.perf_counter()
+    cursor = conn.cursor()
+    filas = {}
+    for tabla, consulta in RESUMENES.items():
+        cursor.execute(f"TRUNCATE TABLE {tabla}")
+        cursor.execute(consulta)
+        filas[tabla] = cursor.rowcount
+    conn.commit()
+    print(f"✓ Resúmenes reconstruidos: {filas['resumen_ventas_producto']:,} productos | "
+          f"{filas['resumen_pedidos_cliente']:,} clientes ({time.perf_counter() - inicio:.2f}s)")
+    return filas
+
+
+def ddl_resumenes():
+    """Secciones de resúmenes y vistas de schema.sql, tal como están en el archivo"""
+    ruta = next((r for r in RUTAS_ESQUEMA if os.path.exists(r)), None)
+    if ruta is None:
+        raise RuntimeError("No se encontró schema.sql")
+    with open(ruta, encoding='utf-8') as f:
+        esquema = f.read()
+    encontrada = re.search(SECCION_RESUMENES, esquema, re.DOTALL | re.MULTILINE)
+    if encontrada is None:
+        raise RuntimeError("schema.sql no tiene la sección de resúmenes")
+    return encontrada.group(0)
+
+
+def aplicar_ddl_resumenes(conn, reconstruir=False):
+    """Crea o actualiza las tablas de resumen, sus triggers y las vistas
+
+    Las tablas que faltaban (o todas, con reconstruir) se rellenan desde
+    DetallePedido y Pedido. Devuelve las tablas que se crearon.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT t FROM unnest(%s) t WHERE to_regclass(t) IS NULL", (list(RESUMENES),))
+    creadas = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute(ddl_resumenes())
+    conn.commit()
+    if creadas:
+        print(f"✓ Tablas de resumen creadas: {', '.join(creadas)}")
+    print("✓ Triggers de resumen y vistas actualizados desde schema.sql")
+    if creadas or reconstruir:
+        reconstruir_resumenes(conn)
+    return creadas
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Aplica el DDL de las tablas de resumen a una base ya creada")
+    parser.add_argument('--reconstruir', action='store_true',
+                        help="Vuelve a calcular los resúmenes aunque las tablas ya existieran")
+    args = parser.parse_args(argv)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    try:
+        aplicar_ddl_resumenes(conn, args.reconstruir)
+    except (psycopg2.Error, RuntimeError) as e:
+        print(f"\n❌ Error: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
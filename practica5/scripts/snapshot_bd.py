@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Snapshots de la base poblada como bases plantilla
+Sistema E-Commerce
+
+Volver a poblar el nivel masivo lleva minutos aunque los datos sean los
+mismos de la vez anterior. Tras un poblado correcto, guardar copia la base
+de trabajo (DB_NAME) en una base plantilla por nivel, <DB_NAME>_snap_<nivel>,
+con CREATE DATABASE ... TEMPLATE; restaurar (reset) vuelve a crear la base
+de trabajo desde esa plantilla. Desde PostgreSQL 15 la copia usa STRATEGY
+FILE_COPY: copia los archivos de la base sin escribir cada página en el WAL,
+así que restaurar el nivel masivo tarda lo que una copia de archivos.
+
+Cada snapshot guarda en su comentario (COMMENT ON DATABASE) el nivel, la
+huella de schema.sql (la misma que usa la caché de datos) y los parámetros
+de la carga; restaurar solo acepta un snapshot del mismo nivel hecho con el
+esquema actual. CREATE DATABASE ... TEMPLATE no copia el comentario, así que
+restaurar lo vuelve a escribir en la base de trabajo, con el snapshot de
+origen y la fecha de la restauración. Las plantillas quedan con IS_TEMPLATE
+y sin conexiones (ALLOW_CONNECTIONS false), así que nadie las modifica por
+error ni impide copiarlas.
+
+Las órdenes se ejecutan desde la base de mantenimiento (DB_MANTENIMIENTO)
+y cierran las sesiones abiertas en la base de trabajo. La base nueva se
+crea primero con otro nombre y solo después sustituye a la anterior: si la
+copia falla, la base de trabajo sigue intacta.
+
+Uso:
+    python snapshot_bd.py guardar --nivel NIVEL
+    python snapshot_bd.py restaurar --nivel NIVEL    (alias: reset)
+    python snapshot_bd.py listar
+    python snapshot_bd.py eliminar --nivel NIVEL
+
+restaurar termina con código SIN_SNAPSHOT si no hay un snapshot del nivel
+para el esquema actual (entrypoint.sh entonces puebla la base).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import psycopg2
+from cache_datos import huella_esquema
+from control_carga import crear_tablas_control, ejecucion_pendiente, ultima_ejecucion_completada
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'postgres'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'ecommerce_db'),
+    'user': os.getenv('DB_USER', 'ecommerce_user'),
+    'password': os.getenv('DB_PASSWORD', 'ecommerce_pass')
+}
+
+# Base desde la que se crean y eliminan las demás
+DB_MANTENIMIENTO = os.getenv('DB_MANTENIMIENTO', 'postgres')
+
+# Código de salida de restaurar cuando no hay un snapshot utilizable
+SIN_SNAPSHOT = 2
+
+
+def conectar_db(database=DB_MANTENIMIENTO):
+    """Conexión a PostgreSQL (por defecto a la base de mantenimiento, en autocommit)"""
+    try:
+        conn = psycopg2.connect(**{**DB_CONFIG, 'database': database})
+        conn.autocommit = True
+        return conn
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+def nombre_snapshot(nivel):
+    """Nombre de la base plantilla del nivel (p. ej. 'escala 0.3' -> ecommerce_db_snap_escala_0_3)"""
+    return f"{DB_CONFIG['database']}_snap_{re.sub(r'[^a-z0-9]+', '_', nivel.lower()).strip('_')}"
+
+
+def _estrategia(conn):
+    """Cláusula de copia por archivos de CREATE DATABASE (PostgreSQL 15+)"""
+    return " STRATEGY FILE_COPY" if conn.server_version >= 150000 else ""
+
+
+def existe_base(cursor, nombre):
+    cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (nombre,))
+    return cursor.fetchone() is not None
+
+
+def datos_snapshot(cursor, nombre):
+    """Metadatos guardados en el comentario del snapshot, o None si no existe"""
+    cursor.execute("SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = %s",
+                   (nombre,))
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    try:
+        return json.loads(fila[0] or '{}')
+    except ValueError:
+        return {}
+
+
+def comentar_base(cursor, nombre, datos):
+    """Guarda los metadatos en el comentario de la base (COMMENT ON DATABASE)"""
+    cursor.execute(f'COMMENT ON DATABASE "{nombre}" IS %s', (json.dumps(datos, ensure_ascii=False),))
+
+
+def cerrar_sesiones(cursor, nombre):
+    """Termina las sesiones abiertas en la base y devuelve cuántas había"""
+    cursor.execute("""
+        SELECT COUNT(pg_terminate_backend(pid)) FROM pg_stat_activity
+        WHERE datname = %s AND pid <> pg_backend_pid()
+    """, (nombre,))
+    return cursor.fetchone()[0]
+
+
+def eliminar_base(cursor, nombre):
+    """Elimina la base si existe, aunque sea una plantilla"""
+    if not existe_base(cursor, nombre):
+        return
+    cursor.execute(f'ALTER DATABASE "{nombre}" WITH IS_TEMPLATE false')
+    cerrar_sesiones(cursor, nombre)
+    # FORCE (PostgreSQL 13+) también cierra las sesiones que se abran entretanto
+    forzar = " WITH (FORCE)" if cursor.connection.server_version >= 130000 else ""
+    cursor.execute(f'DROP DATABASE "{nombre}"{forzar}')
+
+
+def copiar_base(conn, origen, destino):
+    """Crea destino como copia de origen (que no debe tener sesiones abiertas)"""
+    cursor = conn.cursor()
+    sesiones = cerrar_sesiones(cursor, origen)
+    if sesiones:
+        print(f"⚠️  {sesiones} sesiones cerradas en {origen}")
+    cursor.execute(f'CREATE DATABASE "{destino}" TEMPLATE "{origen}" '
+                   f'OWNER "{DB_CONFIG["user"]}"{_estrategia(conn)}')
+
+
+def tamano_base(cursor, nombre):
+    cursor.execute("SELECT pg_database_size(%s)", (nombre,))
+    return cursor.fetchone()[0]
+
+
+def guardar(nivel):
+    """Guarda la base de trabajo como snapshot del nivel (sustituye al anterior)"""
+    esquema = huella_esquema()
+    if esquema is None:
+        print("❌ No se encontró schema.sql para calcular la huella del esquema")
+        sys.exit(1)
+
+    # Solo se guarda una base con su última carga completada
+    trabajo = conectar_db(DB_CONFIG['database'])
+    trabajo.autocommit = False
+    crear_tablas_control(trabajo)
+    pendiente = ejecucion_pendiente(trabajo)
+    parametros = ultima_ejecucion_completada(trabajo)
+    trabajo.close()
+    if pendiente is not None or parametros is None:
+        print(f"❌ {DB_CONFIG['database']} no tiene una carga completada (o tiene una a medias); "
+              "no se guarda el snapshot")
+        sys.exit(1)
+
+    nombre = nombre_snapshot(nivel)
+    print(f"\n📸 Guardando {DB_CONFIG['database']} como {nombre}...")
+    inicio = time.perf_counter()
+    conn = conectar_db()
+    cursor = conn.cursor()
+    temporal = f"{nombre}_nuevo"
+    eliminar_base(cursor, temporal)
+    copiar_base(conn, DB_CONFIG['database'], temporal)
+    eliminar_base(cursor, nombre)
+    cursor.execute(f'ALTER DATABASE "{temporal}" RENAME TO "{nombre}"')
+    datos = {
+        'nivel': nivel,
+        'esquema': esquema,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'parametros': parametros,
+    }
+    comentar_base(cursor, nombre, datos)
+    cursor.execute(f'ALTER DATABASE "{nombre}" WITH IS_TEMPLATE true ALLOW_CONNECTIONS false')
+    tamano = tamano_base(cursor, nombre)
+    conn.close()
+    print(f"✓ Snapshot {nombre} guardado ({tamano / 1024 / 1024:.0f} MB, "
+          f"{time.perf_counter() - inicio:.2f}s) | esquema {esquema[:12]}")
+
+
+def restaurar(nivel):
+    """Vuelve a crear la base de trabajo desde el snapshot del nivel
+
+    Termina con SIN_SNAPSHOT si no existe o es de otro esquema.
+    """
+    nombre = nombre_snapshot(nivel)
+    conn = conectar_db()
+    cursor = conn.cursor()
+    datos = datos_snapshot(cursor, nombre)
+    if datos is None:
+        print(f"ℹ️  No hay snapshot del nivel {nivel} ({nombre})")
+        conn.close()
+        sys.exit(SIN_SNAPSHOT)
+    esquema = huella_esquema()
+    if esquema is None or datos.get('esquema') != esquema:
+        print(f"ℹ️  El snapshot {nombre} es de otro esquema "
+              f"({str(datos.get('esquema'))[:12]} frente a {str(esquema)[:12]}); no se usa")
+        conn.close()
+        sys.exit(SIN_SNAPSHOT)
+
+    print(f"\n📸 Restaurando {DB_CONFIG['database']} desde {nombre} (guardado {datos.get('fecha')})...")
+    inicio = time.perf_counter()
+    temporal = f"{DB_CONFIG['database']}_restaurando"
+    eliminar_base(cursor, temporal)
+    copiar_base(conn, nombre, temporal)
+    eliminar_base(cursor, DB_CONFIG['database'])
+    cursor.execute(f'ALTER DATABASE "{temporal}" RENAME TO "{DB_CONFIG["database"]}"')
+    comentar_base(cursor, DB_CONFIG['database'], {
+        **datos,
+        'snapshot': nombre,
+        'restaurado': datetime.now().isoformat(timespec='seconds'),
+    })
+    conn.close()
+    print(f"✓ {DB_CONFIG['database']} restaurada en {time.perf_counter() - inicio:.2f}s")
+
+
+def listar():
+    """Muestra los snapshots guardados"""
+    conn = conectar_db()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT datname, pg_database_size(oid) FROM pg_database
+        WHERE datname LIKE %s ORDER BY datname
+    """, (f"{DB_CONFIG['database']}_snap_%",))
+    snapshots = cursor.fetchall()
+    esquema = huella_esquema()
+    print(f"\n📸 Snapshots de {DB_CONFIG['database']}:")
+    for nombre, tamano in snapshots:
+        datos = datos_snapshot(cursor, nombre) or {}
+        vigente = "✓" if datos.get('esquema') == esquema else "⚠️  otro esquema"
+        print(f"   {nombre:<40} {tamano / 1024 / 1024:>8.0f} MB | {datos.get('fecha', '?')} | {vigente}")
+    if not snapshots:
+        print("   (ninguno)")
+    conn.close()
+
+
+def eliminar(nivel):
+    """Elimina el snapshot del nivel"""
+    nombre = nombre_snapshot(nivel)
+    conn = conectar_db()
+    eliminar_base(conn.cursor(), nombre)
+    conn.close()
+    print(f"✓ Snapshot {nombre} eliminado")
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Snapshots de la base poblada como bases plantilla")
+    parser.add_argument('orden', choices=('guardar', 'restaurar', 'reset', 'listar', 'eliminar'),
+                        help="guardar, restaurar (o reset), listar o eliminar")
+    parser.add_argument('--nivel', help="Nivel o escala del snapshot (p. ej. masivo o escala_0.3)")
+    args = parser.parse_args(argv)
+    if args.orden != 'listar' and not args.nivel:
+        parser.error(f"{args.orden} necesita --nivel")
+
+    try:
+        if args.orden == 'guardar':
+            guardar(args.nivel)
+        elif args.orden in ('restaurar', 'reset'):
+            restaurar(args.nivel)
+        elif args.orden == 'listar':
+            listar()
+        else:
+            eliminar(args.nivel)
+    except psycopg2.Error as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Telemetría de rendimiento por fases
+Sistema E-Commerce
+
+Mide por separado cada fase de una ejecución (vaciado, eliminación de
+índices, generación y COPY de cada tabla, reconstrucción de índices,
+ANALYZE, estadísticas...): duración, CPU del cliente (el proceso y sus
+workers) y picos de memoria residente y de uso de CPU. Los picos los
+muestrea un hilo en segundo plano con psutil, así que se ven aunque no
+coincidan con el principio o el final de una fase.
+
+Al guardar se escriben en LOGS_DIR (el volumen app_logs en Docker):
+
+- <prefijo>_<fecha>.json:     el informe completo de la ejecución
+- <prefijo>_historial.jsonl:  una línea de resumen por ejecución, para
+                              comparar ejecuciones a lo largo del tiempo
+- <prefijo>.prom:             las métricas de la última ejecución en el
+                              formato de texto de Prometheus (textfile
+                              collector de node_exporter)
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import psutil
+
+LOGS_DIR = os.getenv('LOGS_DIR', 'logs')
+
+# Intervalo del muestreo de memoria y CPU
+INTERVALO_MUESTREO = 0.05
+
+# Métricas por fase y por tabla que se exportan a Prometheus: clave -> ayuda
+METRICAS_FASE = {
+    'segundos': 'Duración de la fase',
+    'cpu_segundos': 'CPU del cliente (proceso y workers) durante la fase',
+    'rss_pico_bytes': 'Pico de memoria residente del proceso y sus workers durante la fase',
+    'cpu_pico_pct': 'Pico de uso de CPU del cliente durante la fase (100 = un núcleo)',
+}
+METRICAS_TABLA = {
+    'filas': 'Filas cargadas en la tabla',
+    'filas_por_segundo': 'Filas por segundo de la fase en que se cargó la tabla',
+}
+
+
+def tiempo_cpu():
+    """Segundos de CPU (usuario + sistema) de este proceso y de sus hijos terminados"""
+    tiempos = os.times()
+    return tiempos.user + tiempos.system + tiempos.children_user + tiempos.children_system
+
+
+class MuestreoRecursos(threading.Thread):
+    """Hilo que registra los picos de RSS y CPU del proceso y sus hijos mientras está activo
+
+    pico y cpu_pico son los de toda la ejecución; pico_fase y cpu_pico_fase
+    se ponen a cero con reiniciar_fase().
+    """
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.proceso = psutil.Process()
+        # Se reutilizan los objetos Process: cpu_percent mide desde la muestra anterior
+        self._procesos = {self.proceso.pid: self.proceso}
+        self.pico = self.pico_fase = 0
+        self.cpu_pico = self.cpu_pico_fase = 0.0
+        self._cerrojo = threading.Lock()
+        self._detener = threading.Event()
+
+    def _arbol(self):
+        """El proceso y sus hijos vivos"""
+        try:
+            hijos = self.proceso.children(recursive=True)
+        except psutil.Error:
+            hijos = []
+        self._procesos = {self.proceso.pid: self.proceso,
+                          **{h.pid: self._procesos.get(h.pid, h) for h in hijos}}
+        return list(self._procesos.values())
+
+    def rss(self):
+        """RSS actual del proceso y sus hijos, en bytes"""
+        return self.muestrear(cpu=False)[0]
+
+    def muestrear(self, cpu=True):
+        """Toma una muestra, actualiza los picos y devuelve (rss, cpu_pct)
+
+        El uso de CPU se mide desde la muestra anterior, así que solo lo
+        toman las muestras periódicas del hilo (cpu=False en las demás).
+        """
+        with self._cerrojo:
+            rss, uso = 0, 0.0
+            for proceso in self._arbol():
+                try:
+                    rss += proceso.memory_info().rss
+                    if cpu:
+                        uso += proceso.cpu_percent(None)
+                except psutil.Error:
+                    pass
+            self.pico, self.pico_fase = max(self.pico, rss), max(self.pico_fase, rss)
+            self.cpu_pico, self.cpu_pico_fase = max(self.cpu_pico, uso), max(self.cpu_pico_fase, uso)
+            return rss, uso
+
+    def reiniciar_fase(self):
+        """Empieza a medir los picos de una fase nueva"""
+        with self._cerrojo:
+            self.pico_fase, self.cpu_pico_fase = 0, 0.0
+        self.muestrear(cpu=False)
+
+    def run(self):
+        while not self._detener.is_set():
+            self.muestrear()
+            self._detener.wait(self.intervalo)
+
+    def detener(self):
+        """Detiene el muestreo y devuelve el pico de RSS en bytes"""
+        self._detener.set()
+        if self.is_alive():
+            self.join()
+        self.muestrear(cpu=False)
+        return self.pico
+
+
+class Telemetria:
+    """Fases, tablas y métricas de una ejecución, con su muestreo de recursos en segundo plano"""
+
+    def __init__(self, prefijo, etiquetas=None, intervalo=INTERVALO_MUESTREO):
+        self.prefijo = prefijo
+        # Identifican la ejecución en Prometheus (p. ej. nivel y estrategia)
+        self.etiquetas = dict(etiquetas or {})
+        self.datos = {}
+        self.fases = []
+        self.tablas = {}
+        self.metricas = {}
+        self.fecha = datetime.now()
+        self._inicio = time.perf_counter()
+        self._cpu = tiempo_cpu()
+        self.muestreo = MuestreoRecursos(intervalo)
+        self.muestreo.start()
+
+    @contextmanager
+    def fase(self, nombre):
+        """Mide el bloque como una fase; el diccionario que se entrega admite datos extra"""
+        self.muestreo.reiniciar_fase()
+        registro = {'fase': nombre}
+        inicio, cpu = time.perf_counter(), tiempo_cpu()
+        try:
+            yield registro
+        finally:
+            self.muestreo.muestrear(cpu=False)
+            registro.update({
+                'segundos': round(time.perf_counter() - inicio, 4),
+                'cpu_segundos': round(tiempo_cpu() - cpu, 4),
+                'rss_pico_bytes': self.muestreo.pico_fase,
+                'cpu_pico_pct': round(self.muestreo.cpu_pico_fase, 1),
+            })
+            self.fases.append(registro)
+
+    def registrar_tabla(self, tabla, filas, segundos):
+        """Filas cargadas en la tabla y su velocidad (acumula si la tabla se carga varias veces)"""
+        actual = self.tablas.setdefault(tabla, {'filas': 0, 'segundos': 0.0})
+        actual['filas'] += filas
+        actual['segundos'] = round(actual['segundos'] + segundos, 4)
+        actual['filas_por_segundo'] = round(actual['filas'] / actual['segundos']) if actual['segundos'] else 0
+
+    def metrica(self, nombre, valor):
+        """Métrica global de la ejecución (p. ej. WAL generado o tamaño de la BD)"""
+        self.metricas[nombre] = valor
+
+    def resumen(self):
+        """Duración, CPU y picos de toda la ejecución hasta ahora"""
+        self.muestreo.muestrear(cpu=False)
+        return {
+            'segundos': round(time.perf_counter() - self._inicio, 4),
+            'cpu_segundos': round(tiempo_cpu() - self._cpu, 4),
+            'rss_pico_bytes': self.muestreo.pico,
+            'cpu_pico_pct': round(self.muestreo.cpu_pico, 1),
+        }
+
+    def informe(self, estado):
+        """Informe completo de la ejecución"""
+        return {
+            'fecha': self.fecha.isoformat(timespec='seconds'),
+            'estado': estado,
+            'etiquetas': self.etiquetas,
+            **self.datos,
+            'total': {**self.resumen(), **self.metricas},
+            'fases': self.fases,
+            'tablas': self.tablas,
+        }
+
+    def prometheus(self, informe):
+        """Métricas del informe en el formato de texto de Prometheus"""
+        lineas = []
+
+        def serie(nombre, ayuda, valores):
+            lineas.append(f"# HELP {self.prefijo}_{nombre} {ayuda}")
+            lineas.append(f"# TYPE {self.prefijo}_{nombre} gauge")
+            for etiquetas, valor in valores:
+                etiquetas = {**self.etiquetas, **etiquetas}
+                texto = ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas.items())
+                lineas.append(f"{self.prefijo}_{nombre}{{{texto}}} {valor}")
+
+        serie('ultima_ejecucion_timestamp_segundos', 'Inicio de la última ejecución (epoch)',
+              [({}, int(self.fecha.timestamp()))])
+        serie('exito', '1 si la última ejecución terminó correctamente', [({}, int(informe['estado'] == 'ok'))])
+        for clave, valor in informe['total'].items():
+            if isinstance(valor, (int, float)):
+                serie(clave, f"Total de la ejecución: {clave}", [({}, valor)])
+        for clave, ayuda in METRICAS_FASE.items():
+            serie(f"fase_{clave}", ayuda, [({'fase': f['fase']}, f[clave]) for f in informe['fases']])
+        for clave, ayuda in METRICAS_TABLA.items():
+            serie(f"tabla_{clave}", ayuda, [({'tabla': t}, d[clave]) for t, d in informe['tablas'].items()])
+        return "\n".join(lineas) + "\n"
+
+    def guardar(self, estado='ok', directorio=None):
+        """Detiene el muestreo y escribe el JSON, el historial y el .prom; devuelve la ruta del JSON"""
+        self.muestreo.detener()
+        directorio = directorio or LOGS_DIR
+        os.makedirs(directorio, exist_ok=True)
+        informe = self.informe(estado)
+
+        ruta = os.path.join(directorio, f"{self.prefijo}_{self.fecha.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2, default=str)
+
+        with open(os.path.join(directorio, f"{self.prefijo}_historial.jsonl"), 'a', encoding='utf-8') as f:
+            resumen = {k: informe[k] for k in ('fecha', 'estado', 'etiquetas', 'total')}
+            resumen['fases'] = {fase['fase']: fase['segundos'] for fase in informe['fases']}
+            f.write(json.dumps(resumen, ensure_ascii=False, default=str) + "\n")
+
+        # El collector lee el archivo en cualquier momento: se reemplaza de una vez
+        destino = os.path.join(directorio, f"{self.prefijo}.prom")
+        with open(f"{destino}.tmp", 'w', encoding='utf-8') as f:
+            f.write(self.prometheus(informe))
+        os.replace(f"{destino}.tmp", destino)
+        return ruta
+
+
+def _escapar(valor):
+    """Escapa un valor de etiqueta de Prometheus"""
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
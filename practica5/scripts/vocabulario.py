@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Práctica 5 - Pools de vocabulario para columnas de texto
+Sistema E-Commerce
+
+Llamar a Faker una vez por fila (name, catch_phrase, text, street_address,
+city...) domina el tiempo de generación. Aquí se muestrean una sola vez unos
+miles de componentes de los locales es_MX/es_ES y las filas se construyen
+indexando y combinando esos componentes con un generador NumPy.
+
+Los pools se muestrean con reemplazo desde Faker, así que la frecuencia de
+cada componente sigue la distribución del propio Faker. Se guardan en disco
+(CACHE_DIR/vocabulario) con una clave que incluye la semilla y la versión de
+Faker, de modo que solo la primera ejecución paga el muestreo.
+"""
+
+import os
+import re
+import json
+import numpy as np
+import faker
+from faker import Faker
+
+# Directorio de caché compartido por los scripts de poblado
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache'))
+
+# Versión del formato de los pools (cambiarla invalida la caché)
+VERSION_VOCABULARIO = 1
+
+# Componentes muestreados por pool
+TAMANO_POOL = 4000
+
+# Largos mínimos que exigen los CHECK de schema.sql (chk_direccion_longitud, chk_ciudad_longitud)
+MIN_LARGO_CALLE = 9
+MIN_LARGO_CIUDAD = 3
+
+# Parte local permitida por chk_email_formato
+_USUARIO_VALIDO = re.compile(r'[A-Za-z0-9._%+-]+')
+
+
+def _muestrear(fake, metodo, n, filtro=None):
+    """n valores de un método de Faker (con repeticiones, como los genera Faker)"""
+    valores = []
+    generar = getattr(fake, metodo)
+    while len(valores) < n:
+        valor = generar()
+        if filtro is None or filtro(valor):
+            valores.append(valor)
+    return valores
+
+
+def _patron_telefono(telefono):
+    """Convierte un teléfono de ejemplo en un patrón con {} en lugar de dígitos"""
+    return ''.join('{}' if c.isdigit() else c.replace('{', '{{').replace('}', '}}') for c in telefono)
+
+
+def construir_pools(semilla, tamano=TAMANO_POOL):
+    """Muestrea los componentes de vocabulario desde Faker"""
+    fake = Faker(['es_MX', 'es_ES'])
+    Faker.seed(semilla)
+    telefonos = _muestrear(fake, 'phone_number', tamano // 4, lambda t: len(t) <= 20)
+    return {
+        'nombres': _muestrear(fake, 'first_name', tamano),
+        'apellidos': _muestrear(fake, 'last_name', tamano),
+        'usuarios': _muestrear(fake, 'user_name', tamano, _USUARIO_VALIDO.fullmatch),
+        'dominios': _muestrear(fake, 'free_email_domain', tamano // 4),
+        'telefonos': [_patron_telefono(t) for t in telefonos],
+        'frases': _muestrear(fake, 'catch_phrase', tamano),
+        'colores': _muestrear(fake, 'color_name', tamano // 4),
+        'oraciones': _muestrear(fake, 'sentence', tamano),
+        'calles': _muestrear(fake, 'street_name', tamano, lambda c: len(c) >= MIN_LARGO_CALLE),
+        'ciudades': _muestrear(fake, 'city', tamano, lambda c: len(c) >= MIN_LARGO_CIUDAD),
+    }
+
+
+class Vocabulario:
+    """Pools de componentes de texto y constructores vectorizados de columnas"""
+
+    def __init__(self, pools):
+        self.pools = {nombre: np.array(valores, dtype=object) for nombre, valores in pools.items()}
+
+    @classmethod
+    def cargar(cls, semilla, directorio=None):
+        """Carga los pools de la caché en disco o los construye y guarda"""
+        directorio = os.path.join(directorio or CACHE_DIR, 'vocabulario')
+        ruta = os.path.join(directorio, f"vocabulario_s{semilla}_v{VERSION_VOCABULARIO}_faker{faker.VERSION}.json")
+
+        if os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                return cls(json.load(f))
+
+        pools = construir_pools(semilla)
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            temporal = f"{ruta}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(pools, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la caché de vocabulario: {e}")
+        return cls(pools)
+
+    def _elegir(self, rng, pool, n):
+        valores = self.pools[pool]
+        return valores[rng.integers(0, len(valores), size=n)]
+
+    def nombres(self, rng, n):
+        """Nombre y uno o dos apellidos"""
+        nombres = self._elegir(rng, 'nombres', n) + ' ' + self._elegir(rng, 'apellidos', n)
+        segundo = self._elegir(rng, 'apellidos', n)
+        con_segundo = rng.random(n) < 0.5
+        nombres[con_segundo] = nombres[con_segundo] + ' ' + segundo[con_segundo]
+        return nombres.tolist()
+
+    def emails(self, rng, ids):
+        """usuario.<id>@dominio, únicos por construcción
+
+        El Id del cliente en la parte local hace que dos emails nunca
+        coincidan si sus Id son distintos, sin llevar la cuenta de los ya
+        generados ni consultar la base.
+        """
+        usuarios = self._elegir(rng, 'usuarios', len(ids)).tolist()
+        dominios = self._elegir(rng, 'dominios', len(ids)).tolist()
+        return [f"{usuario}.{id_cliente}@{dominio}" for usuario, id_cliente, dominio in zip(usuarios, ids, dominios)]
+
+    def telefonos(self, rng, n):
+        """Formatos de teléfono de Faker rellenados con dígitos aleatorios"""
+        patrones = self._elegir(rng, 'telefonos', n).tolist()
+        digitos = rng.integers(0, 10, size=(n, 20)).tolist()
+        return [patron.format(*fila) for patron, fila in zip(patrones, digitos)]
+
+    def nombres_producto(self, rng, n, largo=200, con_color=True):
+        """Frase comercial más un color, como catch_phrase() + color_name()"""
+        nombres = self._elegir(rng, 'frases', n)
+        if con_color:
+            nombres = nombres + ' ' + self._elegir(rng, 'colores', n)
+        return [nombre[:largo] for nombre in nombres.tolist()]
+
+    def descripciones(self, rng, n, max_chars):
+        """Oraciones completas concatenadas hasta max_chars, como fake.text()"""
+        oraciones = self.pools['oraciones']
+        por_fila = max(1, max_chars // 40)
+        elegidas = oraciones[rng.integers(0, len(oraciones), size=(n, por_fila))].tolist()
+
+        textos = []
+        for fila in elegidas:
+            texto = fila[0][:max_chars]
+            for oracion in fila[1:]:
+                if len(texto) + 1 + len(oracion) > max_chars:
+                    break
+                texto = f"{texto} {oracion}"
+            textos.append(texto)
+        return textos
+
+    def direcciones(self, rng, n, largo=255):
+        """Calle y número exterior (a veces también interior)"""
+        calles = self._elegir(rng, 'calles', n)
+        numeros = rng.integers(1, 1000, size=n, endpoint=True).astype(str).astype(object)
+        interiores = rng.integers(1, 1000, size=n, endpoint=True).astype(str).astype(object)
+        direcciones = calles + ' ' + numeros
+        con_interior = rng.random(n) < 0.3
+        direcciones[con_interior] = direcciones[con_interior] + ' ' + interiores[con_interior]
+        return [direccion[:largo] for direccion in direcciones.tolist()]
+
+    def ciudades(self, rng, n, largo=100):
+        """Ciudades del pool"""
+        return [ciudad[:largo] for ciudad in self._elegir(rng, 'ciudades', n).tolist()]
\ No newline at end of file